@@ -0,0 +1,107 @@
+# benchmark.py
+#
+#   python benchmark.py --database bench.sqlite3 generate --teams 40 --seasons 50
+#   python benchmark.py --database bench.sqlite3 run --output results.json
+#   python benchmark.py generate --csv synthetic.csv --teams 20 --seasons 30
+#   python benchmark.py --database bench.sqlite3 load --url http://127.0.0.1:8000 --clients 16
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import django
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate synthetic leagues and benchmark the API.")
+    parser.add_argument('--database', metavar='PATH',
+                        help="SQLite file to use instead of db.sqlite3; created and migrated if missing.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help="Create a synthetic league.")
+    generate.add_argument('--teams', type=int, default=20)
+    generate.add_argument('--seasons', type=int, default=10)
+    generate.add_argument('--referees', type=int, default=25)
+    generate.add_argument('--first-year', type=int, default=2000)
+    generate.add_argument('--seed', type=int, default=0)
+    generate.add_argument('--csv', metavar='FILE',
+                          help="Write a football-data CSV for load_data.py --stream instead "
+                               "of loading the database.")
+
+    run = commands.add_parser('run', help="Benchmark every endpoint against the database.")
+    run.add_argument('--iterations', type=int, default=20, help="Requests per endpoint and mode.")
+    run.add_argument('--only', nargs='+', metavar='NAME', help="Benchmark just these endpoints.")
+    run.add_argument('--output', metavar='FILE', help="Write the JSON results here, not to stdout.")
+
+    load = commands.add_parser('load', help="Put a running server over the same database under "
+                                             "concurrent load.")
+    load.add_argument('--url', default='http://127.0.0.1:8000', help="Base URL of the server.")
+    load.add_argument('--clients', type=int, default=16,
+                      help="Clients sending autocomplete and standings requests.")
+    load.add_argument('--slow-clients', type=int, default=2,
+                      help="Clients sending uncached rivalries requests.")
+    load.add_argument('--duration', type=float, default=10.0, help="Seconds to run for.")
+    load.add_argument('--seed', type=int, default=0)
+    load.add_argument('--output', metavar='FILE', help="Write the JSON results here, not to stdout.")
+    return parser.parse_args()
+
+
+def generate(args):
+    from league_app.synthetic import SyntheticLeague
+
+    league = SyntheticLeague(teams=args.teams, seasons=args.seasons, referees=args.referees,
+                             first_year=args.first_year, seed=args.seed)
+    print(f"{args.seasons} season(s) of {league.matches_per_season} matches")
+    started = time.perf_counter()
+    if args.csv:
+        count = league.write_csv(args.csv)
+        print(f"Wrote {count} matches to {args.csv} in {time.perf_counter() - started:.2f}s.")
+    else:
+        from league_app.benchmark import load_synthetic
+
+        report = load_synthetic(league)
+        print(f"Loaded in {time.perf_counter() - started:.2f}s.")
+        print(f"Summary: {report}")
+
+
+def run(args):
+    from league_app.benchmark import run_benchmark
+
+    write_results(run_benchmark(iterations=max(1, args.iterations), only=args.only), args.output)
+
+
+def load(args):
+    from league_app.benchmark import run_load
+
+    results = run_load(args.url, clients=args.clients, slow_clients=args.slow_clients,
+                       duration=args.duration, seed=args.seed)
+    for name, endpoint in results["endpoints"].items():
+        print(f"{name}: {endpoint['requests_per_second']}/s, p50 {endpoint['p50_ms']}ms, "
+              f"p99 {endpoint['p99_ms']}ms")
+    write_results(results, args.output)
+
+
+def write_results(results, output):
+    if output:
+        with open(output, 'w') as handle:
+            json.dump(results, handle, indent=2)
+        print(f"Results written to {output}")
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.database:
+        os.environ['LEAGUE_DATABASE'] = os.path.abspath(args.database)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'premier_league_project.settings')
+    django.setup()
+
+    if not (args.command == 'generate' and args.csv):
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+
+    {'generate': generate, 'run': run, 'load': load}[args.command](args)
@@ -0,0 +1,30 @@
+# gunicorn.conf.py
+#
+# Read by gunicorn from the working directory. Workers write their Prometheus
+# samples to files in PROMETHEUS_MULTIPROC_DIR so that /metrics, whichever
+# worker serves it, reports totals for the whole server. Export the same
+# variable when running load_data.py to have its ingestion counters included.
+#
+# The same settings serve the ASGI profile (web-asgi in the Procfile), where
+# uvicorn workers run the async versions of the read-only API views.
+
+import os
+import shutil
+import tempfile
+
+os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'league-metrics')
+)
+
+
+def on_starting(server):
+    # Counters start from zero with each server, as Prometheus expects
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,46 @@
+# league_app/aggregates.py
+#
+# Tables derived from Match (standings snapshots, head-to-head records,
+# comeback counters) and the bookkeeping of which parts of them a batch of
+# writes invalidated.
+
+from . import comebacks, head_to_head
+from .standings import refresh_standings
+
+
+class ChangeSet:
+    """
+    Collects what a set of Match writes touched: the earliest changed date
+    per season and the team pairs involved.
+    """
+
+    def __init__(self):
+        self.seasons = {}
+        self.pairs = set()
+
+    def add(self, season_id, match_date, home_team_id, away_team_id):
+        if season_id not in self.seasons or match_date < self.seasons[season_id]:
+            self.seasons[season_id] = match_date
+        if home_team_id != away_team_id:
+            self.pairs.add(head_to_head.pair_key(home_team_id, away_team_id))
+
+    def __bool__(self):
+        return bool(self.seasons or self.pairs)
+
+
+def refresh_aggregates(changes):
+    """Recomputes every derived row a ChangeSet invalidated."""
+    refresh_standings(changes.seasons)
+    head_to_head.refresh_head_to_head(changes.pairs)
+    comebacks.refresh_comebacks(changes.seasons)
+
+
+def add_created_match(match):
+    """
+    Brings the derived tables up to date with one newly created match. The
+    pair and comeback totals take a relative update; standings replay from
+    the match date.
+    """
+    head_to_head.add_match(match)
+    comebacks.add_match(match)
+    refresh_standings({match.season_id: match.date})
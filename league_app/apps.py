@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class LeagueAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'league_app'
+
+    def ready(self):
+        from . import signals  # noqa: F401
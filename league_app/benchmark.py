@@ -0,0 +1,340 @@
+# league_app/benchmark.py
+#
+# Drives every view against whatever data is in the database, normally a
+# synthetic league written by load_synthetic(), and reports latency, query
+# counts and memory per endpoint as a JSON-friendly dict. run_load() puts a
+# running server under concurrent load instead, to compare deployments.
+
+import logging
+import platform
+import random
+import re
+import resource
+import statistics
+import subprocess
+import threading
+import time
+import tracemalloc
+from datetime import timedelta
+from itertools import count
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+import django
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .caching import response_cache
+from .ingestion import IngestReport, NameResolver, write_parsed_season
+from .models import HeadToHead, Match, Referee, Season, Team
+from .parsing import ParsedSeason
+
+DEFAULT_ITERATIONS = 20
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+# -----------------------------
+# Data
+# -----------------------------
+
+def load_synthetic(league):
+    """
+    Writes a SyntheticLeague through the normal ingestion path, one
+    transaction per season, so the derived tables are filled as well.
+    """
+    resolver = NameResolver()
+    report = IngestReport()
+    for season_name, rows in league.iter_seasons():
+        parsed = ParsedSeason(f"synthetic {season_name}", season_name, rows)
+        report.merge(write_parsed_season(parsed, resolver))
+        print(f"{season_name}: {len(rows)} matches")
+    return report
+
+
+def dataset_summary():
+    return {
+        "matches": Match.objects.count(),
+        "teams": Team.objects.count(),
+        "referees": Referee.objects.count(),
+        "seasons": Season.objects.count(),
+    }
+
+
+# -----------------------------
+# Requests
+# -----------------------------
+
+def benchmark_requests():
+    """
+    (name, method, url, data) for every view, with path and query values
+    taken from the data in the database.
+    """
+    season = Season.objects.order_by('-start_date').first()
+    pair = HeadToHead.objects.select_related('team_low', 'team_high').order_by('-matches').first()
+    referee = (Referee.objects.annotate(matches=Count('match'))
+               .order_by('-matches').values_list('name', flat=True).first())
+    if season is None or pair is None or referee is None:
+        raise ValueError("The database has no matches to benchmark against.")
+
+    middle = season.start_date + (season.end_date - season.start_date) / 2
+    season_filter = {"season": season.name}
+    date_range = {"from": middle.strftime('%d/%m/%Y'), "to": season.end_date.strftime('%d/%m/%Y')}
+    team_name = pair.team_low.name
+
+    def url(name, params=None, args=None):
+        path = reverse(name, args=args)
+        return f"{path}?{urlencode(params)}" if params else path
+
+    requests = [
+        ("homepage", "get", url('homepage'), None),
+        ("search-teams", "get", url('search-teams', {"search": team_name[:4]}), None),
+        ("search-referees", "get", url('search-referees', {"search": referee[:4]}), None),
+        ("search-seasons", "get", url('search-seasons', {"search": season.name[:4]}), None),
+        ("head-to-head-history", "get",
+         url('head-to-head-history', args=[team_name, pair.team_high.name]), None),
+        ("referee-impact", "get", url('referee-impact', args=[referee]), None),
+        ("referee-impact-season", "get", url('referee-impact', season_filter, args=[referee]), None),
+        ("referee-impact-leaderboard", "get", url('referee-impact-leaderboard'), None),
+        ("referee-impact-leaderboard-season", "get",
+         url('referee-impact-leaderboard', season_filter), None),
+        ("dynamic-league-standings", "get",
+         url('dynamic-league-standings', {"date": middle.strftime('%d/%m/%Y')}), None),
+        ("fiercest-rivalries", "get", url('fiercest-rivalries'), None),
+        ("fiercest-rivalries-season", "get", url('fiercest-rivalries', season_filter), None),
+        ("comeback-kings", "get", url('comeback-kings'), None),
+        ("comeback-kings-date-range", "get", url('comeback-kings', date_range), None),
+    ]
+
+    # Each add-match request needs a fixture that does not exist yet
+    first_date = season.end_date + timedelta(days=1)
+    fixtures = ({
+        "date": (first_date + timedelta(days=i)).isoformat(),
+        "home_team": pair.team_low.name,
+        "away_team": pair.team_high.name,
+        "referee": referee,
+        "full_time_result": "D",
+        "half_time_result": "D",
+        "home_goals": 1,
+        "away_goals": 1,
+        "season": season.name,
+    } for i in count())
+    requests.append(("add-match", "post", url('add-match'), fixtures))
+    return requests
+
+
+# -----------------------------
+# Measuring
+# -----------------------------
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarise(latencies, queries):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "max_ms": round(latencies[-1], 3),
+        "queries_per_request": round(statistics.fmean(queries), 2),
+        "max_queries": max(queries),
+    }
+
+
+def _send(client, method, url, data):
+    if method == "post":
+        return client.post(url, next(data), content_type='application/json')
+    return client.get(url)
+
+
+def measure(client, method, url, data, iterations, cold):
+    """
+    Times `iterations` requests. Cold runs clear the response cache before
+    each request so the view does its full work; warm runs are served from
+    a primed cache.
+    """
+    cache = response_cache()
+    if not cold:
+        _send(client, method, url, data)
+
+    latencies, queries, status_codes = [], [], set()
+    for _ in range(iterations):
+        if cold:
+            cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = _send(client, method, url, data)
+            latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured.captured_queries))
+        status_codes.add(response.status_code)
+
+    result = summarise(latencies, queries)
+    result["status_codes"] = sorted(status_codes)
+    return result
+
+
+def peak_memory_kb(client, method, url, data):
+    """Peak Python allocations during one cold request, in KiB."""
+    response_cache().clear()
+    tracemalloc.start()
+    try:
+        _send(client, method, url, data)
+        return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(iterations=DEFAULT_ITERATIONS, only=None):
+    """
+    Benchmarks every endpoint (or those named in `only`), cold and warm.
+    The add-match writes are rolled back afterwards, leaving the data as it
+    was. Returns a dict ready to be dumped as JSON.
+    """
+    # The timing middleware stays on, but its per-request lines would drown the report
+    logging.getLogger('league_app.requests').setLevel(logging.WARNING)
+    client = Client()
+    endpoints = {}
+    for name, method, url, data in benchmark_requests():
+        if only and name not in only:
+            continue
+        with transaction.atomic():
+            endpoints[name] = {
+                "method": method.upper(),
+                "url": url,
+                "cold": measure(client, method, url, data, iterations, cold=True),
+                # Writes are never cached
+                "warm": (measure(client, method, url, data, iterations, cold=False)
+                         if method == "get" else None),
+                "peak_memory_kb": peak_memory_kb(client, method, url, data),
+            }
+            transaction.set_rollback(method == "post")
+        print(f"{name}: p50 {endpoints[name]['cold']['p50_ms']}ms")
+
+    return {
+        "commit": git_commit(),
+        "created_at": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "iterations": iterations,
+        "dataset": dataset_summary(),
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "endpoints": endpoints,
+    }
+
+
+# -----------------------------
+# Load
+# -----------------------------
+
+def load_requests():
+    """
+    (fast, slow) functions returning a random (name, url) from a
+    random.Random. Fast requests are what a page being typed into and
+    browsed sends: autocomplete and standings. Slow ones are rivalries over
+    a random date range, which the response cache has almost never seen.
+    """
+    teams = list(Team.objects.values_list('name', flat=True))
+    seasons = list(Season.objects.order_by('start_date').values_list('start_date', 'end_date'))
+    if not teams or not seasons:
+        raise ValueError("The database has no matches to load test against.")
+
+    def day(rng, start, end):
+        return (start + timedelta(days=rng.randint(0, (end - start).days))).strftime('%d/%m/%Y')
+
+    def fast(rng):
+        if rng.random() < 0.5:
+            prefix = rng.choice(teams)[:rng.randint(2, 5)]
+            return "search-teams", f"{reverse('search-teams')}?{urlencode({'search': prefix})}"
+        start, end = rng.choice(seasons)
+        return ("dynamic-league-standings",
+                f"{reverse('dynamic-league-standings')}?{urlencode({'date': day(rng, start, end)})}")
+
+    def slow(rng):
+        first, last = sorted(rng.sample(range(len(seasons)), 2))
+        params = {"from": day(rng, *seasons[first]), "to": day(rng, *seasons[last])}
+        return "fiercest-rivalries", f"{reverse('fiercest-rivalries')}?{urlencode(params)}"
+
+    return fast, slow
+
+
+def _fetch(url):
+    """(status, queries the server reported) of one GET."""
+    try:
+        with urlopen(url, timeout=60) as response:
+            response.read()
+    except HTTPError as error:
+        response = error
+    match = SERVER_TIMING_QUERIES.search(response.headers.get('Server-Timing') or '')
+    return response.status, int(match.group(1)) if match else 0
+
+
+def run_load(base_url, clients=16, slow_clients=2, duration=10.0, seed=0):
+    """
+    Sends requests to the server at `base_url` from `clients` threads
+    issuing fast requests and `slow_clients` issuing slow ones, each
+    waiting for its response before the next, for `duration` seconds.
+    Returns latency and throughput per endpoint, as the server under test
+    saw them from outside.
+    """
+    fast, slow = load_requests()
+    base_url = base_url.rstrip('/')
+    samples = {}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(pick, client_seed):
+        rng = random.Random(client_seed)
+        while time.monotonic() < deadline:
+            name, url = pick(rng)
+            started = time.perf_counter()
+            status_code, queries = _fetch(base_url + url)
+            latency = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies, query_counts, status_codes = samples.setdefault(name, ([], [], set()))
+                latencies.append(latency)
+                query_counts.append(queries)
+                status_codes.add(status_code)
+
+    threads = [threading.Thread(target=client, args=(fast, seed + i)) for i in range(clients)]
+    threads += [threading.Thread(target=client, args=(slow, seed + clients + i))
+                for i in range(slow_clients)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    endpoints = {}
+    for name, (latencies, query_counts, status_codes) in sorted(samples.items()):
+        endpoints[name] = summarise(latencies, query_counts)
+        endpoints[name]["requests_per_second"] = round(len(latencies) / elapsed, 1)
+        endpoints[name]["status_codes"] = sorted(status_codes)
+    return {
+        "commit": git_commit(),
+        "created_at": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "url": base_url,
+        "clients": clients,
+        "slow_clients": slow_clients,
+        "duration_s": round(elapsed, 2),
+        "requests_per_second": round(sum(len(s[0]) for s in samples.values()) / elapsed, 1),
+        "dataset": dataset_summary(),
+        "endpoints": endpoints,
+    }
@@ -0,0 +1,41 @@
+# league_app/bulk.py
+#
+# Plain INSERTs for the hot write paths. bulk_create builds a model instance
+# and prepares every value through its field for each row, which costs more
+# than SQLite takes to store the row; these take ready-made tuples instead.
+
+from django.db import connection, models
+
+INSERT_BATCH_SIZE = 2000
+
+
+def insert_rows(model, fields, rows):
+    """
+    Inserts `rows`, tuples of values in `fields` order (attribute names such
+    as 'team_id'), with one executemany per INSERT_BATCH_SIZE rows. Dates
+    are adapted for the backend; every other value must already be in its
+    database form. Sends no signals and returns nothing.
+    """
+    opts = model._meta
+    quote = connection.ops.quote_name
+    columns = [opts.get_field(field).column for field in fields]
+    dates = [i for i, field in enumerate(fields)
+             if isinstance(opts.get_field(field), models.DateField)
+             and not isinstance(opts.get_field(field), models.DateTimeField)]
+    sql = (f"INSERT INTO {quote(opts.db_table)} ({', '.join(quote(c) for c in columns)}) "
+           f"VALUES ({', '.join(['%s'] * len(columns))})")
+    adapt = connection.ops.adapt_datefield_value
+
+    batch = []
+    with connection.cursor() as cursor:
+        for row in rows:
+            if dates:
+                row = list(row)
+                for i in dates:
+                    row[i] = adapt(row[i])
+            batch.append(row)
+            if len(batch) >= INSERT_BATCH_SIZE:
+                cursor.executemany(sql, batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
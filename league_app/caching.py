@@ -0,0 +1,212 @@
+# league_app/caching.py
+#
+# Response cache and conditional GET support for the read-only API views.
+# Entries and ETags are keyed on the view's path, its normalised query
+# parameters and the dataset version, a counter in the database that every
+# write to the match data bumps. Because the version
+# lives in the database rather than in the cache, workers that each hold a
+# private local-memory cache still agree on when an entry is stale.
+
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+from .metrics import RESPONSE_CACHE
+from .models import DatasetVersion
+from .renderers import FastJSONRenderer
+
+DATASET_VERSION_ID = 1
+RESPONSE_CACHE_PREFIX = 'league:response'
+
+
+# -----------------------------
+# Dataset version
+# -----------------------------
+
+def current_version():
+    """
+    Returns (version, updated_at) of the match data, (0, None) before the
+    first write.
+    """
+    row = (DatasetVersion.objects.filter(pk=DATASET_VERSION_ID)
+           .values_list('version', 'updated_at').first())
+    return row or (0, None)
+
+
+async def acurrent_version():
+    row = await (DatasetVersion.objects.filter(pk=DATASET_VERSION_ID)
+                 .values_list('version', 'updated_at').afirst())
+    return row or (0, None)
+
+
+def dataset_state():
+    """(version, updated_at, rewrites), (0, None, 0) before the first write."""
+    row = (DatasetVersion.objects.filter(pk=DATASET_VERSION_ID)
+           .values_list('version', 'updated_at', 'rewrites').first())
+    return row or (0, None, 0)
+
+
+async def adataset_state():
+    row = await (DatasetVersion.objects.filter(pk=DATASET_VERSION_ID)
+                 .values_list('version', 'updated_at', 'rewrites').afirst())
+    return row or (0, None, 0)
+
+
+def bump_version(rewrite=False):
+    """
+    Marks the match data as changed. Call it inside the transaction that
+    does the write, so readers never see new data under the old version.
+    Pass rewrite=True when the write updated or deleted existing matches
+    rather than only adding new ones.
+    """
+    now = timezone.now()
+    changes = {"version": F('version') + 1, "updated_at": now}
+    if rewrite:
+        changes["rewrites"] = F('rewrites') + 1
+    updated = DatasetVersion.objects.filter(pk=DATASET_VERSION_ID).update(**changes)
+    if not updated:
+        DatasetVersion.objects.get_or_create(
+            pk=DATASET_VERSION_ID,
+            defaults={"version": 1, "updated_at": now, "rewrites": int(rewrite)},
+        )
+
+
+# -----------------------------
+# Response cache
+# -----------------------------
+
+def response_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def normalise_params(params):
+    """Sorted (name, values) pairs with blank values dropped."""
+    normalised = []
+    for name in sorted(params):
+        values = sorted(value.strip() for value in params.getlist(name) if value.strip())
+        if values:
+            normalised.append((name, values))
+    return normalised
+
+
+def version_digest(request, version):
+    # updated_at is part of the digest so a counter value reused after a
+    # rolled back write never matches entries made under the abandoned one
+    count, updated_at = version
+    stamp = updated_at.timestamp() if updated_at else 0
+    raw = repr((request.path, normalise_params(request.GET), count, stamp))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def response_cache_key(request, version):
+    return f"{RESPONSE_CACHE_PREFIX}:{version_digest(request, version)}"
+
+
+def validators(request, version):
+    """
+    Strong ETag and Last-Modified timestamp for a response under `version`.
+    Formats other than JSON get ETags of their own, since the same URL
+    renders differently under each.
+    """
+    digest = version_digest(request, version)
+    renderer_format = getattr(getattr(request, 'accepted_renderer', None), 'format', 'json')
+    etag = f'"{digest}"' if renderer_format == 'json' else f'"{digest}.{renderer_format}"'
+    updated_at = version[1]
+    return etag, (int(updated_at.timestamp()) if updated_at else None)
+
+
+def not_modified(request, etag, last_modified):
+    """A 304 (or 412 for a failed precondition) response, otherwise None."""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    return response and set_validators(response, etag, last_modified)
+
+
+def set_validators(response, etag, last_modified):
+    if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+        patch_vary_headers(response, ['Accept'])
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+def cached_response(get):
+    """
+    Serves an APIView `get` method conditionally and from the cache: a
+    client already holding the current version gets a 304 before any work,
+    and successful responses are cached under the current dataset version.
+    The version is left on request.dataset_version for the view, so
+    in-process indexes can be checked against it without another query.
+    """
+    @wraps(get)
+    def wrapper(view, request, *args, **kwargs):
+        version = request.dataset_version = current_version()
+        etag, last_modified = validators(request, version)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            RESPONSE_CACHE.labels('not_modified').inc()
+            return response
+
+        cache = response_cache()
+        key = response_cache_key(request, version)
+        data = cache.get(key)
+        if data is not None:
+            RESPONSE_CACHE.labels('hit').inc()
+            return set_validators(Response(data, status=status.HTTP_200_OK), etag, last_modified)
+
+        RESPONSE_CACHE.labels('miss').inc()
+        response = get(view, request, *args, **kwargs)
+        # Streamed responses are never held whole, so never cached
+        if response.status_code == status.HTTP_200_OK and not response.streaming:
+            cache.set(key, response.data, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 3600))
+        return set_validators(response, etag, last_modified)
+    return wrapper
+
+
+def json_response(data, status_code=status.HTTP_200_OK):
+    """
+    A DRF Response bound to the JSON renderer, for views outside APIView
+    (the async ones); views.async_get() rebinds it to the negotiated one.
+    """
+    response = Response(data, status=status_code)
+    response.accepted_renderer = FastJSONRenderer()
+    response.accepted_media_type = FastJSONRenderer.media_type
+    response.renderer_context = {}
+    return response
+
+
+def async_cached_response(view):
+    """
+    cached_response for an async view function returning json_response().
+    Entries are shared with the sync views of the same path.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        version = request.dataset_version = await acurrent_version()
+        etag, last_modified = validators(request, version)
+        response = not_modified(request, etag, last_modified)
+        if response is not None:
+            RESPONSE_CACHE.labels('not_modified').inc()
+            return response
+
+        cache = response_cache()
+        key = response_cache_key(request, version)
+        data = await cache.aget(key)
+        if data is not None:
+            RESPONSE_CACHE.labels('hit').inc()
+            return set_validators(json_response(data), etag, last_modified)
+
+        RESPONSE_CACHE.labels('miss').inc()
+        response = await view(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK and not response.streaming:
+            await cache.aset(key, response.data, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 3600))
+        return set_validators(response, etag, last_modified)
+    return wrapper
@@ -0,0 +1,126 @@
+# league_app/comebacks.py
+
+from django.db.models import Count, F, Q, Sum
+
+from .models import ComebackCounter, Match
+
+COUNTER_FIELDS = ['home_comebacks', 'away_comebacks', 'home_blown_leads', 'away_blown_leads']
+
+HOME_COMEBACK = Q(half_time_result='A', full_time_result='H')
+AWAY_COMEBACK = Q(half_time_result='H', full_time_result='A')
+
+
+def comeback_totals(matches):
+    """
+    Counts comebacks and blown half-time leads in a Match queryset per
+    (team_id, season_id). Returns {key: [COUNTER_FIELDS...]}. Two queries.
+    """
+    turned = matches.filter(HOME_COMEBACK | AWAY_COMEBACK)
+    totals = {}
+
+    # A home comeback is a lead blown by the away side, and the other way round
+    for team_field, comeback, blown, offset in (
+        ('home_team_id', HOME_COMEBACK, AWAY_COMEBACK, 0),
+        ('away_team_id', AWAY_COMEBACK, HOME_COMEBACK, 1),
+    ):
+        rows = (
+            turned.values_list(team_field, 'season_id')
+            .annotate(comebacks=Count('id', filter=comeback), blown=Count('id', filter=blown))
+            .order_by()
+        )
+        for team_id, season_id, comebacks, blown_leads in rows:
+            counters = totals.setdefault((team_id, season_id), [0, 0, 0, 0])
+            counters[offset] += comebacks
+            counters[2 + offset] += blown_leads
+    return totals
+
+
+def counter_objects(model, totals):
+    return [
+        model(team_id=team_id, season_id=season_id, **dict(zip(COUNTER_FIELDS, counters)))
+        for (team_id, season_id), counters in totals.items()
+    ]
+
+
+def refresh_comebacks(season_ids=None):
+    """
+    Recomputes the counters of the given seasons, or of all of them when
+    `season_ids` is None.
+    """
+    counters = ComebackCounter.objects.all()
+    matches = Match.objects.all()
+    if season_ids is not None:
+        season_ids = list(season_ids)
+        if not season_ids:
+            return
+        counters = counters.filter(season_id__in=season_ids)
+        matches = matches.filter(season_id__in=season_ids)
+
+    counters.delete()
+    ComebackCounter.objects.bulk_create(counter_objects(ComebackCounter, comeback_totals(matches)))
+
+
+def add_match(match):
+    """Folds one newly created match into the counters of both teams."""
+    if match.half_time_result == 'A' and match.full_time_result == 'H':
+        increments = ((match.home_team_id, 'home_comebacks'), (match.away_team_id, 'away_blown_leads'))
+    elif match.half_time_result == 'H' and match.full_time_result == 'A':
+        increments = ((match.away_team_id, 'away_comebacks'), (match.home_team_id, 'home_blown_leads'))
+    else:
+        return
+
+    for team_id, field in increments:
+        ComebackCounter.objects.get_or_create(team_id=team_id, season_id=match.season_id)
+        ComebackCounter.objects.filter(team_id=team_id, season_id=match.season_id).update(
+            **{field: F(field) + 1}
+        )
+
+
+def comeback_table(seasons, date_from=None, date_to=None, venue=None):
+    """
+    Sums comebacks and blown leads per team over a Season queryset, limited
+    to a date range and to 'home' or 'away' matches if given. Seasons wholly
+    inside the range are read from the counters; a season the range cuts
+    through is counted from its matches in that range.
+    Returns {team_id: [comebacks, blown_leads]}.
+    """
+    whole_ids = None
+    partial_ids = []
+    if date_from or date_to:
+        if date_from:
+            seasons = seasons.filter(end_date__gte=date_from)
+        if date_to:
+            seasons = seasons.filter(start_date__lte=date_to)
+        whole_ids = []
+        for season_id, start_date, end_date in seasons.values_list('id', 'start_date', 'end_date'):
+            inside = ((not date_from or start_date >= date_from) and
+                      (not date_to or end_date <= date_to))
+            (whole_ids if inside else partial_ids).append(season_id)
+
+    venues = ('home', 'away') if venue is None else (venue,)
+    table = {}
+
+    counters = ComebackCounter.objects.filter(
+        season__in=seasons if whole_ids is None else whole_ids
+    )
+    comebacks = sum((F(f'{side}_comebacks') for side in venues[1:]), F(f'{venues[0]}_comebacks'))
+    blown = sum((F(f'{side}_blown_leads') for side in venues[1:]), F(f'{venues[0]}_blown_leads'))
+    rows = (counters.values_list('team_id')
+            .annotate(comebacks=Sum(comebacks), blown_leads=Sum(blown))
+            .order_by())
+    for team_id, team_comebacks, team_blown in rows:
+        table[team_id] = [team_comebacks, team_blown]
+
+    if partial_ids:
+        matches = Match.objects.filter(season_id__in=partial_ids)
+        if date_from:
+            matches = matches.filter(date__gte=date_from)
+        if date_to:
+            matches = matches.filter(date__lte=date_to)
+        columns = [COUNTER_FIELDS.index(f'{side}_comebacks') for side in venues]
+        for (team_id, _), counters in comeback_totals(matches).items():
+            totals = table.setdefault(team_id, [0, 0])
+            for column in columns:
+                totals[0] += counters[column]
+                totals[1] += counters[column + 2]
+    return table
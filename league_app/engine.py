@@ -0,0 +1,408 @@
+# league_app/engine.py
+#
+# The match history as NumPy column arrays, one element per match, for the
+# analytic views that aggregate over many matches (referee impact and
+# rivalries). Group-bys are np.unique / np.bincount over integer ids rather
+# than SQL GROUP BY over model rows. Each process keeps its own copy and
+# brings it up to date against the dataset version: new matches are
+# appended, and a write that changed or removed existing ones
+# (DatasetVersion.rewrites) makes it reload everything. A snapshot file
+# written by snapshot.py can stand in for the database on loads; its arrays
+# stay mapped, with the matches added since held beside them, and its name
+# tables serve team, referee and season names.
+
+import os
+import threading
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+
+from .caching import adataset_state, dataset_state
+from .models import Match, Referee, Season, Team
+
+RESULT_CODES = {'H': 0, 'D': 1, 'A': 2}
+DENSE_GROUPS = 1 << 20  # group by bincount over the raw keys up to this many of them
+NO_RESULT = -1
+NO_REFEREE = -1
+
+# (attribute, Match field, dtype)
+COLUMNS = (
+    ('id', 'id', np.int64),
+    ('season', 'season_id', np.int32),
+    ('date', 'date', np.int32),  # date.toordinal()
+    ('home', 'home_team_id', np.int32),
+    ('away', 'away_team_id', np.int32),
+    ('referee', 'referee_id', np.int32),  # NO_REFEREE when unset
+    ('full_time', 'full_time_result', np.int8),  # RESULT_CODES, NO_RESULT when unset
+    ('half_time', 'half_time_result', np.int8),
+    ('home_goals', 'home_goals', np.int32),
+    ('away_goals', 'away_goals', np.int32),
+    ('home_yellow', 'home_yellow_cards', np.int32),
+    ('away_yellow', 'away_yellow_cards', np.int32),
+    ('home_red', 'home_red_cards', np.int32),
+    ('away_red', 'away_red_cards', np.int32),
+)
+MATCH_FIELDS = [field for _, field, _ in COLUMNS]
+NAME_MODELS = {'team': Team, 'referee': Referee, 'season': Season}
+
+
+def _convert(name, values):
+    if name == 'date':
+        return [value.toordinal() for value in values]
+    if name in ('full_time', 'half_time'):
+        return [RESULT_CODES.get(value, NO_RESULT) for value in values]
+    if name == 'referee':
+        return [NO_REFEREE if value is None else value for value in values]
+    return values
+
+
+class NameTable:
+    """
+    The names of one of NAME_MODELS as a string table: ids in ascending
+    order, offsets into one UTF-8 blob (one more offset than ids) and the
+    blob. Names are decoded only when asked for.
+    """
+
+    def __init__(self, ids, offsets, blob):
+        self.ids, self.offsets, self.blob = ids, offsets, blob
+
+    @classmethod
+    def from_rows(cls, rows):
+        """The table of (id, name) rows in id order."""
+        encoded = [name.encode('utf-8') for _, name in rows]
+        offsets = np.zeros(len(encoded) + 1, dtype='<i8')
+        np.cumsum([len(name) for name in encoded], out=offsets[1:])
+        return cls(np.array([row_id for row_id, _ in rows], dtype='<i4'), offsets,
+                   np.frombuffer(b''.join(encoded), dtype=np.uint8))
+
+    @property
+    def max_id(self):
+        return int(self.ids[-1]) if len(self.ids) else 0
+
+    def arrays(self, kind):
+        return {f"{kind}.id": self.ids, f"{kind}.offsets": self.offsets, f"{kind}.names": self.blob}
+
+    def names(self, ids=None):
+        """{id: name} of the `ids` in the table, of every id if None."""
+        if ids is None:
+            positions = np.arange(len(self.ids))
+        else:
+            ids = np.fromiter(ids, dtype=np.int64)
+            positions = np.searchsorted(self.ids, ids)
+            found = positions < len(self.ids)
+            found[found] = self.ids[positions[found]] == ids[found]
+            positions = positions[found]
+        offsets = self.offsets.tolist()
+        return {int(self.ids[i]): self.blob[offsets[i]:offsets[i + 1]].tobytes().decode('utf-8')
+                for i in positions.tolist()}
+
+
+EMPTY_TABLE = NameTable.from_rows([])
+
+
+class MatchColumns:
+    """
+    One column per entry of COLUMNS, all the same length, in id order. They
+    are held in parts, {attribute: array} dicts: the arrays loaded, or
+    mapped from a snapshot, and the matches appended since. Appending only
+    rebuilds the last part, so mapped arrays stay shared rather than being
+    copied into each worker. Aggregations read them with where() and
+    select(). `tables` holds the snapshot's NameTables by kind.
+    """
+
+    def __init__(self, arrays, added=None, tables=None):
+        self.parts = [arrays] if added is None else [arrays, added]
+        self.tables = tables or {}
+
+    @classmethod
+    def from_rows(cls, rows):
+        values = list(zip(*rows)) if rows else [()] * len(COLUMNS)
+        return cls({
+            name: np.array(_convert(name, column), dtype=dtype)
+            for (name, _, dtype), column in zip(COLUMNS, values)
+        })
+
+    def __len__(self):
+        return sum(len(part['id']) for part in self.parts)
+
+    @property
+    def max_id(self):
+        for part in reversed(self.parts):
+            if len(part['id']):
+                return int(part['id'][-1])
+        return 0
+
+    def append(self, other):
+        if not len(other):
+            return self
+        added = other.parts[-1]
+        if len(self.parts) > 1:
+            added = {name: np.concatenate([self.parts[1][name], added[name]]) for name in added}
+        return MatchColumns(self.parts[0], added, self.tables)
+
+    def column(self, name):
+        """The whole column `name`, copied when it is in more than one part."""
+        return _joined([part[name] for part in self.parts])
+
+    def where(self, name, test):
+        """Boolean array of `test` applied to column `name`, part by part."""
+        return _joined([test(part[name]) for part in self.parts])
+
+    def select(self, name, mask):
+        """The values of column `name` where `mask` is set."""
+        selected, start = [], 0
+        for part in self.parts:
+            stop = start + len(part['id'])
+            selected.append(part[name][mask[start:stop]])
+            start = stop
+        return _joined(selected)
+
+    def names(self, kind, ids=None):
+        """
+        {id: name} of the `ids` (every row if None) of the `kind` of
+        NAME_MODELS held in `tables`, and a queryset of (id, name) for the
+        rest, None when nothing is left to read.
+        """
+        table = self.tables.get(kind, EMPTY_TABLE)
+        names = table.names(ids)
+        rows = NAME_MODELS[kind].objects.values_list('id', 'name')
+        if ids is None:
+            # Renaming or deleting a row reloads the columns, so the table
+            # only misses the rows created after it was written
+            return names, rows.filter(id__gt=table.max_id)
+        missing = set(ids) - names.keys()
+        return names, (rows.filter(id__in=missing) if missing else None)
+
+
+def _joined(arrays):
+    return arrays[0] if len(arrays) == 1 else np.concatenate(arrays)
+
+
+def load_columns(after_id=None):
+    """Reads every match, or those with an id above `after_id`, into columns."""
+    matches = Match.objects.order_by('id')
+    if after_id is not None:
+        matches = matches.filter(id__gt=after_id)
+    return MatchColumns.from_rows(list(matches.values_list(*MATCH_FIELDS)))
+
+
+class MatchEngine:
+    """
+    Per-process MatchColumns, synced with the database on every call to
+    columns(), which costs one query when nothing has changed. With
+    MATCH_SNAPSHOT set, loads start from that snapshot file (see
+    snapshot.py), mapped rather than read, and only the matches written
+    since it was taken come from the database.
+    """
+
+    def __init__(self, snapshot_path=None):
+        self._lock = threading.Lock()
+        self._snapshot_path = snapshot_path
+        self._snapshot_seen = None
+        self._columns = None
+        self._state = None
+        self._tentative = False
+
+    @property
+    def snapshot_path(self):
+        if self._snapshot_path is not None:
+            return self._snapshot_path
+        return getattr(settings, 'MATCH_SNAPSHOT', None)
+
+    def columns(self):
+        return self._columns_at(dataset_state())
+
+    async def acolumns(self):
+        """columns() for async views; the event loop only waits on a sync."""
+        state = await adataset_state()
+        if state == self._state and not self._snapshot_replaced():
+            # _sync sets the columns before the state, so these are at least as new
+            return self._columns
+        return await sync_to_async(self._columns_at)(state)
+
+    def _columns_at(self, state):
+        with self._lock:
+            if self._columns is None or state != self._state or self._snapshot_replaced():
+                self._sync(state)
+            return self._columns
+
+    def _snapshot_stat(self):
+        try:
+            stat = os.stat(self.snapshot_path)
+        except (OSError, TypeError):
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def _snapshot_replaced(self):
+        # A snapshot exported after this worker caught up is still worth mapping
+        return bool(self.snapshot_path) and self._snapshot_stat() != self._snapshot_seen
+
+    def _sync(self, state):
+        columns = self._columns
+        if (columns is None or self._tentative
+                or state[0] < self._state[0] or state[2] != self._state[2]):
+            columns = self._load(state)
+        else:
+            # A snapshot taken at exactly this state is shared with the other workers
+            columns = (self._from_snapshot(state, exact=True) or self._append(columns)
+                       or load_columns())
+        self._columns, self._state = columns, state
+        # Rows read inside a transaction may still be rolled back, so the
+        # next change reloads instead of appending to them
+        self._tentative = connection.in_atomic_block
+
+    def _append(self, columns):
+        columns = columns.append(load_columns(after_id=columns.max_id))
+        # Ids are not always committed in order; missing one means a reload
+        if len(columns) != Match.objects.count():
+            return None
+        return columns
+
+    def _load(self, state):
+        return self._from_snapshot(state) or load_columns()
+
+    def _from_snapshot(self, state, exact=False):
+        """
+        Columns from the snapshot file when it was taken at `state`, or, if
+        not `exact`, at an earlier state that later writes only added to.
+        None when there is no such snapshot.
+        """
+        stat = self._snapshot_stat()
+        if stat is None or (exact and stat == self._snapshot_seen):
+            return None  # none, already mapped, or already found unusable
+
+        # snapshot.py builds on this module, so it is imported late
+        from .snapshot import open_snapshot
+        snapshot = open_snapshot(self.snapshot_path)
+        self._snapshot_seen = stat
+        if snapshot is None:
+            return None
+        version, _, rewrites = snapshot.state
+        if snapshot.state == state:
+            return snapshot.columns()
+        if exact or rewrites != state[2] or version > state[0]:
+            return None
+        return self._append(snapshot.columns())
+
+
+match_engine = MatchEngine()
+
+
+# -----------------------------
+# Aggregations
+# -----------------------------
+
+def group(keys):
+    """
+    (unique keys in ascending order, group index of every key). Small
+    non-negative keys, as ids are, are grouped with bincount rather than
+    the sort np.unique does.
+    """
+    if len(keys) and keys.max() < DENSE_GROUPS:
+        present = np.flatnonzero(np.bincount(keys))
+        index = np.zeros(int(present[-1]) + 1, dtype=np.int64)
+        index[present] = np.arange(len(present))
+        return present, index[keys]
+    return np.unique(keys, return_inverse=True)
+
+
+def match_mask(columns, season_ids=None, date_from=None, date_to=None, referee_id=None):
+    """Boolean array selecting the matches that pass the given filters."""
+    mask = np.ones(len(columns), dtype=bool)
+    if season_ids is not None:
+        mask &= columns.where('season', lambda seasons: np.isin(seasons, season_ids))
+    if date_from:
+        mask &= columns.where('date', lambda dates: dates >= date_from.toordinal())
+    if date_to:
+        mask &= columns.where('date', lambda dates: dates <= date_to.toordinal())
+    if referee_id is not None:
+        mask &= columns.where('referee', lambda referees: referees == referee_id)
+    return mask
+
+
+def referee_impact(columns, mask):
+    """
+    Referee impact figures of the selected matches, per referee:
+    {referee_id: {"matches", "average_yellow_cards_home", ..., "draw_rate"}}.
+    Matches without a referee are left out.
+    """
+    mask = mask & columns.where('referee', lambda referees: referees != NO_REFEREE)
+    referee_ids, groups = group(columns.select('referee', mask))
+    matches = np.bincount(groups, minlength=len(referee_ids))
+    full_time = columns.select('full_time', mask)
+
+    def totals(name):
+        return np.bincount(groups, weights=columns.select(name, mask), minlength=len(referee_ids))
+
+    def results(code):
+        return np.bincount(groups, weights=full_time == code, minlength=len(referee_ids))
+
+    figures = {
+        "average_yellow_cards_home": totals('home_yellow') / matches,
+        "average_yellow_cards_away": totals('away_yellow') / matches,
+        "average_red_cards_home": totals('home_red') / matches,
+        "average_red_cards_away": totals('away_red') / matches,
+        "home_win_rate": results(RESULT_CODES['H']) * 100 / matches,
+        "away_win_rate": results(RESULT_CODES['A']) * 100 / matches,
+        "draw_rate": results(RESULT_CODES['D']) * 100 / matches,
+    }
+    figures = {name: values.tolist() for name, values in figures.items()}
+    return {
+        referee_id: {"matches": count, **{name: values[i] for name, values in figures.items()}}
+        for i, (referee_id, count) in enumerate(zip(referee_ids.tolist(), matches.tolist()))
+    }
+
+
+class Rivalries:
+    """
+    Cards shown per unordered pair of teams, as arrays ordered the most
+    intense (yellows + 2 * reds) first and ties in team id order. Rows are
+    (team_low, team_high, yellow cards, red cards) tuples, made only for
+    the slice asked for. A row's keyset position is (-intensity, team_low,
+    team_high), which increases along the order.
+    """
+
+    def __init__(self, low, high, yellows, reds):
+        self.low, self.high, self.yellows, self.reds = low, high, yellows, reds
+
+    def __len__(self):
+        return len(self.low)
+
+    def rows(self, start=0, stop=None):
+        window = slice(start, stop)
+        return list(zip(self.low[window].tolist(), self.high[window].tolist(),
+                        self.yellows[window].tolist(), self.reds[window].tolist()))
+
+    def iter_rows(self, start=0, stop=None, chunk_size=1000):
+        stop = len(self) if stop is None else min(stop, len(self))
+        for offset in range(start, stop, chunk_size):
+            yield from self.rows(offset, min(offset + chunk_size, stop))
+
+    def position(self, index):
+        """Keyset position of the row at `index`."""
+        return (-int(self.yellows[index] + 2 * self.reds[index]),
+                int(self.low[index]), int(self.high[index]))
+
+    def index_after(self, position):
+        """Index of the first row past keyset `position`, len(self) if none is."""
+        score, low, high = position
+        key = -(self.yellows + 2 * self.reds)
+        after = (key > score) | ((key == score) & ((self.low > low) | ((self.low == low) & (self.high > high))))
+        return int(np.argmax(after)) if after.any() else len(self)
+
+
+def rank_rivalries(columns, mask):
+    """Rivalries over the selected matches."""
+    home, away = columns.select('home', mask), columns.select('away', mask)
+    low, high = np.minimum(home, away).astype(np.int64), np.maximum(home, away).astype(np.int64)
+    # Keys sort like (team_low, team_high), so the pairs come out in that order
+    width = int(high.max()) + 1 if len(high) else 1
+    pairs, groups = group(low * width + high)
+    yellows = columns.select('home_yellow', mask) + columns.select('away_yellow', mask)
+    reds = columns.select('home_red', mask) + columns.select('away_red', mask)
+    yellows = np.bincount(groups, weights=yellows, minlength=len(pairs)).astype(np.int64)
+    reds = np.bincount(groups, weights=reds, minlength=len(pairs)).astype(np.int64)
+    order = np.argsort(-(yellows + 2 * reds), kind='stable')
+    return Rivalries(pairs[order] // width, pairs[order] % width, yellows[order], reds[order])
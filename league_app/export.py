@@ -0,0 +1,208 @@
+# league_app/export.py
+#
+# Bulk export of the match history, for /api/matches/export. Matches are
+# read in id order a chunk at a time: one query per chunk, joining in the
+# season, team and referee names and resuming after the last id of the
+# chunk before. Each chunk is encoded and sent before the next is read, so
+# memory stays flat however many matches are exported, and no read stays
+# open for the length of a download to hold off writers behind a slow
+# client. Formats are NDJSON, CSV and Parquet (one row group per chunk).
+
+import csv
+import io
+
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+
+from .models import Match
+from .renderers import FastJSONRenderer, pyarrow
+
+EXPORT_CHUNK_ROWS = 5000
+
+# (column, Match field), in the model's field order
+EXPORT_FIELDS = (
+    ('id', 'id'),
+    ('season', 'season__name'),
+    ('date', 'date'),
+    ('home_team', 'home_team__name'),
+    ('away_team', 'away_team__name'),
+    ('full_time_result', 'full_time_result'),
+    ('half_time_result', 'half_time_result'),
+    ('home_goals', 'home_goals'),
+    ('away_goals', 'away_goals'),
+    ('referee', 'referee__name'),
+    ('home_yellow_cards', 'home_yellow_cards'),
+    ('away_yellow_cards', 'away_yellow_cards'),
+    ('home_red_cards', 'home_red_cards'),
+    ('away_red_cards', 'away_red_cards'),
+)
+EXPORT_COLUMNS = [column for column, _ in EXPORT_FIELDS]
+
+
+def export_matches(season=None, team=None, referee=None, date_from=None, date_to=None):
+    """
+    values_list of every EXPORT_FIELDS value of the matches passing the
+    filters, in id order. `team` matches either side.
+    """
+    matches = Match.objects.all()
+    if season:
+        matches = matches.filter(season__name=season)
+    if team:
+        matches = matches.filter(Q(home_team__name=team) | Q(away_team__name=team))
+    if referee:
+        matches = matches.filter(referee__name=referee)
+    if date_from:
+        matches = matches.filter(date__gte=date_from)
+    if date_to:
+        matches = matches.filter(date__lte=date_to)
+    return matches.order_by('id').values_list(*[field for _, field in EXPORT_FIELDS])
+
+
+def match_chunks(matches, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Lists of up to chunk_rows rows of export_matches() `matches`, one query each."""
+    last_id = None
+    while True:
+        page = matches if last_id is None else matches.filter(id__gt=last_id)
+        chunk = list(page[:chunk_rows])
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_rows:
+            return
+        last_id = chunk[-1][0]
+
+
+async def amatch_chunks(matches, chunk_rows=EXPORT_CHUNK_ROWS):
+    """match_chunks() for async views."""
+    last_id = None
+    while True:
+        page = matches if last_id is None else matches.filter(id__gt=last_id)
+        chunk = [row async for row in page[:chunk_rows]]
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_rows:
+            return
+        last_id = chunk[-1][0]
+
+
+# -----------------------------
+# Encoders
+# -----------------------------
+#
+# An encoder turns chunks of rows into the bytes of one file: begin(), then
+# encode() for every chunk, then end().
+
+class NDJSONEncoder:
+    def begin(self):
+        return b''
+
+    def encode(self, rows):
+        return FastJSONRenderer().render_lines([dict(zip(EXPORT_COLUMNS, row)) for row in rows])
+
+    def end(self):
+        return b''
+
+
+class CSVEncoder:
+    def __init__(self):
+        self.output = io.StringIO()
+        self.writer = csv.writer(self.output)
+
+    def _drain(self):
+        data = self.output.getvalue().encode('utf-8')
+        self.output.seek(0)
+        self.output.truncate()
+        return data
+
+    def begin(self):
+        self.writer.writerow(EXPORT_COLUMNS)
+        return self._drain()
+
+    def encode(self, rows):
+        self.writer.writerows(rows)
+        return self._drain()
+
+    def end(self):
+        return b''
+
+
+class _Sink(io.RawIOBase):
+    """A file Parquet is written to, handing over what was written so far on drain()."""
+
+    def __init__(self):
+        self.parts = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts.clear()
+        return data
+
+
+class ParquetEncoder:
+    def __init__(self):
+        text, count = pyarrow.string(), pyarrow.int32()
+        types = {'id': pyarrow.int64(), 'date': pyarrow.date32(),
+                 'home_goals': count, 'away_goals': count,
+                 'home_yellow_cards': count, 'away_yellow_cards': count,
+                 'home_red_cards': count, 'away_red_cards': count}
+        self.schema = pyarrow.schema([(column, types.get(column, text)) for column in EXPORT_COLUMNS])
+        self.sink = _Sink()
+        self.writer = None
+
+    def begin(self):
+        self.writer = pyarrow.parquet.ParquetWriter(self.sink, self.schema)
+        return self.sink.drain()
+
+    def encode(self, rows):
+        columns = zip(*rows)
+        self.writer.write_table(pyarrow.Table.from_arrays(
+            [pyarrow.array(values, type=field.type) for values, field in zip(columns, self.schema)],
+            schema=self.schema,
+        ))
+        return self.sink.drain()
+
+    def end(self):
+        self.writer.close()
+        return self.sink.drain()
+
+
+EXPORT_ENCODERS = {'ndjson': NDJSONEncoder, 'csv': CSVEncoder, 'parquet': ParquetEncoder}
+
+
+def encoded(encoder, chunks):
+    yield encoder.begin()
+    for rows in chunks:
+        yield encoder.encode(rows)
+    yield encoder.end()
+
+
+async def aencoded(encoder, chunks):
+    yield encoder.begin()
+    async for rows in chunks:
+        yield encoder.encode(rows)
+    yield encoder.end()
+
+
+def export_response(matches, renderer, asynchronous=False):
+    """
+    A StreamingHttpResponse of export_matches() `matches` in the format of
+    `renderer`, one of renderers.EXPORT_RENDERERS. Async views pass
+    asynchronous=True, so chunks are read through the async ORM.
+    """
+    encoder = EXPORT_ENCODERS[renderer.format]()
+    if asynchronous:
+        content = aencoded(encoder, amatch_chunks(matches))
+    else:
+        content = encoded(encoder, match_chunks(matches))
+    content_type = renderer.media_type
+    if renderer.charset:
+        content_type += f'; charset={renderer.charset}'
+    response = StreamingHttpResponse(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="matches.{renderer.format}"'
+    return response
@@ -0,0 +1,137 @@
+# league_app/head_to_head.py
+
+from django.db.models import Case, Count, F, Q, Sum, When
+from django.db.models.functions import Greatest, Least
+
+from .models import HeadToHead, Match
+
+TOTAL_FIELDS = ['matches', 'team_low_wins', 'team_high_wins', 'draws', 'team_low_goals', 'team_high_goals']
+
+# Pairs per delete statement when dropping emptied records
+PAIR_BATCH_SIZE = 200
+
+
+def pair_key(team_a_id, team_b_id):
+    """The canonical (low, high) key of an unordered team pair."""
+    return (team_a_id, team_b_id) if team_a_id < team_b_id else (team_b_id, team_a_id)
+
+
+def pair_totals(matches):
+    """
+    Groups a Match queryset by unordered team pair and returns one dict of
+    TOTAL_FIELDS per pair, keyed by team_low / team_high. One query.
+    """
+    low_is_home = Q(home_team_id=F('team_low'))
+    return (
+        matches
+        .annotate(team_low=Least('home_team_id', 'away_team_id'),
+                  team_high=Greatest('home_team_id', 'away_team_id'))
+        .values('team_low', 'team_high')
+        .annotate(
+            matches=Count('id'),
+            team_low_wins=Count('id', filter=(low_is_home & Q(full_time_result='H')) |
+                                (~low_is_home & Q(full_time_result='A'))),
+            team_high_wins=Count('id', filter=(low_is_home & Q(full_time_result='A')) |
+                                 (~low_is_home & Q(full_time_result='H'))),
+            draws=Count('id', filter=~Q(full_time_result__in=['H', 'A'])),
+            team_low_goals=Sum(Case(When(low_is_home, then=F('home_goals')),
+                                    default=F('away_goals'))),
+            team_high_goals=Sum(Case(When(low_is_home, then=F('away_goals')),
+                                     default=F('home_goals'))),
+        )
+        .order_by()
+    )
+
+
+def refresh_head_to_head(pairs=None):
+    """
+    Recomputes the stored records of the given (low, high) pairs from their
+    matches, or of every pair when `pairs` is None.
+    """
+    if pairs is None:
+        HeadToHead.objects.all().delete()
+        _store(pair_totals(Match.objects.all()))
+        return
+    if not pairs:
+        return
+
+    # One grouped query over the matches among the teams involved; pairs
+    # that were not asked for are dropped afterwards.
+    team_ids = {team_id for pair in pairs for team_id in pair}
+    matches = Match.objects.filter(home_team_id__in=team_ids, away_team_id__in=team_ids)
+    totals = [
+        row for row in pair_totals(matches)
+        if (row['team_low'], row['team_high']) in pairs
+    ]
+
+    # Pairs left without matches lose their record
+    found = {(row['team_low'], row['team_high']) for row in totals}
+    stale = sorted(set(pairs) - found)
+    for i in range(0, len(stale), PAIR_BATCH_SIZE):
+        condition = Q()
+        for low, high in stale[i:i + PAIR_BATCH_SIZE]:
+            condition |= Q(team_low_id=low, team_high_id=high)
+        HeadToHead.objects.filter(condition).delete()
+    _store(totals)
+
+
+def _store(totals):
+    HeadToHead.objects.bulk_create(
+        [
+            HeadToHead(team_low_id=row['team_low'], team_high_id=row['team_high'],
+                       **{field: row[field] for field in TOTAL_FIELDS})
+            for row in totals
+        ],
+        update_conflicts=True,
+        unique_fields=['team_low', 'team_high'],
+        update_fields=TOTAL_FIELDS,
+    )
+
+
+def add_match(match):
+    """
+    Folds one newly created match into its pair's record with a single
+    relative update, creating the record if the pair is new.
+    """
+    if match.home_team_id == match.away_team_id:
+        return
+    low, high = pair_key(match.home_team_id, match.away_team_id)
+    low_is_home = low == match.home_team_id
+    winner = {'H': match.home_team_id, 'A': match.away_team_id}.get(match.full_time_result)
+
+    HeadToHead.objects.get_or_create(team_low_id=low, team_high_id=high)
+    HeadToHead.objects.filter(team_low_id=low, team_high_id=high).update(
+        matches=F('matches') + 1,
+        team_low_wins=F('team_low_wins') + int(winner == low),
+        team_high_wins=F('team_high_wins') + int(winner == high),
+        draws=F('draws') + int(winner is None),
+        team_low_goals=F('team_low_goals') + (match.home_goals if low_is_home else match.away_goals),
+        team_high_goals=F('team_high_goals') + (match.away_goals if low_is_home else match.home_goals),
+    )
+
+
+def _record_query(team1, team2):
+    return (
+        HeadToHead.objects
+        .select_related('team_low', 'team_high')
+        .filter(Q(team_low__name=team1, team_high__name=team2) |
+                Q(team_low__name=team2, team_high__name=team1))
+    )
+
+
+def _record_result(record, team1):
+    if record is None or not record.matches:
+        return None, False
+    return record, record.team_low.name == team1
+
+
+def head_to_head_record(team1, team2):
+    """
+    Looks up the stored record between two team names, in either order.
+    Returns (record, team1_is_low) or (None, False). One query.
+    """
+    return _record_result(_record_query(team1, team2).first(), team1)
+
+
+async def ahead_to_head_record(team1, team2):
+    return _record_result(await _record_query(team1, team2).afirst(), team1)
@@ -0,0 +1,181 @@
+# league_app/imports.py
+#
+# CSV imports uploaded through the API and run by the background worker
+# (worker.py). The queue is the ImportJob table: an upload is streamed to
+# IMPORT_UPLOAD_DIR and a queued row created, and the worker claims the
+# oldest queued row with a conditional UPDATE, so two workers never run the
+# same job. Rows go through ingestion.write_stream like load_data.py
+# --stream, with progress written back to the job after every batch.
+
+import csv
+import os
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .ingestion import BATCH_SIZE, IngestReport, write_stream
+from .metrics import record_report
+from .models import ImportJob
+from .parsing import HEADER_FIRST_COLUMNS, iter_records, iter_rows
+
+UPLOAD_CHUNK_SIZE = 1 << 20
+DEFAULT_MAX_UPLOAD_BYTES = 512 * 1024 * 1024
+MAX_RECORDED_ERRORS = 100
+POLL_SECONDS = 1.0
+STALE_SECONDS = 300  # a running job this long without progress lost its worker
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+# -----------------------------
+# Uploads
+# -----------------------------
+
+def upload_dir():
+    return getattr(settings, 'IMPORT_UPLOAD_DIR', os.path.join(settings.MEDIA_ROOT, 'imports'))
+
+
+def check_header(path):
+    """Raises ValueError unless the file starts like a football-data CSV."""
+    with open(path, newline='', encoding='utf-8-sig', errors='replace') as f:
+        for row in csv.reader(f):
+            if not row or not any(row):
+                continue
+            if row[0].strip() in HEADER_FIRST_COLUMNS:
+                return
+            break
+    raise ValueError("The file does not start with a football-data header row (Date or Div).")
+
+
+def store_upload(chunks, max_bytes=None):
+    """
+    Writes an upload, given as an iterable of byte chunks, to a new file in
+    the upload directory without holding it in memory. Returns (path, size).
+    """
+    if max_bytes is None:
+        max_bytes = getattr(settings, 'IMPORT_MAX_UPLOAD_BYTES', DEFAULT_MAX_UPLOAD_BYTES)
+    directory = upload_dir()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{uuid.uuid4().hex}.csv")
+    size = 0
+    try:
+        with open(path, 'wb') as f:
+            for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Uploads are limited to {max_bytes} bytes.")
+                f.write(chunk)
+        check_header(path)
+    except ValueError:
+        remove_upload(path)
+        raise
+    return path, size
+
+
+def remove_upload(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def enqueue_import(chunks, filename):
+    """Stores an uploaded CSV and queues it, returning the ImportJob."""
+    path, size = store_upload(chunks)
+    return ImportJob.objects.create(filename=filename[:255], path=path, size=size)
+
+
+# -----------------------------
+# Worker
+# -----------------------------
+
+def requeue_stale_jobs():
+    """
+    Puts running jobs whose worker stopped reporting back in the queue.
+    Re-running one is safe: rows are upserted on the fixture key.
+    """
+    cutoff = timezone.now() - timedelta(seconds=STALE_SECONDS)
+    return ImportJob.objects.filter(status=ImportJob.RUNNING, heartbeat_at__lt=cutoff).update(
+        status=ImportJob.QUEUED, started_at=None, heartbeat_at=None, rows_read=0, rows_skipped=0,
+        created=0, updated=0, errors=[], error_count=0,
+    )
+
+
+def claim_job():
+    """Marks the oldest queued job running and returns it, None if there is none."""
+    queued = ImportJob.objects.filter(status=ImportJob.QUEUED)
+    while True:
+        job_id = queued.order_by('queued_at', 'id').values_list('id', flat=True).first()
+        if job_id is None:
+            return None
+        now = timezone.now()
+        # Only one worker's UPDATE can still see the job queued
+        if queued.filter(pk=job_id).update(status=ImportJob.RUNNING, started_at=now, heartbeat_at=now):
+            return ImportJob.objects.get(pk=job_id)
+
+
+def run_job(job, batch_size=BATCH_SIZE):
+    """
+    Imports a claimed job's file, recording progress after every batch.
+    Batches already committed stay when a later one fails.
+    """
+    report = IngestReport()
+    counts = {'read': 0, 'skipped': 0}
+    errors = []
+
+    def record_error(row_number, error):
+        if len(errors) < MAX_RECORDED_ERRORS:
+            errors.append({"row": row_number, "error": error})
+
+    def save_progress(**fields):
+        ImportJob.objects.filter(pk=job.pk).update(
+            rows_read=counts['read'],
+            rows_skipped=counts['skipped'] + report.skipped,
+            created=report.created,
+            updated=report.updated,
+            errors=errors,
+            error_count=counts['skipped'],
+            heartbeat_at=timezone.now(),
+            **fields,
+        )
+
+    try:
+        rows = iter_rows(iter_records(job.path), counts, on_skip=record_error)
+        write_stream(rows, report, batch_size, on_batch=save_progress)
+    except Exception as e:
+        save_progress(status=ImportJob.FAILED, failure=str(e) or type(e).__name__,
+                      finished_at=timezone.now())
+    else:
+        save_progress(status=ImportJob.SUCCEEDED, finished_at=timezone.now())
+    finally:
+        remove_upload(job.path)
+
+    report.files += 1
+    report.skipped += counts['skipped']
+    record_report('import', report)
+    job.refresh_from_db()
+    return job
+
+
+def run_pending_jobs(batch_size=BATCH_SIZE):
+    """Runs queued jobs until the queue is empty, returning how many ran."""
+    ran = 0
+    while (job := claim_job()) is not None:
+        job = run_job(job, batch_size)
+        print(f"{job}: {job.rows_read} rows read, {job.created} created, "
+              f"{job.updated} updated, {job.error_count} rejected")
+        ran += 1
+    return ran
+
+
+def run_worker(poll_seconds=POLL_SECONDS, batch_size=BATCH_SIZE):
+    """Runs jobs as they are queued, forever."""
+    while True:
+        requeue_stale_jobs()
+        if not run_pending_jobs(batch_size):
+            time.sleep(poll_seconds)
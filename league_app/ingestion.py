@@ -0,0 +1,635 @@
+# league_app/ingestion.py
+
+import os
+import re
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+from django.utils.dateparse import parse_date
+
+from .models import Team, Referee, Match, Season, IngestionManifest
+from .parsing import (
+    MAX_INTEGER,
+    MIN_INTEGER,
+    batched,
+    iter_records,
+    iter_rows,
+    plan_file,
+    prepare_job,
+    season_name_for_date,
+)
+from .aggregates import ChangeSet, refresh_aggregates
+from .bulk import insert_rows
+from .caching import bump_version
+from .metrics import record_ingest, record_report
+from .search import INDEXES
+from .seasons import NO_SEASON_FOR_DATE, season_date_index
+
+BATCH_SIZE = 1000
+
+MATCH_UNIQUE_FIELDS = ['date', 'home_team', 'away_team']
+MATCH_UPDATE_FIELDS = [
+    'season',
+    'referee',
+    'full_time_result',
+    'half_time_result',
+    'home_goals',
+    'away_goals',
+    'home_yellow_cards',
+    'away_yellow_cards',
+    'home_red_cards',
+    'away_red_cards',
+]
+
+
+class IngestReport:
+    """
+    Running totals of what an ingestion run did to the Match table.
+    """
+
+    def __init__(self):
+        self.files = 0
+        self.unchanged_files = 0
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+
+    def merge(self, other):
+        self.files += other.files
+        self.unchanged_files += other.unchanged_files
+        self.created += other.created
+        self.updated += other.updated
+        self.skipped += other.skipped
+
+    def as_dict(self):
+        return {
+            "files": self.files,
+            "unchanged_files": self.unchanged_files,
+            "created": self.created,
+            "updated": self.updated,
+            "skipped": self.skipped,
+        }
+
+    def __str__(self):
+        summary = (f"{self.files} file(s): {self.created} created, "
+                   f"{self.updated} updated, {self.skipped} skipped")
+        if self.unchanged_files:
+            summary += f", {self.unchanged_files} unchanged file(s) not read"
+        return summary
+
+
+# -----------------------------
+# Writing
+# -----------------------------
+
+def manifest_state(entry):
+    """The parts of an IngestionManifest row that parsing.prepare_file needs."""
+    if entry is None:
+        return None
+    return (entry.content_hash, entry.size, entry.rows_ingested)
+
+
+class NameResolver:
+    """
+    In-memory name -> id maps for Team and Referee, so each distinct name
+    costs at most one lookup per run instead of one query per row.
+    """
+
+    def __init__(self):
+        self.ids = {Team: {}, Referee: {}}
+
+    def resolve(self, model, names):
+        known = self.ids[model]
+        missing = {name for name in names if name not in known}
+        if missing:
+            known.update(model.objects.filter(name__in=missing).values_list('name', 'id'))
+            new_names = missing.difference(known)
+            if new_names:
+                model.objects.bulk_create(
+                    [model(name=name) for name in new_names], ignore_conflicts=True
+                )
+                known.update(model.objects.filter(name__in=new_names).values_list('name', 'id'))
+                # bulk_create sends no post_save, so the search index is dropped here
+                INDEXES[model].invalidate()
+        return known
+
+
+def get_or_extend_season(name, start_date, end_date):
+    """
+    Fetches the Season called `name`, creating it or widening its date range
+    so that it covers start_date..end_date.
+    """
+    season, created = Season.objects.get_or_create(
+        name=name,
+        defaults={"start_date": start_date, "end_date": end_date},
+    )
+    if created:
+        print(f"Created new season: {season.name}")
+    elif season.start_date > start_date or season.end_date < end_date:
+        season.start_date = min(season.start_date, start_date)
+        season.end_date = max(season.end_date, end_date)
+        season.save(update_fields=['start_date', 'end_date'])
+    return season
+
+
+def _chunks(rows, size):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def upsert_rows(season, rows, resolver, report, changes, batch_size=BATCH_SIZE):
+    """
+    Upserts parsed rows into Match on the (date, home_team, away_team) key,
+    one bulk statement per batch. What the writes touched is recorded in the
+    `changes` ChangeSet. Must be called inside a transaction.
+    """
+    for batch in _chunks(rows, batch_size):
+        team_ids = resolver.resolve(Team, {row[1] for row in batch} | {row[2] for row in batch})
+        referee_ids = resolver.resolve(Referee, {row[3] for row in batch})
+
+        # Later rows win when a file repeats a fixture
+        by_key = {}
+        for row in batch:
+            key = (row[0], team_ids[row[1]], team_ids[row[2]])
+            if key in by_key:
+                report.skipped += 1
+            by_key[key] = row
+
+        dates = {key[0] for key in by_key}
+        existing = {}
+        for match_date, home_id, away_id, season_id in (
+            Match.objects.filter(date__in=dates)
+            .values_list('date', 'home_team_id', 'away_team_id', 'season_id')
+        ):
+            existing[(match_date, home_id, away_id)] = season_id
+
+        matches = []
+        for (match_date, home_id, away_id), row in by_key.items():
+            matches.append(Match(
+                season=season,
+                date=match_date,
+                home_team_id=home_id,
+                away_team_id=away_id,
+                referee_id=referee_ids[row[3]],
+                full_time_result=row[4],
+                half_time_result=row[5],
+                home_goals=row[6],
+                away_goals=row[7],
+                home_yellow_cards=row[8],
+                away_yellow_cards=row[9],
+                home_red_cards=row[10],
+                away_red_cards=row[11],
+            ))
+
+        Match.objects.bulk_create(
+            matches,
+            update_conflicts=True,
+            unique_fields=MATCH_UNIQUE_FIELDS,
+            update_fields=MATCH_UPDATE_FIELDS,
+        )
+
+        updated = 0
+        for key in by_key:
+            changes.add(season.id, *key)
+            if key in existing:
+                updated += 1
+                changes.add(existing[key], *key)
+        report.updated += updated
+        report.created += len(by_key) - updated
+
+
+def write_parsed_season(parsed, resolver=None, report=None):
+    """
+    Writes one ParsedSeason, and its manifest entry when it carries a content
+    hash, in a single transaction. Returns the report for the file.
+    """
+    resolver = resolver or NameResolver()
+    report = report or IngestReport()
+    if parsed.unchanged:
+        report.unchanged_files += 1
+        return report
+
+    report.files += 1
+    report.skipped += parsed.skipped
+    with transaction.atomic():
+        if parsed.rows:
+            season = get_or_extend_season(parsed.season_name, parsed.start_date, parsed.end_date)
+            changes = ChangeSet()
+            updated = report.updated
+            upsert_rows(season, parsed.rows, resolver, report, changes)
+            refresh_aggregates(changes)
+            bump_version(rewrite=report.updated > updated)
+        if parsed.content_hash:
+            IngestionManifest.objects.update_or_create(
+                filename=parsed.filename,
+                defaults={
+                    "content_hash": parsed.content_hash,
+                    "size": parsed.size,
+                    "row_count": parsed.row_count,
+                    "rows_ingested": parsed.row_count,
+                },
+            )
+    return report
+
+
+def describe(parsed, file_report):
+    if parsed.unchanged:
+        return f"{parsed.filename}: unchanged, skipped"
+    if parsed.first_row:
+        return (f"{parsed.filename} ({parsed.season_name}): rows {parsed.first_row}-"
+                f"{parsed.row_count} appended, {file_report}")
+    return f"{parsed.filename} ({parsed.season_name}): {file_report}"
+
+
+def load_manifest(incremental=True):
+    """Returns {filename: manifest state}, empty when re-ingesting everything."""
+    if not incremental:
+        return {}
+    return {
+        entry.filename: manifest_state(entry)
+        for entry in IngestionManifest.objects.all()
+    }
+
+
+def _prepare_serial(jobs):
+    for filepath, state in jobs:
+        yield prepare_job(filepath, state)
+
+
+def _prepare_in_pool(jobs, workers):
+    """
+    Parses files in a process pool and yields the results in submission
+    order. At most two files per worker are in flight, so parsed rows never
+    pile up faster than the writer can drain them.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for filepath, state in jobs:
+            pending.append(executor.submit(prepare_job, filepath, state))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def ingest_files(filepaths, incremental=True, workers=1):
+    """
+    Parses and writes the given season files, one transaction per file.
+    With `incremental`, files recorded in the manifest are skipped when
+    unchanged and only their new rows are read when they grew.
+
+    With `workers` > 1, hashing, parsing and validation run in a process pool
+    while this process stays the only database writer, draining results in
+    file order so the final state matches a serial run.
+    Returns the combined IngestReport.
+    """
+    manifest = load_manifest(incremental)
+    jobs = [(filepath, manifest.get(os.path.basename(filepath))) for filepath in filepaths]
+    if workers > 1 and len(jobs) > 1:
+        results = _prepare_in_pool(jobs, workers)
+    else:
+        results = _prepare_serial(jobs)
+
+    resolver = NameResolver()
+    report = IngestReport()
+    for parsed, error in results:
+        if error:
+            print(error)
+            continue
+        file_report = write_parsed_season(parsed, resolver)
+        record_report('loader', file_report)
+        print(describe(parsed, file_report))
+        report.merge(file_report)
+    return report
+
+
+def write_stream(rows, report, batch_size=BATCH_SIZE, on_batch=None):
+    """
+    Writes an iterable of parsed rows one batch per transaction, taking
+    each row's season from its date, then refreshes the derived tables
+    once, whether or not every batch went in. `on_batch` is called after
+    every committed batch.
+    """
+    resolver = NameResolver()
+    seasons = {}
+    changes = ChangeSet()
+    try:
+        for batch in batched(rows, batch_size):
+            by_season = defaultdict(list)
+            for row in batch:
+                by_season[season_name_for_date(row[0])].append(row)
+
+            updated = report.updated
+            with transaction.atomic():
+                for season_name, season_rows in by_season.items():
+                    start_date = min(row[0] for row in season_rows)
+                    end_date = max(row[0] for row in season_rows)
+                    season = seasons.get(season_name)
+                    if season is None or season.start_date > start_date or season.end_date < end_date:
+                        season = get_or_extend_season(season_name, start_date, end_date)
+                        seasons[season_name] = season
+                    upsert_rows(season, season_rows, resolver, report, changes, batch_size)
+                bump_version(rewrite=report.updated > updated)
+            if on_batch is not None:
+                on_batch()
+    finally:
+        # Derived tables are refreshed once at the end rather than after
+        # every batch, and also when a batch fails, for those committed
+        # before it
+        with transaction.atomic():
+            refresh_aggregates(changes)
+            bump_version()
+
+
+def ingest_stream(filepath, incremental=True, batch_size=BATCH_SIZE):
+    """
+    Ingests a football-data CSV of any size, such as several seasons or
+    leagues concatenated into one feed, with memory bounded by `batch_size`.
+    Rows flow through a generator pipeline and are written one batch per
+    transaction. Seasons come from the match dates, not the file name.
+    """
+    filename = os.path.basename(filepath)
+    entry = IngestionManifest.objects.filter(filename=filename).first() if incremental else None
+    content_hash, size, skip_rows = plan_file(filepath, manifest_state(entry))
+
+    report = IngestReport()
+    if skip_rows is None:
+        report.unchanged_files += 1
+        print(f"{filename}: unchanged, skipped")
+        return report
+
+    counts = {'read': 0, 'skipped': 0}
+    records = islice(iter_records(filepath), skip_rows, None)
+    write_stream(iter_rows(records, counts, filename), report, batch_size)
+
+    report.files += 1
+    report.skipped += counts['skipped']
+    IngestionManifest.objects.update_or_create(
+        filename=filename,
+        defaults={
+            "content_hash": content_hash,
+            "size": size,
+            "row_count": skip_rows + counts['read'],
+            "rows_ingested": skip_rows + counts['read'],
+        },
+    )
+    record_report('loader', report)
+    print(f"{filename}: {counts['read']} rows read from row {skip_rows}, {report}")
+    return report
+
+
+# -----------------------------
+# Match items (batch API)
+# -----------------------------
+
+MATCH_INSERT_FIELDS = (
+    'season_id', 'date', 'home_team_id', 'away_team_id', 'referee_id', 'full_time_result',
+    'half_time_result', 'home_goals', 'away_goals', 'home_yellow_cards', 'away_yellow_cards',
+    'home_red_cards', 'away_red_cards',
+)
+
+REQUIRED = "This field is required."
+DUPLICATE_FIXTURE = "A match between these teams on this date already exists."
+TRAILING_ZEROS = re.compile(r'\.0*\s*$')
+
+# (field, max length, required) of the text fields of an add-match item
+ITEM_TEXT_FIELDS = (
+    ('home_team', 100, True),
+    ('away_team', 100, True),
+    ('referee', 100, True),
+    ('full_time_result', 1, True),
+    ('half_time_result', 1, False),
+    ('season', 9, False),
+)
+ITEM_INTEGER_FIELDS = (
+    ('home_goals', True),
+    ('away_goals', True),
+    ('home_yellow_cards', False),
+    ('away_yellow_cards', False),
+    ('home_red_cards', False),
+    ('away_red_cards', False),
+)
+
+
+def _item_text(item, field, max_length, required, errors):
+    value = item.get(field)
+    if type(value) is str:
+        stripped = value.strip()
+        if stripped and len(stripped) <= max_length:
+            return stripped
+    if value is None or (isinstance(value, str) and not value.strip()):
+        if required:
+            errors[field] = [REQUIRED if value is None else "This field may not be blank."]
+        return None
+    if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+        errors[field] = ["Not a valid string."]
+        return None
+    value = str(value).strip()
+    if len(value) > max_length:
+        errors[field] = [f"Ensure this field has no more than {max_length} characters."]
+    return value
+
+
+def _item_integer(item, field, required, errors):
+    value = item.get(field)
+    if value is None or value == '':
+        if required:
+            errors[field] = [REQUIRED]
+        return 0
+    number = None
+    if type(value) is int:
+        number = value
+    elif isinstance(value, float) and value.is_integer():
+        number = int(value)
+    elif isinstance(value, str):
+        try:
+            # As DRF's IntegerField, which also takes "2.0"
+            number = int(TRAILING_ZEROS.sub('', value))
+        except ValueError:
+            pass
+    if number is None:
+        errors[field] = ["A valid integer is required."]
+    elif number > MAX_INTEGER:
+        errors[field] = [f"Ensure this value is less than or equal to {MAX_INTEGER}."]
+    elif number < MIN_INTEGER:
+        errors[field] = [f"Ensure this value is greater than or equal to {MIN_INTEGER}."]
+    else:
+        return number
+    return 0
+
+
+def _item_date(item, field, required, errors):
+    value = item.get(field)
+    if value is None or value == '':
+        if required:
+            errors[field] = [REQUIRED]
+        return None
+    try:
+        parsed = parse_date(value) if isinstance(value, str) else None
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        errors[field] = ["Date has wrong format. Use one of these formats instead: YYYY-MM-DD."]
+    return parsed
+
+
+def validate_match_item(item):
+    """
+    Checks one add-match payload with the same field rules as
+    MatchCreateSerializer, without touching the database. Returns
+    (row in parsing.ROW_FIELDS order, season name, season start, season
+    end) or raises ValueError carrying a DRF-style {field: [messages]} dict.
+    """
+    if not isinstance(item, dict):
+        raise ValueError({"non_field_errors": ["Invalid data. Expected a dictionary."]})
+    errors = {}
+    match_date = _item_date(item, 'date', True, errors)
+    text = {field: _item_text(item, field, max_length, required, errors)
+            for field, max_length, required in ITEM_TEXT_FIELDS}
+    numbers = [_item_integer(item, field, required, errors)
+               for field, required in ITEM_INTEGER_FIELDS]
+    season_start = _item_date(item, 'season_start_date', False, errors)
+    season_end = _item_date(item, 'season_end_date', False, errors)
+    if errors:
+        raise ValueError(errors)
+
+    row = (match_date, text['home_team'], text['away_team'], text['referee'],
+           text['full_time_result'], text['half_time_result'], *numbers)
+    return row, text['season'], season_start, season_end
+
+
+class BatchResult:
+    """
+    Outcome of each item of a batch, in submission order.
+    """
+
+    def __init__(self):
+        self.items = []
+        self.created = 0
+        self.rejected = 0
+
+    def success(self, index, match_id):
+        self.created += 1
+        self.items.append({"index": index, "status": "created", "id": match_id})
+
+    def error(self, index, errors):
+        self.rejected += 1
+        self.items.append({"index": index, "status": "error", "errors": errors})
+
+    def as_dict(self):
+        self.items.sort(key=lambda item: item["index"])
+        return {"created": self.created, "rejected": self.rejected, "results": self.items}
+
+
+def _resolve_seasons(pending, seasons, result):
+    """
+    Looks up the seasons named by a batch in one query, creating those that
+    do not exist from the first item giving their dates. Items naming an
+    unknown season without dates are rejected, as in add-match, and items
+    naming none go in the season whose dates hold theirs.
+    """
+    wanted = {season_name for _, _, season_name, _, _ in pending} - seasons.keys() - {None}
+    if wanted:
+        for season in Season.objects.filter(name__in=wanted).order_by('id'):
+            seasons.setdefault(season.name, season)
+
+    accepted = []
+    for index, row, season_name, season_start, season_end in pending:
+        if season_name is None:
+            season = season_date_index.season_for(row[0])
+            if season is None:
+                result.error(index, {'season': [NO_SEASON_FOR_DATE]})
+            else:
+                accepted.append((index, row, season))
+            continue
+        if season_name not in seasons:
+            if not season_start or not season_end:
+                result.error(index, {
+                    'season_start_date': ['This field is required when creating a new season.'],
+                    'season_end_date': ['This field is required when creating a new season.'],
+                })
+                continue
+            seasons[season_name] = Season.objects.create(
+                name=season_name, start_date=season_start, end_date=season_end
+            )
+        accepted.append((index, row, seasons[season_name]))
+    return accepted
+
+
+def _insert_batch(accepted, resolver, result, changes):
+    team_ids = resolver.resolve(Team, {row[1] for _, row, _ in accepted} |
+                                {row[2] for _, row, _ in accepted})
+    referee_ids = resolver.resolve(Referee, {row[3] for _, row, _ in accepted})
+
+    dates = {row[0] for _, row, _ in accepted}
+    taken = set(Match.objects.filter(date__in=dates)
+                .values_list('date', 'home_team_id', 'away_team_id'))
+
+    keys = {}
+    for index, row, season in accepted:
+        key = (row[0], team_ids[row[1]], team_ids[row[2]])
+        if key in taken:
+            result.error(index, {"non_field_errors": [DUPLICATE_FIXTURE]})
+            continue
+        taken.add(key)
+        keys[key] = (index, (season.id, *key, referee_ids[row[3]], *row[4:]))
+
+    failed = set()
+    try:
+        with transaction.atomic():
+            insert_rows(Match, MATCH_INSERT_FIELDS, [row for _, row in keys.values()])
+    except IntegrityError:
+        # Another writer got in between; fall back to one savepoint per row
+        for key, (_, row) in keys.items():
+            try:
+                with transaction.atomic():
+                    insert_rows(Match, MATCH_INSERT_FIELDS, [row])
+            except IntegrityError:
+                failed.add(key)
+
+    ids = {}
+    for match_id, *key in (Match.objects.filter(date__in=dates)
+                           .values_list('id', 'date', 'home_team_id', 'away_team_id')):
+        ids[tuple(key)] = match_id
+    for key, (index, row) in keys.items():
+        if key in ids and key not in failed:
+            result.success(index, ids[key])
+            changes.add(row[0], *key)
+        else:
+            result.error(index, {"non_field_errors": [DUPLICATE_FIXTURE]})
+
+
+def ingest_match_items(items, batch_size=BATCH_SIZE):
+    """
+    Creates matches from an iterable of add-match payloads, such as a parsed
+    JSON array or the lines of an NDJSON stream, one transaction per
+    `batch_size` items. Names cost one lookup per distinct name, existing
+    fixtures and repeats are rejected per item, and the derived tables are
+    refreshed once at the end. Returns the BatchResult.
+    """
+    result = BatchResult()
+    resolver = NameResolver()
+    seasons = {}
+    changes = ChangeSet()
+    for batch in batched(enumerate(items), batch_size):
+        pending = []
+        for index, item in batch:
+            try:
+                pending.append((index, *validate_match_item(item)))
+            except ValueError as error:
+                result.error(index, error.args[0])
+
+        with transaction.atomic():
+            accepted = _resolve_seasons(pending, seasons, result)
+            if accepted:
+                _insert_batch(accepted, resolver, result, changes)
+                bump_version()
+
+    if changes:
+        with transaction.atomic():
+            refresh_aggregates(changes)
+            bump_version()
+    record_ingest('batch', created=result.created, rejected=result.rejected)
+    return result
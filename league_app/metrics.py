@@ -0,0 +1,72 @@
+# league_app/metrics.py
+#
+# Prometheus metrics. Each gunicorn worker, and load_data.py when run with the
+# same environment, writes its samples to files in PROMETHEUS_MULTIPROC_DIR;
+# the /metrics view sums them. Without that variable everything stays in the
+# current process, which is what runserver and the tests use.
+
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+REQUESTS = Counter(
+    'league_http_requests_total', "HTTP requests served, by URL name.",
+    ['view', 'method', 'status'],
+)
+REQUEST_LATENCY = Histogram(
+    'league_http_request_duration_seconds', "Time spent serving a request, by URL name.",
+    ['view'],
+)
+DB_QUERIES = Counter(
+    'league_db_queries_total', "Database queries run while serving requests, by URL name.",
+    ['view'],
+)
+DB_QUERY_TIME = Counter(
+    'league_db_query_seconds_total', "Time spent in database queries while serving requests.",
+    ['view'],
+)
+RESPONSE_CACHE = Counter(
+    'league_response_cache_total', "Response cache lookups by result: hit, miss or not_modified.",
+    ['result'],
+)
+INGESTED_MATCHES = Counter(
+    'league_ingested_matches_total', "Match rows written, by source and outcome.",
+    ['source', 'outcome'],
+)
+
+
+def observe_request(view, method, status, seconds, queries, query_seconds):
+    view = view or 'unmatched'
+    REQUESTS.labels(view, method, status).inc()
+    REQUEST_LATENCY.labels(view).observe(seconds)
+    DB_QUERIES.labels(view).inc(queries)
+    DB_QUERY_TIME.labels(view).inc(query_seconds)
+
+
+def record_ingest(source, created=0, updated=0, rejected=0):
+    for outcome, count in (('created', created), ('updated', updated), ('rejected', rejected)):
+        if count:
+            INGESTED_MATCHES.labels(source, outcome).inc(count)
+
+
+def record_report(source, report):
+    """Adds an ingestion.IngestReport to the ingestion counters."""
+    record_ingest(source, report.created, report.updated, report.skipped)
+
+
+def exposition():
+    """(body, content type) of the current metrics in the text format."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,170 @@
+# league_app/middleware.py
+
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .metrics import observe_request
+
+logger = logging.getLogger('league_app.requests')
+
+DEFAULT_QUERY_BUDGET = 20
+
+
+class QueryTimer:
+    """
+    Database execute wrapper counting queries and the time spent in them.
+    Only a counter and a clock read per query, no SQL is kept.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class RequestTimingMiddleware:
+    """
+    Times each request and reports the split in a Server-Timing header and
+    one JSON log line on the `league_app.requests` logger:
+
+    - db: queries run and the time spent in them
+    - view: the view function, including its own queries
+    - render: turning a DRF or template response into bytes
+    - total: everything below this middleware
+
+    Requests running more queries than REQUEST_QUERY_BUDGET are logged as
+    warnings with "over_budget" set. The same figures feed the Prometheus
+    request, latency and query metrics.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.query_budget = getattr(settings, 'REQUEST_QUERY_BUDGET', DEFAULT_QUERY_BUDGET)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django runs sync hooks of an async chain on a thread; these
+            # only read the clock, so hand it coroutines instead
+            self.process_view = self._aprocess_view
+            self.process_template_response = self._aprocess_template_response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = QueryTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        self.report(request, response, timer, started, time.perf_counter())
+        return response
+
+    async def __acall__(self, request):
+        # Connections are per thread, and the async ORM runs this request's
+        # queries in its own sync thread, so the wrapper goes on there
+        timer = QueryTimer()
+        started = time.perf_counter()
+        await sync_to_async(self._wrap_queries)(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(self._unwrap_queries)(timer)
+        self.report(request, response, timer, started, time.perf_counter())
+        return response
+
+    @staticmethod
+    def _wrap_queries(timer):
+        connection.execute_wrappers.append(timer)
+
+    @staticmethod
+    def _unwrap_queries(timer):
+        connection.execute_wrappers.remove(timer)
+
+    def report(self, request, response, timer, started, finished):
+        # Responses without a render step are built inside the view
+        view_started = getattr(request, '_view_started', finished)
+        view_finished = getattr(request, '_view_finished', finished)
+        timings = {
+            "db": timer.duration,
+            "view": view_finished - view_started,
+            "render": finished - view_finished,
+            "total": finished - started,
+        }
+        response['Server-Timing'] = ", ".join(
+            f'db;dur={timings["db"] * 1000:.2f};desc="{timer.count} queries"'
+            if name == "db" else f'{name};dur={duration * 1000:.2f}'
+            for name, duration in timings.items()
+        )
+
+        view_name = getattr(request.resolver_match, 'view_name', None)
+        observe_request(view_name, request.method, response.status_code,
+                        timings["total"], timer.count, timer.duration)
+
+        over_budget = timer.count > self.query_budget
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "view": view_name,
+            "status": response.status_code,
+            "queries": timer.count,
+            **{f"{name}_ms": round(duration * 1000, 2) for name, duration in timings.items()},
+            "over_budget": over_budget,
+        }
+        logger.log(logging.WARNING if over_budget else logging.INFO, json.dumps(record))
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        request._view_finished = time.perf_counter()
+        return response
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        return self.__class__.process_view(self, request, view_func, view_args, view_kwargs)
+
+    async def _aprocess_template_response(self, request, response):
+        return self.__class__.process_template_response(self, request, response)
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise, able to run in an async middleware chain. WhiteNoise itself
+    is sync only, and under ASGI Django would put every middleware above
+    it, and so every request, on a thread to call it. Finding a file is a
+    dict lookup; only serving one is handed to a thread.
+    """
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            # Development only (DEBUG); a filesystem check on the loop is fine there
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
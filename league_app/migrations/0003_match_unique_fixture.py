@@ -0,0 +1,32 @@
+# Generated by Django 4.2.17 on 2026-10-18 05:18
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_fixtures(apps, schema_editor):
+    # AddMatchRecord could record the same fixture more than once; the
+    # first copy (lowest id) is kept
+    Match = apps.get_model('league_app', 'Match')
+    fixtures = (Match.objects.values('date', 'home_team', 'away_team')
+                .annotate(first_id=Min('id'), copies=Count('id'))
+                .filter(copies__gt=1))
+    for fixture in list(fixtures):
+        (Match.objects.filter(date=fixture['date'], home_team_id=fixture['home_team'],
+                              away_team_id=fixture['away_team'])
+         .exclude(id=fixture['first_id']).delete())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league_app', '0002_season_alter_match_half_time_result_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_fixtures, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='match',
+            constraint=models.UniqueConstraint(fields=('date', 'home_team', 'away_team'), name='unique_match_fixture'),
+        ),
+    ]
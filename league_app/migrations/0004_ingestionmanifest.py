@@ -0,0 +1,25 @@
+# Generated by Django 4.2.17 on 2026-10-18 05:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league_app', '0003_match_unique_fixture'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestionManifest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filename', models.CharField(max_length=255, unique=True)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('size', models.BigIntegerField(default=0)),
+                ('row_count', models.IntegerField(default=0)),
+                ('rows_ingested', models.IntegerField(default=0)),
+                ('ingested_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
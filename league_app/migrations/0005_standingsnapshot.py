@@ -0,0 +1,75 @@
+# Generated by Django 4.2.17 on 2026-10-18 05:24
+
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_standings(apps, schema_editor):
+    # Replays each season's matches in date order, as
+    # league_app.standings does, but on this migration's models
+    Match = apps.get_model('league_app', 'Match')
+    Season = apps.get_model('league_app', 'Season')
+    StandingSnapshot = apps.get_model('league_app', 'StandingSnapshot')
+
+    def snapshots(season_id, matches):
+        table = {}  # team_id: [played, points, scored, conceded, wins, draws, losses]
+        for match_date, day in groupby(matches, key=itemgetter(0)):
+            for _, home_team_id, away_team_id, home_goals, away_goals, result in day:
+                earned = {'H': (3, 0), 'A': (0, 3)}.get(result, (1, 1))
+                for team_id, scored, conceded, points in (
+                    (home_team_id, home_goals, away_goals, earned[0]),
+                    (away_team_id, away_goals, home_goals, earned[1]),
+                ):
+                    stats = table.setdefault(team_id, [0] * 7)
+                    stats[0] += 1
+                    stats[1] += points
+                    stats[2] += scored
+                    stats[3] += conceded
+                    stats[{3: 4, 1: 5, 0: 6}[points]] += 1
+            for team_id, (played, points, scored, conceded, wins, draws, losses) in table.items():
+                yield StandingSnapshot(
+                    season_id=season_id, date=match_date, team_id=team_id, played=played,
+                    points=points, goal_difference=scored - conceded, goals_scored=scored,
+                    goals_conceded=conceded, wins=wins, draws=draws, losses=losses,
+                )
+
+    for season_id in Season.objects.values_list('id', flat=True):
+        matches = (Match.objects.filter(season_id=season_id).order_by('date', 'id')
+                   .values_list('date', 'home_team_id', 'away_team_id',
+                                'home_goals', 'away_goals', 'full_time_result'))
+        StandingSnapshot.objects.bulk_create(snapshots(season_id, matches.iterator()), batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league_app', '0004_ingestionmanifest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StandingSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('played', models.IntegerField(default=0)),
+                ('points', models.IntegerField(default=0)),
+                ('goal_difference', models.IntegerField(default=0)),
+                ('goals_scored', models.IntegerField(default=0)),
+                ('goals_conceded', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('draws', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standing_snapshots', to='league_app.season')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standing_snapshots', to='league_app.team')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='standingsnapshot',
+            constraint=models.UniqueConstraint(fields=('season', 'date', 'team'), name='unique_standing_snapshot'),
+        ),
+        migrations.RunPython(backfill_standings, migrations.RunPython.noop),
+    ]
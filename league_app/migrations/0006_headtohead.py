@@ -0,0 +1,70 @@
+# Generated by Django 4.2.17 on 2026-10-18 05:29
+
+from django.db import migrations, models
+from django.db.models import Case, Count, F, Q, Sum, When
+from django.db.models.functions import Greatest, Least
+import django.db.models.deletion
+
+
+def backfill_head_to_head(apps, schema_editor):
+    # The totals of league_app.head_to_head.pair_totals, on this
+    # migration's models
+    Match = apps.get_model('league_app', 'Match')
+    HeadToHead = apps.get_model('league_app', 'HeadToHead')
+
+    low_is_home = Q(home_team_id=F('team_low'))
+    totals = (
+        Match.objects
+        .annotate(team_low=Least('home_team_id', 'away_team_id'),
+                  team_high=Greatest('home_team_id', 'away_team_id'))
+        .values('team_low', 'team_high')
+        .annotate(
+            matches=Count('id'),
+            team_low_wins=Count('id', filter=(low_is_home & Q(full_time_result='H')) |
+                                (~low_is_home & Q(full_time_result='A'))),
+            team_high_wins=Count('id', filter=(low_is_home & Q(full_time_result='A')) |
+                                 (~low_is_home & Q(full_time_result='H'))),
+            draws=Count('id', filter=~Q(full_time_result__in=['H', 'A'])),
+            team_low_goals=Sum(Case(When(low_is_home, then=F('home_goals')),
+                                    default=F('away_goals'))),
+            team_high_goals=Sum(Case(When(low_is_home, then=F('away_goals')),
+                                     default=F('home_goals'))),
+        )
+        .order_by()
+    )
+    HeadToHead.objects.bulk_create(
+        [
+            HeadToHead(team_low_id=row.pop('team_low'), team_high_id=row.pop('team_high'), **row)
+            for row in totals
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league_app', '0005_standingsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeadToHead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('matches', models.IntegerField(default=0)),
+                ('team_low_wins', models.IntegerField(default=0)),
+                ('team_high_wins', models.IntegerField(default=0)),
+                ('draws', models.IntegerField(default=0)),
+                ('team_low_goals', models.IntegerField(default=0)),
+                ('team_high_goals', models.IntegerField(default=0)),
+                ('team_high', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='league_app.team')),
+                ('team_low', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='league_app.team')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='headtohead',
+            constraint=models.UniqueConstraint(fields=('team_low', 'team_high'), name='unique_head_to_head_pair'),
+        ),
+        migrations.RunPython(backfill_head_to_head, migrations.RunPython.noop),
+    ]
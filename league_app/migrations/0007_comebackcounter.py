@@ -0,0 +1,60 @@
+# Generated by Django 4.2.17 on 2026-10-18 05:32
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+import django.db.models.deletion
+
+
+def backfill_comebacks(apps, schema_editor):
+    # The counts of league_app.comebacks.comeback_totals, on this
+    # migration's models
+    Match = apps.get_model('league_app', 'Match')
+    ComebackCounter = apps.get_model('league_app', 'ComebackCounter')
+
+    home_comeback = Q(half_time_result='A', full_time_result='H')
+    away_comeback = Q(half_time_result='H', full_time_result='A')
+    turned = Match.objects.filter(home_comeback | away_comeback)
+    totals = {}
+    # A home comeback is a lead blown by the away side, and the other way round
+    for team_field, comeback, blown, side in (('home_team_id', home_comeback, away_comeback, 'home'),
+                                              ('away_team_id', away_comeback, home_comeback, 'away')):
+        rows = (turned.values_list(team_field, 'season_id')
+                .annotate(comebacks=Count('id', filter=comeback), blown=Count('id', filter=blown))
+                .order_by())
+        for team_id, season_id, comebacks, blown_leads in rows:
+            counters = totals.setdefault((team_id, season_id), {})
+            counters[f'{side}_comebacks'] = comebacks
+            counters[f'{side}_blown_leads'] = blown_leads
+
+    ComebackCounter.objects.bulk_create(
+        [ComebackCounter(team_id=team_id, season_id=season_id, **counters)
+         for (team_id, season_id), counters in totals.items()],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league_app', '0006_headtohead'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComebackCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('home_comebacks', models.IntegerField(default=0)),
+                ('away_comebacks', models.IntegerField(default=0)),
+                ('home_blown_leads', models.IntegerField(default=0)),
+                ('away_blown_leads', models.IntegerField(default=0)),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comeback_counters', to='league_app.season')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comeback_counters', to='league_app.team')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='comebackcounter',
+            constraint=models.UniqueConstraint(fields=('team', 'season'), name='unique_comeback_counter'),
+        ),
+        migrations.RunPython(backfill_comebacks, migrations.RunPython.noop),
+    ]
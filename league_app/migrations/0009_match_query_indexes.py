@@ -0,0 +1,37 @@
+# Generated by Django 4.2.17 on 2026-10-18 05:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league_app', '0008_datasetversion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['season', 'date'], name='match_season_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['home_team', 'away_team', 'home_yellow_cards', 'away_yellow_cards', 'home_red_cards', 'away_red_cards'], name='match_pair_cards_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['referee', 'full_time_result', 'home_yellow_cards', 'away_yellow_cards', 'home_red_cards', 'away_red_cards'], name='match_referee_impact_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['half_time_result', 'full_time_result', 'season'], name='match_result_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='season',
+            index=models.Index(fields=['name'], name='season_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='season',
+            index=models.Index(fields=['start_date', 'end_date'], name='season_dates_idx'),
+        ),
+    ]
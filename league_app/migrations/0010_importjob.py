@@ -0,0 +1,37 @@
+# Generated by Django 4.2.17 on 2026-10-18 05:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league_app', '0009_match_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='queued', max_length=9)),
+                ('filename', models.CharField(max_length=255)),
+                ('path', models.CharField(max_length=500)),
+                ('size', models.BigIntegerField(default=0)),
+                ('rows_read', models.IntegerField(default=0)),
+                ('rows_skipped', models.IntegerField(default=0)),
+                ('created', models.IntegerField(default=0)),
+                ('updated', models.IntegerField(default=0)),
+                ('errors', models.JSONField(default=list)),
+                ('error_count', models.IntegerField(default=0)),
+                ('failure', models.TextField(blank=True)),
+                ('queued_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'queued_at'], name='importjob_queue_idx')],
+            },
+        ),
+    ]
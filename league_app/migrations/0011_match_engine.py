@@ -0,0 +1,30 @@
+# Generated by Django 4.2.17 on 2026-10-18 05:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('league_app', '0010_importjob'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='match',
+            name='match_pair_cards_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='match',
+            name='match_referee_impact_idx',
+        ),
+        migrations.AddField(
+            model_name='datasetversion',
+            name='rewrites',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['home_team', 'away_team'], name='match_pair_idx'),
+        ),
+    ]
@@ -19,6 +19,14 @@ class Season(models.Model):
     start_date = models.DateField()
     end_date = models.DateField()
 
+    class Meta:
+        indexes = [
+            # ?season= filters join Match to Season by name
+            models.Index(fields=['name'], name='season_name_idx'),
+            # Finding the season a date falls in
+            models.Index(fields=['start_date', 'end_date'], name='season_dates_idx'),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -39,5 +47,175 @@ class Match(models.Model):
     home_red_cards = models.IntegerField(default=0)
     away_red_cards = models.IntegerField(default=0)
 
+    class Meta:
+        constraints = [
+            # Also the index behind order_by('date') and date range filters
+            models.UniqueConstraint(
+                fields=['date', 'home_team', 'away_team'], name='unique_match_fixture'
+            ),
+        ]
+        indexes = [
+            # Season filters, alone or with a date range (standings, comebacks)
+            models.Index(fields=['season', 'date'], name='match_season_date_idx'),
+            # Team pair lookups when head-to-head totals are refreshed
+            models.Index(fields=['home_team', 'away_team'], name='match_pair_idx'),
+            # Half-time / full-time result pairs the comeback counts look for
+            models.Index(
+                fields=['half_time_result', 'full_time_result', 'season'],
+                name='match_result_idx',
+            ),
+        ]
+
     def __str__(self):
         return f"{self.home_team} vs {self.away_team} on {self.date}"
+
+
+class IngestionManifest(models.Model):
+    """
+    What load_data last ingested from each season file, so unchanged files
+    can be skipped and growing files read from where the last run stopped.
+    """
+    filename = models.CharField(max_length=255, unique=True)
+    content_hash = models.CharField(max_length=64)  # sha256 hex digest
+    size = models.BigIntegerField(default=0)  # bytes
+    row_count = models.IntegerField(default=0)  # data rows in the file
+    rows_ingested = models.IntegerField(default=0)  # offset of the next row to read
+    ingested_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.rows_ingested}/{self.row_count} rows)"
+
+
+class StandingSnapshot(models.Model):
+    """
+    A team's cumulative league record in a season after the matches played
+    on `date`. Every match date of a season holds one row per team that has
+    played so far, so the table on any date is a single indexed read.
+    """
+    season = models.ForeignKey(Season, related_name='standing_snapshots', on_delete=models.CASCADE)
+    date = models.DateField()
+    team = models.ForeignKey(Team, related_name='standing_snapshots', on_delete=models.CASCADE)
+    played = models.IntegerField(default=0)
+    points = models.IntegerField(default=0)
+    goal_difference = models.IntegerField(default=0)
+    goals_scored = models.IntegerField(default=0)
+    goals_conceded = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    draws = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['season', 'date', 'team'], name='unique_standing_snapshot'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.team} on {self.date}: {self.points} pts"
+
+
+class HeadToHead(models.Model):
+    """
+    All-time record between two teams, kept once per unordered pair with
+    team_low holding the smaller team id.
+    """
+    team_low = models.ForeignKey(Team, related_name='+', on_delete=models.CASCADE)
+    team_high = models.ForeignKey(Team, related_name='+', on_delete=models.CASCADE)
+    matches = models.IntegerField(default=0)
+    team_low_wins = models.IntegerField(default=0)
+    team_high_wins = models.IntegerField(default=0)
+    draws = models.IntegerField(default=0)
+    team_low_goals = models.IntegerField(default=0)
+    team_high_goals = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['team_low', 'team_high'], name='unique_head_to_head_pair'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.team_low} vs {self.team_high} ({self.matches} matches)"
+
+
+class ComebackCounter(models.Model):
+    """
+    How often a team came from behind at half time to win in a season, and
+    how often it lost a half-time lead, split by venue.
+    """
+    team = models.ForeignKey(Team, related_name='comeback_counters', on_delete=models.CASCADE)
+    season = models.ForeignKey(Season, related_name='comeback_counters', on_delete=models.CASCADE)
+    home_comebacks = models.IntegerField(default=0)
+    away_comebacks = models.IntegerField(default=0)
+    home_blown_leads = models.IntegerField(default=0)
+    away_blown_leads = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['team', 'season'], name='unique_comeback_counter'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.team} in {self.season}"
+
+
+class DatasetVersion(models.Model):
+    """
+    Single row counting writes to the match data. Cached responses are keyed
+    on it, so one bump invalidates every entry in every worker at once.
+    `rewrites` counts only the writes that changed or removed existing
+    matches, or renamed or removed a team, referee or season, so the
+    in-memory engine knows when appending new rows is not enough.
+    """
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+    rewrites = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"v{self.version} at {self.updated_at}"
+
+
+class ImportJob(models.Model):
+    """
+    An uploaded CSV waiting for, or being imported by, the background worker
+    (worker.py). Progress columns are updated after every batch so the API
+    can report on a running import.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    status = models.CharField(max_length=9, choices=STATUS_CHOICES, default=QUEUED)
+    filename = models.CharField(max_length=255)  # as uploaded
+    path = models.CharField(max_length=500)  # where the upload was stored
+    size = models.BigIntegerField(default=0)  # bytes
+    rows_read = models.IntegerField(default=0)
+    rows_skipped = models.IntegerField(default=0)
+    created = models.IntegerField(default=0)  # matches
+    updated = models.IntegerField(default=0)
+    errors = models.JSONField(default=list)  # the first rejected rows, [{"row", "error"}]
+    error_count = models.IntegerField(default=0)
+    failure = models.TextField(blank=True)  # why a failed job stopped
+    queued_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)  # last progress write
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'queued_at'], name='importjob_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"Import {self.pk} of {self.filename} ({self.status})"
@@ -0,0 +1,146 @@
+# league_app/pagination.py
+#
+# Keyset pagination and streamed JSON arrays for the list endpoints whose
+# length grows with the data (rivalries, comebacks). ?page_size= returns one
+# page and a `next` link carrying the keyset position of its last row, so a
+# page costs the same however deep it is and rows written between requests
+# never shift a page. ?stream=1 sends the whole list as a JSON array rendered
+# a chunk of rows at a time instead of as one body.
+
+import base64
+import binascii
+import bisect
+import json
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+
+from .renderers import FastJSONRenderer
+
+PAGE_SIZE_PARAM = 'page_size'
+CURSOR_PARAM = 'cursor'
+STREAM_PARAM = 'stream'
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_ROWS = 500
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# -----------------------------
+# Cursors
+# -----------------------------
+
+def encode_cursor(position):
+    raw = json.dumps(list(position), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, types):
+    """
+    The keyset position in `cursor`, checked to be one value of each of
+    `types`. Raises InvalidCursor for anything else.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except (ValueError, binascii.Error):
+        raise InvalidCursor("Invalid cursor.")
+    if (not isinstance(position, list) or len(position) != len(types)
+            or not all(isinstance(value, kind) and not isinstance(value, bool)
+                       for value, kind in zip(position, types))):
+        raise InvalidCursor("Invalid cursor.")
+    return tuple(position)
+
+
+def parse_page_params(params, cursor_types):
+    """
+    Reads ?page_size=, ?cursor= and ?stream=. Returns ({"size", "after",
+    "stream"}, error message or None); size is None when the whole list
+    was asked for, after is the decoded cursor position or None.
+    """
+    stream = params.get(STREAM_PARAM, '').lower() in ('1', 'true')
+    size = params.get(PAGE_SIZE_PARAM)
+    cursor = params.get(CURSOR_PARAM)
+    if stream and (size or cursor):
+        return None, "stream cannot be combined with page_size or cursor."
+
+    if size:
+        try:
+            size = int(size)
+        except ValueError:
+            return None, "page_size must be an integer."
+        if not 1 <= size <= MAX_PAGE_SIZE:
+            return None, f"page_size must be between 1 and {MAX_PAGE_SIZE}."
+    else:
+        size = None
+
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, cursor_types)
+        except InvalidCursor as e:
+            return None, str(e)
+        if size is None:
+            return None, "cursor requires page_size."
+    return {"size": size, "after": after, "stream": stream}, None
+
+
+def next_link(request, position):
+    """Absolute URL of the page after keyset `position`, None at the end."""
+    if position is None:
+        return None
+    params = request.GET.copy()
+    params[CURSOR_PARAM] = encode_cursor(position)
+    return request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+
+
+def list_page(items, key, page):
+    """
+    (rows, position of the last row or None) of one page of `items`,
+    which must be sorted by `key`, a function returning a keyset position.
+    """
+    start = 0
+    if page["after"]:
+        # bisect's key= argument needs Python 3.10
+        start = bisect.bisect_right([key(item) for item in items], page["after"])
+    stop = start + page["size"]
+    return items[start:stop], (key(items[stop - 1]) if stop < len(items) else None)
+
+
+# -----------------------------
+# Streaming
+# -----------------------------
+
+def json_array_chunks(items, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    The JSON array of `items`, rendered chunk_rows items at a time. The
+    bytes are those FastJSONRenderer gives for the whole list.
+    """
+    renderer = FastJSONRenderer()
+    items = iter(items)
+    yield b'['
+    separator = b''
+    while True:
+        chunk = list(islice(items, chunk_rows))
+        if not chunk:
+            break
+        yield separator + renderer.render(chunk)[1:-1]
+        separator = b','
+    yield b']'
+
+
+async def _aiter(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def streaming_json_response(items, asynchronous=False):
+    """
+    A StreamingHttpResponse of json_array_chunks(items). Async views pass
+    asynchronous=True, since Django buffers a sync iterator under ASGI.
+    """
+    chunks = json_array_chunks(items)
+    return StreamingHttpResponse(_aiter(chunks) if asynchronous else chunks,
+                                 content_type=FastJSONRenderer.media_type)
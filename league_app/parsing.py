@@ -0,0 +1,337 @@
+# league_app/parsing.py
+#
+# Reading football-data CSVs into plain row tuples. Nothing in here touches
+# the database or imports models, so it can run in worker processes.
+
+import csv
+import hashlib
+import os
+from datetime import date
+from functools import lru_cache
+from itertools import islice
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+
+HASH_CHUNK_SIZE = 1 << 20
+UNKNOWN_REFEREE = 'Unknown Referee'
+
+# SQLite stores integers as signed 64-bit values
+MIN_INTEGER, MAX_INTEGER = -2 ** 63, 2 ** 63 - 1
+
+# Order of the values in a parsed match row
+ROW_FIELDS = (
+    'date',
+    'home_team',
+    'away_team',
+    'referee',
+    'full_time_result',
+    'half_time_result',
+    'home_goals',
+    'away_goals',
+    'home_yellow_cards',
+    'away_yellow_cards',
+    'home_red_cards',
+    'away_red_cards',
+)
+
+# First cell of a header line, for plain season files and multi-league feeds
+HEADER_FIRST_COLUMNS = ('Date', 'Div')
+
+
+def season_years_from_filename(filename):
+    """
+    Returns (start_year, end_year) for a file named like "season_9900.csv".
+    Raises ValueError when the name does not carry a season.
+    """
+    season_name = os.path.basename(filename).split('.')[0]
+    year_part = ''.join(filter(str.isdigit, season_name))
+    if len(year_part) >= 4:
+        start_year = int(year_part[-4:-2])
+    elif len(year_part) == 2:
+        start_year = int(year_part)
+    else:
+        raise ValueError("Unexpected season name format.")
+    start_year += 2000 if start_year < 50 else 1900
+    return start_year, start_year + 1
+
+
+def season_name_for(start_year, end_year):
+    return f"{start_year}/{end_year}"
+
+
+def season_name_for_date(match_date):
+    """
+    Names the season a match date falls in when no file name says so.
+    Seasons are taken to start in July.
+    """
+    start_year = match_date.year if match_date.month >= 7 else match_date.year - 1
+    return season_name_for(start_year, start_year + 1)
+
+
+@lru_cache(maxsize=4096)
+def parse_match_date(value):
+    """
+    Parses the football-data date formats: dd/mm/yy in older seasons and
+    dd/mm/yyyy in newer ones. Two-digit years below 50 are 20xx.
+    Raises ValueError for anything else.
+    """
+    try:
+        day, month, year = value.strip().split('/')
+        year_number = int(year)
+        if len(year) == 2:
+            year_number += 2000 if year_number < 50 else 1900
+        elif len(year) != 4:
+            raise ValueError
+        return date(year_number, int(month), int(day))
+    except (AttributeError, ValueError):
+        raise ValueError(f"unrecognised date {value!r}") from None
+
+
+def _clean(value):
+    """Normalises blank cells (None, empty or whitespace) to None."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _to_int(value):
+    value = _clean(value)
+    if value is None:
+        return 0
+    number = value if isinstance(value, int) else None
+    if isinstance(value, str):
+        try:
+            number = int(value)
+        except ValueError:
+            pass
+    if number is None:
+        # Whole numbers written as decimals, such as "2.0"
+        number = float(value)
+        if not number.is_integer():
+            raise ValueError(f"not a whole number {value!r}")
+        number = int(number)
+    if not MIN_INTEGER <= number <= MAX_INTEGER:
+        raise ValueError(f"number out of range {value!r}")
+    return number
+
+
+def normalise_row(record):
+    """
+    Turns one football-data record (a mapping keyed by CSV column) into a
+    tuple laid out as ROW_FIELDS. Raises ValueError for unusable rows.
+    """
+    match_date = parse_match_date(record.get('Date'))
+    home_team = _clean(record.get('HomeTeam'))
+    away_team = _clean(record.get('AwayTeam'))
+    if not home_team or not away_team:
+        raise ValueError("missing team names")
+
+    home_goals = _to_int(record.get('FTHG'))
+    away_goals = _to_int(record.get('FTAG'))
+
+    full_time_result = _clean(record.get('FTR'))
+    if full_time_result is None:
+        if home_goals > away_goals:
+            full_time_result = 'H'
+        elif home_goals < away_goals:
+            full_time_result = 'A'
+        else:
+            full_time_result = 'D'
+
+    return (
+        match_date,
+        str(home_team),
+        str(away_team),
+        str(_clean(record.get('Referee')) or UNKNOWN_REFEREE),
+        full_time_result,
+        _clean(record.get('HTR')),
+        home_goals,
+        away_goals,
+        _to_int(record.get('HY')),
+        _to_int(record.get('AY')),
+        _to_int(record.get('HR')),
+        _to_int(record.get('AR')),
+    )
+
+
+class ParsedSeason:
+    """
+    The validated rows of one season file, ready to be written.
+    `first_row` is the offset of the first data row that was read and
+    `row_count` the number of data rows in the whole file.
+    """
+
+    def __init__(self, filename, season_name, rows, skipped=0, first_row=0, row_count=None):
+        self.filename = filename
+        self.season_name = season_name
+        self.rows = rows
+        self.skipped = skipped
+        self.first_row = first_row
+        self.row_count = len(rows) + skipped if row_count is None else row_count
+        self.content_hash = None
+        self.size = None
+        self.unchanged = False
+
+    @property
+    def start_date(self):
+        return min(row[0] for row in self.rows) if self.rows else None
+
+    @property
+    def end_date(self):
+        return max(row[0] for row in self.rows) if self.rows else None
+
+
+def iter_records(filepath):
+    """
+    Yields the data rows of a football-data CSV as {column: value} dicts,
+    one line at a time. A header line repeated further down (as in feeds
+    concatenated from several seasons or leagues) switches to its layout.
+    """
+    with open(filepath, newline='', encoding='utf-8-sig', errors='replace') as f:
+        header = None
+        for row in csv.reader(f):
+            if not row or not any(row):
+                continue
+            if row[0] in HEADER_FIRST_COLUMNS:
+                header = [column.strip() for column in row]
+                continue
+            if header is None:
+                raise ValueError("missing header row")
+            yield dict(zip(header, row))
+
+
+def iter_rows(records, counts, source='', on_skip=None):
+    """
+    Normalises a stream of records, yielding valid row tuples. Every record
+    read is counted in counts['read'] and every rejected one in
+    counts['skipped']; `on_skip`, if given, is called with the record's
+    number and the reason.
+    """
+    for record in records:
+        counts['read'] += 1
+        try:
+            yield normalise_row(record)
+        except ValueError as e:
+            counts['skipped'] += 1
+            if on_skip is not None:
+                on_skip(counts['read'], str(e))
+            else:
+                print(f"Skipping row in {source}: {e}")
+
+
+def batched(rows, size):
+    """Groups an iterable into lists of at most `size` items."""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def parse_season_file(filepath, skip_rows=0):
+    """
+    Reads a football-data season CSV into a ParsedSeason, starting after the
+    first `skip_rows` data rows.
+    Raises ValueError if the file name does not carry a season.
+    """
+    filename = os.path.basename(filepath)
+    start_year, end_year = season_years_from_filename(filename)
+
+    counts = {'read': 0, 'skipped': 0}
+    records = islice(iter_records(filepath), skip_rows, None)
+    rows = list(iter_rows(records, counts, filename))
+
+    return ParsedSeason(
+        filename, season_name_for(start_year, end_year), rows, counts['skipped'],
+        first_row=skip_rows, row_count=skip_rows + counts['read'],
+    )
+
+
+def fingerprint_file(filepath, prefix_size=None):
+    """
+    Returns (content_hash, size, prefix_hash) for a file. prefix_hash is the
+    hash of its first `prefix_size` bytes, or None unless that prefix is
+    shorter than the file and ends on a line break.
+    """
+    hasher = hashlib.sha256()
+    size = 0
+    last_byte = b''
+    prefix_hash = None
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            if prefix_size and size < prefix_size < size + len(chunk):
+                head = chunk[:prefix_size - size]
+                hasher.update(head)
+                if head.endswith(b'\n'):
+                    prefix_hash = hasher.copy().hexdigest()
+                hasher.update(chunk[len(head):])
+            else:
+                if prefix_size and size == prefix_size and last_byte == b'\n':
+                    prefix_hash = hasher.copy().hexdigest()
+                hasher.update(chunk)
+            size += len(chunk)
+            last_byte = chunk[-1:]
+    return hasher.hexdigest(), size, prefix_hash
+
+
+def plan_file(filepath, state=None):
+    """
+    Compares a file with its manifest state. Returns (content_hash, size,
+    skip_rows) where skip_rows is None if the file is unchanged, the number
+    of rows already ingested if it only grew, and 0 otherwise.
+    """
+    previous_hash, previous_size, rows_ingested = state or (None, 0, 0)
+    content_hash, size, prefix_hash = fingerprint_file(filepath, previous_size)
+
+    if content_hash == previous_hash:
+        return content_hash, size, None
+    if prefix_hash and prefix_hash == previous_hash:
+        return content_hash, size, rows_ingested
+    return content_hash, size, 0
+
+
+def prepare_file(filepath, state=None):
+    """
+    Parses only what is new in a season file: nothing if it is unchanged,
+    the appended rows if it only grew, and the whole file otherwise.
+    Touches no database.
+    """
+    content_hash, size, skip_rows = plan_file(filepath, state)
+
+    if skip_rows is None:
+        rows_ingested = state[2]
+        start_year, end_year = season_years_from_filename(filepath)
+        parsed = ParsedSeason(
+            os.path.basename(filepath), season_name_for(start_year, end_year), [],
+            first_row=rows_ingested, row_count=rows_ingested,
+        )
+        parsed.unchanged = True
+    else:
+        parsed = parse_season_file(filepath, skip_rows)
+
+    parsed.content_hash = content_hash
+    parsed.size = size
+    return parsed
+
+
+def prepare_job(filepath, state):
+    """
+    Runs prepare_file, returning (parsed, error_message) instead of raising
+    so that one bad file does not take down a worker pool.
+    """
+    try:
+        return prepare_file(filepath, state), None
+    except (ValueError, KeyError) as e:
+        return None, f"Error parsing {os.path.basename(filepath)}: {e}"
+
+
+def season_files(data_dir=DATA_DIR):
+    return sorted(
+        os.path.join(data_dir, filename)
+        for filename in os.listdir(data_dir)
+        if filename.endswith('.csv')
+    )
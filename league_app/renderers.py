@@ -0,0 +1,209 @@
+# league_app/renderers.py
+#
+# Renderers for the read-only API. FastJSONRenderer replaces DRF's JSON
+# renderer everywhere. The bulk formats are for machine consumers and are
+# chosen with the Accept header or ?format=:
+#
+#   msgpack  application/msgpack                  the JSON structure, with
+#                                                 lists of objects by column
+#   csv      text/csv                             one row per list item
+#   arrow    application/vnd.apache.arrow.stream  the same rows, by column
+#
+# CSV and Arrow carry a flat table: the list itself, the "results" of a
+# page, or the one list inside an object such as standings, whose other
+# fields are repeated on every row. The next page of a paginated list is in
+# a Link header. orjson, msgpack and pyarrow are optional; without orjson
+# JSON is rendered by DRF as before, and a bulk format whose library is
+# missing is not offered.
+#
+# The match export (export.py) streams NDJSON, CSV or Parquet rather than
+# rendering; its renderers pick the format and render error bodies.
+
+import csv
+import io
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer's compact output, encoded by orjson. Values orjson has
+    no native encoding for, datetimes included so their format stays
+    DRF's, go through DRF's encoder.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None
+                or self.get_indent(accepted_media_type, renderer_context or {})):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson.dumps(data, default=self.encoder_class().default,
+                            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+
+    def render_lines(self, items):
+        """NDJSON: every one of `items` as render() gives it, each on its own line."""
+        if orjson is None:
+            return b''.join(self.render(item) + b'\n' for item in items)
+        default = self.encoder_class().default
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_APPEND_NEWLINE
+        return b''.join([orjson.dumps(item, default=default, option=option) for item in items])
+
+
+# -----------------------------
+# Tables
+# -----------------------------
+
+def table_rows(data):
+    """
+    (rows, next page URL or None) of a response body, rows being dicts as
+    described at the top of this module.
+    """
+    if isinstance(data, list):
+        return [row if isinstance(row, dict) else {"value": row} for row in data], None
+    if not isinstance(data, dict):
+        return [{"value": data}], None
+
+    lists = [name for name, value in data.items() if isinstance(value, list)]
+    if len(lists) != 1:
+        return [data], None
+    shared = {name: value for name, value in data.items()
+              if name not in lists and name != "next" and not isinstance(value, dict)}
+    rows, _ = table_rows(data[lists[0]])
+    return [{**shared, **row} for row in rows], data.get("next")
+
+
+def table_columns(rows):
+    """{field: [value of every row]}, fields in the order first seen."""
+    fields = {}
+    for row in rows:
+        fields.update(dict.fromkeys(row))
+    return {field: [row.get(field) for row in rows] for field in fields}
+
+
+def by_column(data):
+    """`data` with every non-empty list of objects in it turned into table_columns()."""
+    if isinstance(data, list):
+        if data and all(isinstance(row, dict) for row in data):
+            return {field: [by_column(value) for value in values]
+                    for field, values in table_columns(data).items()}
+        return [by_column(value) for value in data]
+    if isinstance(data, dict):
+        return {name: by_column(value) for name, value in data.items()}
+    return data
+
+
+def set_next_link(renderer_context, next_url):
+    response = (renderer_context or {}).get('response')
+    if response is not None and next_url:
+        response['Link'] = f'<{next_url}>; rel="next"'
+
+
+# -----------------------------
+# Bulk formats
+# -----------------------------
+
+def _plain(value):
+    # Dates and other values msgpack has no type for go as their string form
+    return str(value)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(by_column(data), default=_plain)
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows, next_url = table_rows(data)
+        set_next_link(renderer_context, next_url)
+        columns = table_columns(rows)
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(columns)
+        writer.writerows(zip(*columns.values()))
+        return output.getvalue().encode(self.charset)
+
+
+class ArrowStreamRenderer(BaseRenderer):
+    media_type = 'application/vnd.apache.arrow.stream'
+    format = 'arrow'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows, next_url = table_rows(data)
+        set_next_link(renderer_context, next_url)
+        table = pyarrow.table(table_columns(rows))
+        sink = pyarrow.BufferOutputStream()
+        with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return FastJSONRenderer().render_lines(data if isinstance(data, list) else [data])
+
+
+class ParquetRenderer(BaseRenderer):
+    media_type = 'application/vnd.apache.parquet'
+    format = 'parquet'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows, _ = table_rows(data)
+        sink = pyarrow.BufferOutputStream()
+        pyarrow.parquet.write_table(pyarrow.table(table_columns(rows)), sink)
+        return sink.getvalue().to_pybytes()
+
+
+BULK_RENDERERS = [
+    renderer for renderer, library in (
+        (MessagePackRenderer, msgpack),
+        (CSVRenderer, csv),
+        (ArrowStreamRenderer, pyarrow),
+    )
+    if library is not None
+]
+
+EXPORT_RENDERERS = [NDJSONRenderer, CSVRenderer] + ([ParquetRenderer] if pyarrow else [])
@@ -0,0 +1,138 @@
+# league_app/search.py
+
+import threading
+import time
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from rapidfuzz import fuzz, process, utils
+
+from .caching import current_version
+from .models import Team, Referee, Season
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+# WRatio gives exactly 60 to the weakest partial matches (two thirds of a
+# short query aligned, scaled by 0.9), such as "dean" -> "Andy Hall", which
+# the fuzzywuzzy search this replaced scored at 30-45 and left out.
+DEFAULT_SCORE_CUTOFF = 61
+MAX_SCORE = 100
+
+# Lists this long are pruned to the names sharing a bigram with the query,
+# at most PRUNE_MAX_CANDIDATES of them, those sharing the most first. WRatio
+# takes about a microsecond a name, so that keeps a search under 1 ms.
+# Pruning can drop a partial match WRatio would accept, so shorter lists,
+# which score quickly enough in full, are not pruned.
+PRUNE_MIN_NAMES = 500
+PRUNE_MAX_CANDIDATES = 800
+NGRAM = 2
+
+# Writes made by other processes are noticed through the dataset version,
+# read at most this often so that keystrokes stay off the database.
+VERSION_CHECK_SECONDS = 5
+
+
+def ngrams(text, n=NGRAM):
+    """
+    The n-grams of each word of `text`, with a space before the word so
+    that a word's first letter, and so an initial, is one as well.
+    """
+    grams = set()
+    for word in text.split():
+        word = ' ' + word
+        grams.update(word[i:i + n] for i in range(len(word) - n + 1))
+    return grams
+
+
+class NameIndex:
+    """
+    Fuzzy lookup over the `name` column of one model, loaded once per
+    process and dropped by invalidate() when rows of the model change, or
+    when the dataset version moves because another process wrote.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._lock = threading.Lock()
+        self._data = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def invalidate(self):
+        self._data = None
+
+    def _load(self):
+        now = time.monotonic()
+        if self._data is not None and now - self._checked_at >= VERSION_CHECK_SECONDS:
+            self._checked_at = now
+            if current_version() != self._version:
+                self._data = None
+
+        data = self._data
+        if data is None:
+            with self._lock:
+                data = self._data
+                if data is None:
+                    self._version = current_version()
+                    self._checked_at = now
+                    names = list(self.model.objects.values_list('name', flat=True))
+                    processed = [utils.default_process(name) for name in names]
+                    postings = {}
+                    for position, text in enumerate(processed):
+                        for gram in ngrams(text):
+                            postings.setdefault(gram, []).append(position)
+                    postings = {gram: np.array(positions, dtype=np.int32)
+                                for gram, positions in postings.items()}
+                    data = self._data = (names, dict(enumerate(processed)), postings)
+        return data
+
+    def version(self):
+        """The dataset version the loaded names reflect."""
+        self._load()
+        return self._version
+
+    async def aversion(self):
+        """
+        version() for async views. Only a due version check or a load
+        leaves the event loop; search() then runs on the loaded names.
+        """
+        if self._data is None or time.monotonic() - self._checked_at >= VERSION_CHECK_SECONDS:
+            await sync_to_async(self._load)()
+        return self._version
+
+    def search(self, query, limit=DEFAULT_LIMIT, score_cutoff=DEFAULT_SCORE_CUTOFF):
+        """Returns up to `limit` names scoring at least `score_cutoff`, best first."""
+        names, processed, postings = self._load()
+        query = utils.default_process(query)
+        if not query:
+            return []
+
+        choices = processed
+        if len(names) >= PRUNE_MIN_NAMES:
+            shared = [postings[gram] for gram in ngrams(query) if gram in postings]
+            if shared:
+                # How many of the query's bigrams each name has
+                counts = np.bincount(np.concatenate(shared), minlength=len(names))
+                candidates = np.flatnonzero(counts)
+                if len(candidates) > PRUNE_MAX_CANDIDATES:
+                    candidates = np.argpartition(-counts, PRUNE_MAX_CANDIDATES)[:PRUNE_MAX_CANDIDATES]
+                choices = {position: processed[position] for position in candidates.tolist()}
+
+        matches = process.extract(
+            query,
+            choices,
+            scorer=fuzz.WRatio,
+            processor=None,
+            limit=None,
+            score_cutoff=score_cutoff,
+        )
+        # Whole-number scores, ties in table order, as fuzzywuzzy ranked them
+        matches.sort(key=lambda match: (-round(match[1]), match[2]))
+        return [names[position] for _, _, position in matches[:limit]]
+
+
+team_index = NameIndex(Team)
+referee_index = NameIndex(Referee)
+season_index = NameIndex(Season)
+
+INDEXES = {Team: team_index, Referee: referee_index, Season: season_index}
@@ -0,0 +1,92 @@
+# league_app/seasons.py
+#
+# Finding the season a date falls in. SeasonDateIndex holds every season's date
+# range sorted by start date, loaded once per process, so a lookup is a
+# bisect rather than a query. Like the search indexes it is dropped when a
+# Season is written through the ORM (see signals.py), and reloaded when the
+# dataset version moves because another process wrote.
+
+import bisect
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+
+from .caching import current_version
+from .models import Season
+from .search import VERSION_CHECK_SECONDS
+
+NO_SEASON_FOR_DATE = ("No season covers this date. Name the season, with season_start_date "
+                      "and season_end_date if it is new.")
+
+
+class SeasonDateIndex:
+    """
+    Seasons as intervals ordered by start date. Each lookup takes the
+    dataset version the caller has already read, if any; without one the
+    version is read at most every VERSION_CHECK_SECONDS.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = None
+        self._version = None
+        self._checked_at = 0.0
+
+    def invalidate(self):
+        self._data = None
+
+    def _due(self, version):
+        if version is not None:
+            return version != self._version
+        return time.monotonic() - self._checked_at >= VERSION_CHECK_SECONDS
+
+    def _load(self, version=None):
+        if self._data is not None and version is None and self._due(None):
+            self._checked_at = time.monotonic()
+            version = current_version()
+
+        data = self._data
+        if data is None or (version is not None and version != self._version):
+            with self._lock:
+                data = self._data
+                if data is None or (version is not None and version != self._version):
+                    # The version first, so the seasons read are at least that new
+                    self._version = version if version is not None else current_version()
+                    self._checked_at = time.monotonic()
+                    seasons = list(Season.objects.order_by('start_date', 'id'))
+                    # reach[i]: the latest end date of seasons[0..i], so
+                    # overlapping seasons are found without a scan
+                    reach = []
+                    for season in seasons:
+                        reach.append(max(reach[-1], season.end_date) if reach else season.end_date)
+                    data = self._data = ([season.start_date for season in seasons], reach, seasons)
+        return data
+
+    @staticmethod
+    def _find(data, day):
+        starts, reach, seasons = data
+        i = bisect.bisect_right(starts, day)
+        while i and reach[i - 1] >= day:
+            i -= 1
+            if seasons[i].end_date >= day:
+                return seasons[i]
+        return None
+
+    def season_for(self, day, version=None):
+        """
+        The Season whose start_date..end_date holds `day`, the latest
+        starting one if several do, or None. The Season is shared, so it
+        must not be changed.
+        """
+        return self._find(self._load(version), day)
+
+    async def aseason_for(self, day, version=None):
+        """season_for() for async views; only a load leaves the event loop."""
+        data = self._data
+        if data is None or self._due(version):
+            data = await sync_to_async(self._load)(version)
+        return self._find(data, day)
+
+
+season_date_index = SeasonDateIndex()
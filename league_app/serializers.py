@@ -1,7 +1,10 @@
 # league_app/serializers.py
 
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Match, Team, Referee, Season
+from .models import ImportJob, Match, Team, Referee, Season
+from .seasons import NO_SEASON_FOR_DATE, season_date_index
 
 class TeamSerializer(serializers.ModelSerializer):
     class Meta:
@@ -32,7 +35,7 @@ class MatchCreateSerializer(serializers.ModelSerializer):
     home_team = serializers.CharField()
     away_team = serializers.CharField()
     referee = serializers.CharField()
-    season = serializers.CharField()
+    season = serializers.CharField(required=False)
     season_start_date = serializers.DateField(required=False)
     season_end_date = serializers.DateField(required=False)
 
@@ -59,6 +62,12 @@ class MatchCreateSerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         season_name = data.get('season')
+        if season_name is None:
+            # The season whose dates hold the match date, from the in-memory index
+            data['season'] = season_date_index.season_for(data['date'])
+            if data['season'] is None:
+                raise serializers.ValidationError({'season': NO_SEASON_FOR_DATE})
+            return data
         if not Season.objects.filter(name=season_name).exists():
             if not data.get('season_start_date') or not data.get('season_end_date'):
                 raise serializers.ValidationError({
@@ -84,22 +93,45 @@ class MatchCreateSerializer(serializers.ModelSerializer):
         # Get or create Referee
         referee, created = Referee.objects.get_or_create(name=referee_name)
 
-        # Get or create Season
-        season, created = Season.objects.get_or_create(
-            name=season_name,
-            defaults={
-                'start_date': season_start_date,
-                'end_date': season_end_date,
-            }
-        )
-
-        # Create Match
-        match = Match.objects.create(
-            home_team=home_team,
-            away_team=away_team,
-            referee=referee,
-            season=season,
-            **validated_data
-        )
+        # Get or create Season, unless validate() found it by date
+        if isinstance(season_name, Season):
+            season = season_name
+        else:
+            season, created = Season.objects.get_or_create(
+                name=season_name,
+                defaults={
+                    'start_date': season_start_date,
+                    'end_date': season_end_date,
+                }
+            )
+
+        # Create Match (date, home_team and away_team identify a fixture)
+        try:
+            with transaction.atomic():
+                match = Match.objects.create(
+                    home_team=home_team,
+                    away_team=away_team,
+                    referee=referee,
+                    season=season,
+                    **validated_data
+                )
+        except IntegrityError:
+            raise serializers.ValidationError({
+                'non_field_errors': ['A match between these teams on this date already exists.']
+            })
 
         return match
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    rows_per_second = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImportJob
+        exclude = ['path']
+
+    def get_rows_per_second(self, job):
+        # Over the job's run so far, or its whole run once finished
+        if job.started_at is None:
+            return 0.0
+        elapsed = ((job.finished_at or timezone.now()) - job.started_at).total_seconds()
+        return round(job.rows_read / elapsed, 1) if elapsed > 0 else 0.0
@@ -0,0 +1,70 @@
+# league_app/signals.py
+#
+# Keeps the derived tables, the dataset version and the in-process indexes in
+# step with rows written through the ORM one at a time (AddMatchRecord, the
+# admin, tests). The bulk loader does not fire these signals and refreshes
+# the same state itself.
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .aggregates import ChangeSet, add_created_match, refresh_aggregates
+from .caching import bump_version
+from .models import Match, Team, Referee, Season
+from .search import INDEXES
+from .seasons import season_date_index
+
+ORIGIN_FIELDS = ('season_id', 'date', 'home_team_id', 'away_team_id')
+
+
+@receiver(pre_save, sender=Match)
+def remember_match_origin(sender, instance, raw=False, **kwargs):
+    # An update may move the match to another season, date or pair of teams
+    instance._origin = None
+    if instance.pk and not raw:
+        instance._origin = (Match.objects.filter(pk=instance.pk)
+                            .values_list(*ORIGIN_FIELDS).first())
+
+
+@receiver(post_save, sender=Match)
+def match_saved(sender, instance, created, raw=False, **kwargs):
+    bump_version(rewrite=not created)
+    if raw:
+        return
+    if created:
+        add_created_match(instance)
+        return
+
+    changes = ChangeSet()
+    changes.add(instance.season_id, instance.date, instance.home_team_id, instance.away_team_id)
+    origin = getattr(instance, '_origin', None)
+    if origin:
+        changes.add(*origin)
+    refresh_aggregates(changes)
+
+
+@receiver(post_delete, sender=Match)
+def match_deleted(sender, instance, origin=None, **kwargs):
+    # Cascades from a deleted Season or Team remove the derived rows too
+    if not isinstance(origin, Match) and getattr(origin, 'model', None) is not Match:
+        return
+    bump_version(rewrite=True)
+    changes = ChangeSet()
+    changes.add(instance.season_id, instance.date, instance.home_team_id, instance.away_team_id)
+    refresh_aggregates(changes)
+
+
+@receiver(post_save, sender=Team)
+@receiver(post_save, sender=Referee)
+@receiver(post_save, sender=Season)
+@receiver(post_delete, sender=Team)
+@receiver(post_delete, sender=Referee)
+@receiver(post_delete, sender=Season)
+def name_changed(sender, created=False, **kwargs):
+    # A rename or delete is a rewrite, so the match engine drops the names
+    # it holds; deletes also cover the matches they cascade to (or, for a
+    # Referee, leave without one)
+    bump_version(rewrite=not created)
+    INDEXES[sender].invalidate()
+    if sender is Season:
+        season_date_index.invalidate()
@@ -0,0 +1,153 @@
+# league_app/snapshot.py
+#
+# Binary snapshot of the match data for the in-memory engine. snapshot.py
+# writes one file holding the match columns and the team, referee and
+# season names as fixed-width arrays; each worker maps it read-only and
+# wraps the arrays without copying, so every worker on the host shares the
+# same page-cache pages and starts without reading the Match table.
+#
+# Layout, all little-endian:
+#
+#   b'LEAGSNAP' | format (uint32) | header length (uint32) | JSON header
+#   | arrays, each starting on an ARRAY_ALIGNMENT boundary
+#
+# The header records the dataset state the file was written at and the
+# dtype, offset and length of every array. Names are string tables: ids,
+# offsets into one UTF-8 blob (one more offset than names), and the blob.
+
+import json
+import mmap
+import os
+import struct
+import time
+from datetime import datetime
+
+import numpy as np
+from django.db import transaction
+
+from .caching import dataset_state
+from .engine import COLUMNS, NAME_MODELS, MatchColumns, NameTable, load_columns
+
+SNAPSHOT_MAGIC = b'LEAGSNAP'
+SNAPSHOT_FORMAT = 1
+PREAMBLE = struct.Struct('<8sII')
+ARRAY_ALIGNMENT = 64
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+# -----------------------------
+# Writing
+# -----------------------------
+
+def snapshot_arrays():
+    """
+    Reads the dataset state and every array of a snapshot in one
+    transaction, so the arrays are exactly the data at that state.
+    """
+    with transaction.atomic():
+        state = dataset_state()
+        columns = load_columns()
+        arrays = {f"match.{name}": columns.column(name) for name, _, _ in COLUMNS}
+        for kind, model in NAME_MODELS.items():
+            rows = list(model.objects.order_by('id').values_list('id', 'name'))
+            arrays.update(NameTable.from_rows(rows).arrays(kind))
+    return state, arrays
+
+
+def _aligned(offset):
+    return -(-offset // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+
+
+def write_snapshot(path):
+    """
+    Writes a snapshot of the current data to `path`, replacing any file
+    there atomically so workers mapping the old one are unaffected.
+    Returns (dataset state, number of matches).
+    """
+    state, arrays = snapshot_arrays()
+    arrays = {name: np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<'))
+              for name, array in arrays.items()}
+    version, updated_at, rewrites = state
+
+    # Offsets depend on the header length, which depends on the offsets;
+    # sizing the header with room to spare settles it in one pass
+    layout = {name: [array.dtype.str, 0, len(array)] for name, array in arrays.items()}
+    header = {
+        "dataset": {"version": version, "rewrites": rewrites,
+                    "updated_at": updated_at.isoformat() if updated_at else None},
+        "created_at": time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        "arrays": layout,
+    }
+    header_length = len(json.dumps(header)) + 32 * len(layout)
+    offset = _aligned(PREAMBLE.size + header_length)
+    for name, array in arrays.items():
+        layout[name][1] = offset
+        offset = _aligned(offset + array.nbytes)
+    encoded = json.dumps(header).encode('utf-8').ljust(header_length)
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as f:
+        f.write(PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT, header_length))
+        f.write(encoded)
+        for name, array in arrays.items():
+            f.seek(layout[name][1])
+            f.write(array.tobytes())
+        f.truncate(offset)
+    os.replace(temporary, path)
+    return state, len(arrays["match.id"])
+
+
+# -----------------------------
+# Reading
+# -----------------------------
+
+class Snapshot:
+    """
+    A snapshot file mapped read-only. Its arrays are views of the mapping,
+    so they cost no memory of their own and must not be written to.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.stat = os.fstat(f.fileno())
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.buffer) < PREAMBLE.size:
+            raise SnapshotError(f"{path} is not a match snapshot.")
+        magic, file_format, header_length = PREAMBLE.unpack_from(self.buffer)
+        if magic != SNAPSHOT_MAGIC:
+            raise SnapshotError(f"{path} is not a match snapshot.")
+        if file_format != SNAPSHOT_FORMAT:
+            raise SnapshotError(f"{path} has snapshot format {file_format}, "
+                                f"this code reads {SNAPSHOT_FORMAT}.")
+        header = json.loads(bytes(self.buffer[PREAMBLE.size:PREAMBLE.size + header_length]))
+
+        dataset = header["dataset"]
+        updated_at = dataset["updated_at"]
+        self.state = (dataset["version"],
+                      datetime.fromisoformat(updated_at) if updated_at else None,
+                      dataset["rewrites"])
+        self.arrays = {
+            name: np.frombuffer(self.buffer, dtype=np.dtype(dtype), count=length, offset=offset)
+            for name, (dtype, offset, length) in header["arrays"].items()
+        }
+
+    def columns(self):
+        return MatchColumns({name: self.arrays[f"match.{name}"] for name, _, _ in COLUMNS},
+                            tables={kind: self.table(kind) for kind in NAME_MODELS
+                                    if f"{kind}.id" in self.arrays})
+
+    def table(self, kind):
+        """The NameTable of a 'team', 'referee' or 'season' string table."""
+        return NameTable(self.arrays[f"{kind}.id"], self.arrays[f"{kind}.offsets"],
+                         self.arrays[f"{kind}.names"])
+
+
+def open_snapshot(path):
+    """The Snapshot at `path`, or None if there is no readable one."""
+    try:
+        return Snapshot(path)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,142 @@
+# league_app/standings.py
+
+from django.db import transaction
+from django.db.models import Subquery
+
+from .bulk import insert_rows
+from .models import Match, StandingSnapshot
+
+# Order of the running totals kept per team while replaying matches
+STAT_FIELDS = ('played', 'points', 'goals_scored', 'goals_conceded', 'wins', 'draws', 'losses')
+
+MATCH_FIELDS = ('date', 'home_team_id', 'away_team_id', 'home_goals', 'away_goals', 'full_time_result')
+
+SNAPSHOT_FIELDS = ('season_id', 'date', 'team_id', 'played', 'points', 'goal_difference',
+                   'goals_scored', 'goals_conceded', 'wins', 'draws', 'losses')
+
+
+def apply_match(table, home_team_id, away_team_id, home_goals, away_goals, result):
+    """Adds one match to a {team_id: [STAT_FIELDS...]} table in place."""
+    home = table.setdefault(home_team_id, [0] * len(STAT_FIELDS))
+    away = table.setdefault(away_team_id, [0] * len(STAT_FIELDS))
+
+    home[0] += 1
+    away[0] += 1
+    home[2] += home_goals
+    home[3] += away_goals
+    away[2] += away_goals
+    away[3] += home_goals
+
+    if result == 'H':
+        home[1] += 3
+        home[4] += 1
+        away[6] += 1
+    elif result == 'A':
+        away[1] += 3
+        away[4] += 1
+        home[6] += 1
+    else:  # Draw
+        home[1] += 1
+        away[1] += 1
+        home[5] += 1
+        away[5] += 1
+
+
+def iter_tables(table, matches):
+    """
+    Replays date-ordered match tuples (laid out as MATCH_FIELDS) on top of
+    `table` and yields (date, table) once the last match of each date is in.
+    The same dict is updated and yielded every time.
+    """
+    current_date = None
+    for match_date, *match in matches:
+        if current_date is not None and match_date != current_date:
+            yield current_date, table
+        current_date = match_date
+        apply_match(table, *match)
+    if current_date is not None:
+        yield current_date, table
+
+
+def snapshot_objects(model, season_id, tables):
+    for match_date, table in tables:
+        for team_id, stats in table.items():
+            played, points, scored, conceded, wins, draws, losses = stats
+            yield model(
+                season_id=season_id,
+                date=match_date,
+                team_id=team_id,
+                played=played,
+                points=points,
+                goal_difference=scored - conceded,
+                goals_scored=scored,
+                goals_conceded=conceded,
+                wins=wins,
+                draws=draws,
+                losses=losses,
+            )
+
+
+def snapshot_rows(season_id, tables):
+    """The rows snapshot_objects() would build, as SNAPSHOT_FIELDS tuples."""
+    for match_date, table in tables:
+        for team_id, (played, points, scored, conceded, wins, draws, losses) in table.items():
+            yield (season_id, match_date, team_id, played, points, scored - conceded,
+                   scored, conceded, wins, draws, losses)
+
+
+def rebuild_standings(season_id, from_date=None):
+    """
+    Recomputes the snapshots of a season from `from_date` onwards (or all of
+    them), starting from the table stored for the last date before it.
+    """
+    snapshots = StandingSnapshot.objects.filter(season_id=season_id)
+    matches = Match.objects.filter(season_id=season_id)
+
+    table = {}
+    if from_date is not None:
+        previous_date = (snapshots.filter(date__lt=from_date)
+                         .order_by('-date').values('date')[:1])
+        for snapshot in snapshots.filter(date=Subquery(previous_date)):
+            table[snapshot.team_id] = [getattr(snapshot, field) for field in STAT_FIELDS]
+        snapshots = snapshots.filter(date__gte=from_date)
+        matches = matches.filter(date__gte=from_date)
+
+    matches = matches.order_by('date', 'id').values_list(*MATCH_FIELDS)
+    with transaction.atomic():
+        snapshots.delete()
+        insert_rows(StandingSnapshot, SNAPSHOT_FIELDS,
+                    snapshot_rows(season_id, iter_tables(table, matches.iterator())))
+
+
+def refresh_standings(affected):
+    """
+    Brings snapshots up to date after matches were written. `affected` maps
+    season ids to the earliest match date that changed in that season.
+    """
+    for season_id, from_date in affected.items():
+        rebuild_standings(season_id, from_date)
+
+
+def _standings_query(season, selected_date):
+    latest_date = (StandingSnapshot.objects
+                   .filter(season=season, date__lte=selected_date)
+                   .order_by('-date').values('date')[:1])
+    return (
+        StandingSnapshot.objects
+        .filter(season=season, date=Subquery(latest_date))
+        .select_related('team')
+        .order_by('-points', '-goal_difference', '-goals_scored', 'team__name')
+    )
+
+
+def standings_as_of(season, selected_date):
+    """
+    The snapshot rows of `season` for the last match date on or before
+    `selected_date`, best placed first. One query.
+    """
+    return list(_standings_query(season, selected_date))
+
+
+async def astandings_as_of(season, selected_date):
+    return [snapshot async for snapshot in _standings_query(season, selected_date)]
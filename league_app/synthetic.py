@@ -0,0 +1,146 @@
+# league_app/synthetic.py
+#
+# Synthetic leagues for benchmarking: double round-robin seasons between
+# made-up teams, as parsed match rows or as a football-data CSV. Like
+# parsing.py this never touches the database.
+
+import csv
+import random
+from datetime import date, timedelta
+
+from .parsing import season_name_for
+
+# Same columns, in the same order, as the real season files
+CSV_COLUMNS = [
+    'Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG', 'FTR', 'HTHG', 'HTAG', 'HTR',
+    'Referee', 'HS', 'AS', 'HST', 'AST', 'HF', 'AF', 'HC', 'AC', 'HY', 'AY', 'HR', 'AR',
+]
+
+SEASON_LENGTH_DAYS = 290  # early August to late May
+GOAL_WEIGHTS = [30, 35, 20, 10, 4, 1]  # chances of 0..5 goals in a half, roughly
+
+
+def names(prefix, count):
+    width = len(str(count))
+    return [f"{prefix} {i:0{width}d}" for i in range(1, count + 1)]
+
+
+def round_robin(teams):
+    """
+    Pairs every team with every other twice, home and away, returning the
+    (home, away) pairs of each round. The circle method, with a bye for an
+    odd number of teams.
+    """
+    teams = list(teams)
+    if len(teams) % 2:
+        teams.append(None)
+    count = len(teams)
+    first_half = []
+    for round_number in range(count - 1):
+        pairs = []
+        for i in range(count // 2):
+            home, away = teams[i], teams[count - 1 - i]
+            if home is None or away is None:
+                continue
+            # Alternate venues so no team plays every first-half game at home
+            pairs.append((home, away) if (round_number + i) % 2 else (away, home))
+        first_half.append(pairs)
+        teams.insert(1, teams.pop())
+    return first_half + [[(away, home) for home, away in pairs] for pairs in first_half]
+
+
+def _result(home_goals, away_goals):
+    if home_goals > away_goals:
+        return 'H'
+    if home_goals < away_goals:
+        return 'A'
+    return 'D'
+
+
+class SyntheticLeague:
+    """
+    A reproducible league of `teams` clubs over `seasons` consecutive
+    seasons starting in `first_year`, officiated by `referees` referees.
+    Every season has teams * (teams - 1) matches.
+    """
+
+    def __init__(self, teams=20, seasons=10, referees=25, first_year=2000, seed=0):
+        if teams < 2:
+            raise ValueError("A league needs at least two teams.")
+        self.teams = names("Team", teams)
+        self.referees = names("Referee", max(referees, 1))
+        self.seasons = seasons
+        self.first_year = first_year
+        self.seed = seed
+
+    @property
+    def matches_per_season(self):
+        return len(self.teams) * (len(self.teams) - 1)
+
+    def season_names(self):
+        return [season_name_for(year, year + 1)
+                for year in range(self.first_year, self.first_year + self.seasons)]
+
+    def iter_seasons(self, with_half_time=False):
+        """
+        Yields (season name, rows) per season, rows in parsing.ROW_FIELDS
+        order. With `with_half_time` each row comes paired with its
+        (home, away) half-time score.
+        """
+        rng = random.Random(self.seed)
+        rounds = round_robin(self.teams)
+        for offset, season_name in enumerate(self.season_names()):
+            start = date(self.first_year + offset, 8, 1)
+            rows = []
+            for round_number, pairs in enumerate(rounds):
+                match_date = start + timedelta(days=round_number * SEASON_LENGTH_DAYS // len(rounds))
+                for home, away in pairs:
+                    row, half_time = self._match(rng, match_date, home, away)
+                    rows.append((row, half_time) if with_half_time else row)
+            yield season_name, rows
+
+    def _match(self, rng, match_date, home, away):
+        half_time = rng.choices(range(len(GOAL_WEIGHTS)), GOAL_WEIGHTS, k=2)
+        second_half = rng.choices(range(len(GOAL_WEIGHTS)), GOAL_WEIGHTS, k=2)
+        home_goals = half_time[0] + second_half[0]
+        away_goals = half_time[1] + second_half[1]
+        row = (
+            match_date,
+            home,
+            away,
+            rng.choice(self.referees),
+            _result(home_goals, away_goals),
+            _result(*half_time),
+            home_goals,
+            away_goals,
+            rng.randint(0, 5),
+            rng.randint(0, 5),
+            int(rng.random() < 0.05),
+            int(rng.random() < 0.07),
+        )
+        return row, half_time
+
+    def write_csv(self, path):
+        """
+        Writes every season to one football-data style CSV, with four digit
+        years, for load_data.py --stream. Returns the number of matches.
+        """
+        count = 0
+        # Shots, fouls and corners are not stored, so they come from their own
+        # generator and leave the stored columns identical to iter_seasons()
+        stats = random.Random(self.seed + 1)
+        with open(path, 'w', newline='', encoding='utf-8') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(CSV_COLUMNS)
+            for _, rows in self.iter_seasons(with_half_time=True):
+                for row, (half_home, half_away) in rows:
+                    (match_date, home, away, referee, ftr, htr, home_goals, away_goals,
+                     hy, ay, hr, ar) = row
+                    writer.writerow([
+                        match_date.strftime('%d/%m/%Y'), home, away, home_goals, away_goals, ftr,
+                        half_home, half_away, htr, referee,
+                        *(stats.randint(3, 20) for _ in range(8)),
+                        hy, ay, hr, ar,
+                    ])
+                    count += 1
+        return count
@@ -1,10 +1,50 @@
 # league_app/tests.py
 
+import csv
+import io
+import json
+import logging
+import os
+import tempfile
+import unittest
+from types import ModuleType
+from unittest import mock
+
+from asgiref.sync import async_to_sync
 from rest_framework.test import APITestCase
 from rest_framework import status
-from django.urls import reverse
-from league_app.models import Team, Referee, Match, Season
-from datetime import datetime
+from django.db import connection
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+from django.core.files.uploadedfile import SimpleUploadedFile
+from league_app.models import (
+    Team, Referee, Match, Season, IngestionManifest, ImportJob, StandingSnapshot, HeadToHead,
+)
+from league_app.benchmark import load_synthetic, run_benchmark
+from league_app import ingestion, search
+from league_app.caching import bump_version, current_version, response_cache
+from league_app.engine import MatchEngine, match_engine, match_mask, rank_rivalries, referee_impact
+from league_app.export import export_matches, match_chunks
+from league_app.imports import claim_job, run_pending_jobs
+from league_app.ingestion import ingest_files, ingest_stream
+from league_app.parsing import parse_match_date
+from league_app.renderers import msgpack, pyarrow
+from league_app.search import referee_index
+from league_app.seasons import season_date_index
+from league_app.snapshot import open_snapshot, write_snapshot
+from league_app.synthetic import SyntheticLeague
+from league_app.urls import api_patterns
+from datetime import date
+
+# Keep the per-request timing lines out of the test output
+logging.getLogger('league_app.requests').setLevel(logging.WARNING)
+
+# The API as the ASGI deployment routes it, read-only endpoints on their async views
+ASYNC_URLCONF = ModuleType('async_urls')
+ASYNC_URLCONF.urlpatterns = [path('api/', include(api_patterns(async_views=True)))]
+
+CSV_HEADER = "Date,HomeTeam,AwayTeam,FTHG,FTAG,FTR,HTHG,HTAG,HTR,Referee,HS,AS,HST,AST,HF,AF,HC,AC,HY,AY,HR,AR\n"
 
 class LeagueAPITestCase(APITestCase):
     def setUp(self):
@@ -36,12 +76,81 @@ class LeagueAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
         self.assertEqual(response.data["detail"], "No matches found between these teams.")
 
+    def test_head_to_head_history_single_query(self):
+        url = reverse('head-to-head-history', args=["Man United", "Liverpool"])
+        # Dataset version for the response cache, then the record itself
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["team1_wins"], 0)
+        self.assertEqual(response.data["team2_wins"], 1)
+        self.assertEqual(response.data["total_goals_team1"], 1)
+        self.assertEqual(response.data["total_goals_team2"], 3)
+
+    def test_head_to_head_history_follows_match_updates(self):
+        Match.objects.create(
+            date="2024-12-10", home_team=self.team2, away_team=self.team1,
+            referee=self.referee, full_time_result="D", home_goals=2, away_goals=2,
+            season=self.season,
+        )
+        url = reverse('head-to-head-history', args=["Liverpool", "Man United"])
+        response = self.client.get(url)
+        self.assertEqual((response.data["total_matches"], response.data["draws"]), (2, 1))
+        self.assertEqual(response.data["total_goals_team1"], 5)
+
+        match = Match.objects.get(date="2024-12-01")
+        match.full_time_result = "A"
+        match.home_goals = 0
+        match.save()
+        response = self.client.get(url)
+        self.assertEqual((response.data["team1_wins"], response.data["team2_wins"]), (0, 1))
+        self.assertEqual(response.data["total_goals_team1"], 2)
+
+        Match.objects.filter(date="2024-12-10").delete()
+        match.delete()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_referee_impact_analysis_nonexistent_referee(self):
         url = reverse('referee-impact', args=["Unknown Referee"])
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
         self.assertEqual(response.data["detail"], "No matches found for this referee.")
 
+    def test_referee_impact_analysis_from_engine(self):
+        url = reverse('referee-impact', args=["M Clattenburg"])
+        match_engine.columns()
+        # Dataset version for the cache and the engine, then the referee's id
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["average_yellow_cards_away"], 3)
+        self.assertEqual(response.data["home_win_rate"], 100)
+
+    def test_referee_impact_leaderboard(self):
+        other = Referee.objects.create(name="H Webb")
+        for day in (2, 3):
+            Match.objects.create(
+                date=f"2024-12-0{day}", home_team=self.team2, away_team=self.team1,
+                referee=other, full_time_result="A", home_goals=0, away_goals=1,
+                season=self.season,
+            )
+        url = reverse('referee-impact-leaderboard')
+        match_engine.columns()
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual([row["referee"] for row in response.data], ["H Webb", "M Clattenburg"])
+        self.assertEqual(response.data[0]["away_win_rate"], 100)
+
+        response = self.client.get(url + "?min_matches=2&ordering=referee")
+        self.assertEqual([row["matches"] for row in response.data], [2])
+
+        response = self.client.get(url + "?to=02/12/2024&ordering=-home_win_rate&limit=1")
+        self.assertEqual(response.data[0]["referee"], "M Clattenburg")
+
+        response = self.client.get(url + "?ordering=shirt_colour")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_dynamic_league_standings_no_matches(self):
         url = reverse('dynamic-league-standings') + "?date=01/09/2024"
         response = self.client.get(url)
@@ -83,12 +192,63 @@ class LeagueAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 1)
 
+    def test_fiercest_rivalries_grouped_in_memory(self):
+        other_season = Season.objects.create(name="2023/2024", start_date="2023-08-11", end_date="2024-05-19")
+        Match.objects.create(
+            date="2023-12-01", home_team=self.team2, away_team=self.team1,
+            referee=self.referee, full_time_result="D", home_goals=0, away_goals=0,
+            season=other_season, home_yellow_cards=4, away_red_cards=1,
+        )
+        url = reverse('fiercest-rivalries')
+        match_engine.columns()
+        # Dataset version for the cache and the engine, then the team names
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["rivalry"], "Liverpool vs Man United")
+        self.assertEqual(response.data[0]["intensity_score"], 13)
+
+        response = self.client.get(url + "?season=2023/2024")
+        self.assertEqual(response.data[0]["total_yellow_cards"], 4)
+
+        response = self.client.get(url + "?from=01/01/2025")
+        self.assertEqual(response.data, [])
+
     def test_comeback_kings_limit(self):
         url = reverse('comeback-kings') + "?limit=1"
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertLessEqual(len(response.data), 1)
 
+    def test_comeback_kings_counters_and_filters(self):
+        arsenal = Team.objects.create(name="Arsenal")
+        Match.objects.create(
+            date="2024-12-08", home_team=self.team1, away_team=arsenal,
+            referee=self.referee, full_time_result="H", half_time_result="A",
+            home_goals=2, away_goals=1, season=self.season,
+        )
+        Match.objects.create(
+            date="2024-12-15", home_team=arsenal, away_team=self.team1,
+            referee=self.referee, full_time_result="A", half_time_result="H",
+            home_goals=1, away_goals=2, season=self.season,
+        )
+        url = reverse('comeback-kings')
+        response = self.client.get(url)
+        self.assertEqual(response.data, [{"team": "Liverpool", "comebacks": 2, "blown_leads": 0}])
+
+        response = self.client.get(url + "?venue=away")
+        self.assertEqual(response.data[0]["comebacks"], 1)
+
+        # The range cuts through the season, so only the first match counts
+        response = self.client.get(url + "?from=01/12/2024&to=10/12/2024")
+        self.assertEqual(response.data[0]["comebacks"], 1)
+
+        response = self.client.get(url + "?season=2023/2024")
+        self.assertEqual(response.data, [])
+
+        response = self.client.get(url + "?venue=neutral")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_dynamic_league_standings_large_dataset(self):
         for i in range(50):
             Team.objects.create(name=f"Team {i+1}")
@@ -97,6 +257,40 @@ class LeagueAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertGreaterEqual(response.data["number_of_teams"], 2)
 
+    def test_dynamic_league_standings_reads_snapshots(self):
+        url = reverse('dynamic-league-standings') + "?date=20/12/2024"
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        liverpool = response.data["standings"][0]
+        self.assertEqual((liverpool["team"], liverpool["points"], liverpool["rank"]), ("Liverpool", 3, 1))
+
+    def test_dynamic_league_standings_updated_from_added_match(self):
+        url = reverse('add-match')
+        data = {
+            "date": "2024-11-20",
+            "home_team": "Man United",
+            "away_team": "Liverpool",
+            "referee": "M Clattenburg",
+            "full_time_result": "H",
+            "home_goals": 2,
+            "away_goals": 0,
+            "season": "2024/2025",
+        }
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # The earlier match feeds into the table of every later date
+        response = self.client.get(reverse('dynamic-league-standings') + "?date=01/12/2024")
+        standings = {row["team"]: row for row in response.data["standings"]}
+        self.assertEqual(standings["Man United"]["points"], 3)
+        self.assertEqual(standings["Liverpool"]["points"], 3)
+        self.assertEqual(standings["Liverpool"]["goals_conceded"], 3)
+
+        response = self.client.get(reverse('dynamic-league-standings') + "?date=25/11/2024")
+        self.assertEqual(response.data["standings"][0]["team"], "Man United")
+        self.assertEqual(response.data["number_of_teams"], 2)
+
     def test_add_match_create_new_season(self):
         url = reverse('add-match')
         data = {
@@ -115,3 +309,816 @@ class LeagueAPITestCase(APITestCase):
         response = self.client.post(url, data, format='json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data["season"], "2025/2026")
+
+    def test_add_match_season_from_date(self):
+        match = {
+            "date": "2024-11-20", "home_team": "Man United", "away_team": "Liverpool",
+            "referee": "M Clattenburg", "full_time_result": "H", "home_goals": 2, "away_goals": 0,
+        }
+        response = self.client.post(reverse('add-match'), match, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["season"], "2024/2025")
+        response = self.client.post(reverse('add-match'), dict(match, date="2025-03-01"), format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("season", response.data)
+
+        items = [dict(match, date="2024-11-27"), dict(match, date="2025-03-01")]
+        response = self.client.post(reverse('add-match-batch'), items, format='json')
+        results = response.data["results"]
+        self.assertEqual(Match.objects.get(pk=results[0]["id"]).season, self.season)
+        self.assertEqual(list(results[1]["errors"]), ["season"])
+
+    def test_add_match_duplicate_fixture(self):
+        url = reverse('add-match')
+        data = {
+            "date": "2024-12-01",
+            "home_team": "Liverpool",
+            "away_team": "Man United",
+            "referee": "M Clattenburg",
+            "full_time_result": "D",
+            "home_goals": 1,
+            "away_goals": 1,
+            "season": "2024/2025",
+        }
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("non_field_errors", response.data)
+
+    def test_cached_response_invalidated_by_write(self):
+        url = reverse('comeback-kings')
+        first = self.client.get(url + "?limit=5&season=")
+        # Same parameters in another order hit the cache with one version read
+        with self.assertNumQueries(1):
+            cached = self.client.get(url + "?season=&limit=5")
+        self.assertEqual(cached.data, first.data)
+
+        Match.objects.create(
+            date="2024-12-08", home_team=self.team2, away_team=self.team1,
+            referee=self.referee, full_time_result="H", half_time_result="A",
+            home_goals=2, away_goals=1, season=self.season,
+        )
+        response = self.client.get(url + "?limit=5")
+        self.assertEqual(response.data[0]["team"], "Man United")
+
+    def test_conditional_get_answers_not_modified(self):
+        url = reverse('dynamic-league-standings') + "?date=20/12/2024"
+        response = self.client.get(url)
+        etag = response["ETag"]
+        # Only the dataset version is read before answering 304
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Team.objects.create(name="Arsenal")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('head-to-head-history', args=["Liverpool", "Man United"]))
+        timings = dict(part.split(";", 1) for part in response["Server-Timing"].split(", "))
+        self.assertEqual(set(timings), {"db", "view", "render", "total"})
+        self.assertIn('desc="2 queries"', timings["db"])
+
+    @override_settings(REQUEST_QUERY_BUDGET=1)
+    def test_request_over_query_budget_logged(self):
+        with self.assertLogs('league_app.requests', level='WARNING') as logs:
+            self.client.get(reverse('head-to-head-history', args=["Liverpool", "Man United"]))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual((record["view"], record["queries"], record["over_budget"]),
+                         ("head-to-head-history", 2, True))
+
+    def test_add_match_batch_reports_each_item(self):
+        match = {
+            "date": "2024-12-05", "home_team": "Man United", "away_team": "Liverpool",
+            "referee": "M Clattenburg", "full_time_result": "A", "half_time_result": "D",
+            "home_goals": 0, "away_goals": 2, "season": "2024/2025",
+        }
+        items = [
+            match,
+            dict(match),  # repeats the first fixture
+            dict(match, date="2024-12-01", home_team="Liverpool", away_team="Man United"),
+            dict(match, date="2024-12-09", home_team="Arsenal", home_goals="x"),
+            dict(match, date="2025-08-16", season="2025/2026"),
+            dict(match, date="2025-08-17", season="2025/2026", season_start_date="2025-08-01",
+                 season_end_date="2026-05-31"),
+        ]
+        response = self.client.post(reverse('add-match-batch'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data["created"], response.data["rejected"]), (2, 4))
+        results = response.data["results"]
+        self.assertEqual([item["status"] for item in results],
+                         ["created", "error", "error", "error", "error", "created"])
+        self.assertIn("already exists", results[1]["errors"]["non_field_errors"][0])
+        self.assertEqual(list(results[3]["errors"]), ["home_goals"])
+        self.assertIn("season_start_date", results[4]["errors"])
+        self.assertEqual(Match.objects.get(pk=results[0]["id"]).away_goals, 2)
+
+        # Derived tables follow the batch like single writes
+        record = self.client.get(reverse('head-to-head-history', args=["Liverpool", "Man United"]))
+        self.assertEqual((record.data["total_matches"], record.data["team1_wins"]), (3, 3))
+
+    def test_add_match_batch_integer_fields(self):
+        match = {
+            "date": "2024-12-05", "home_team": "Man United", "away_team": "Liverpool",
+            "referee": "M Clattenburg", "full_time_result": "A", "home_goals": 0, "away_goals": 2,
+        }
+        values = ["--5", "²", "1.5", True, 10 ** 23, 1e300, "-99999999999999999999", " 3 ", "2.0"]
+        items = [dict(match, home_goals=value, date=f"2024-12-{day:02}")
+                 for day, value in enumerate(values, start=10)]
+        response = self.client.post(reverse('add-match-batch'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        for result in results[:4]:
+            self.assertEqual(result["errors"], {"home_goals": ["A valid integer is required."]})
+        for result in results[4:6]:
+            self.assertEqual(result["errors"], {"home_goals": [
+                "Ensure this value is less than or equal to 9223372036854775807."]})
+        self.assertEqual(results[6]["errors"], {"home_goals": [
+            "Ensure this value is greater than or equal to -9223372036854775808."]})
+        self.assertEqual([Match.objects.get(pk=result["id"]).home_goals for result in results[7:]], [3, 2])
+
+    def test_add_match_batch_ndjson(self):
+        lines = [
+            '{"date": "2024-12-07", "home_team": "Liverpool", "away_team": "Everton", '
+            '"referee": "M Clattenburg", "full_time_result": "H", "home_goals": 2, '
+            '"away_goals": 0, "season": "2024/2025"}',
+            'not json',
+        ]
+        response = self.client.generic(
+            'POST', reverse('add-match-batch'), "\n".join(lines) + "\n",
+            content_type='application/x-ndjson',
+        )
+        self.assertEqual([item["status"] for item in response.data["results"]], ["created", "error"])
+        self.assertTrue(Team.objects.filter(name="Everton").exists())
+
+        response = self.client.post(reverse('add-match-batch'), {"date": "2024-12-07"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_metrics_exposition(self):
+        url = reverse('fiercest-rivalries')
+        self.client.get(url)
+        self.client.get(url)
+        self.client.post(reverse('add-match'), {"home_team": "Liverpool"}, format='json')
+        body = self.client.get(reverse('metrics')).content.decode()
+
+        def sample(line_start):
+            lines = [line for line in body.splitlines() if line.startswith(line_start)]
+            return float(lines[0].rsplit(" ", 1)[1]) if lines else 0
+
+        self.assertGreaterEqual(sample(
+            'league_http_requests_total{method="GET",status="200",view="fiercest-rivalries"}'), 2)
+        self.assertGreaterEqual(sample(
+            'league_http_request_duration_seconds_count{view="fiercest-rivalries"}'), 2)
+        self.assertGreaterEqual(sample('league_response_cache_total{result="hit"}'), 1)
+        self.assertGreaterEqual(sample(
+            'league_ingested_matches_total{outcome="rejected",source="add_match"}'), 1)
+
+    def test_search_teams_served_from_index(self):
+        url = reverse('search-teams')
+        response = self.client.get(url, {'search': 'liverpol'})
+        self.assertEqual(response.json()["results"][0], "Liverpool")
+        # Later keystrokes are answered without touching the database
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'search': 'man utd', 'limit': 1})
+        self.assertEqual(response.json()["results"], ["Man United"])
+
+    def test_search_index_sees_new_team(self):
+        url = reverse('search-teams')
+        self.client.get(url, {'search': 'arsenal'})
+        Team.objects.create(name="Arsenal")
+        response = self.client.get(url, {'search': 'arsenal'})
+        self.assertIn("Arsenal", response.json()["results"])
+        response = self.client.get(url, {'search': 'arsenal', 'limit': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_search_score_cutoff_bounds(self):
+        url = reverse('search-teams')
+        response = self.client.get(url, {'search': 'ars', 'score_cutoff': 0})
+        self.assertEqual(sorted(response.json()["results"]), ["Liverpool", "Man United"])
+        response = self.client.get(url, {'search': 'liverpool', 'score_cutoff': 100})
+        self.assertEqual(response.json()["results"], ["Liverpool"])
+        response = self.client.get(url, {'search': 'liverpol', 'score_cutoff': 100})
+        self.assertEqual(response.json()["results"], [])
+        for cutoff in ('-5', '200', 'nan', 'inf'):
+            response = self.client.get(url, {'search': 'ars', 'score_cutoff': cutoff})
+            self.assertEqual(response.status_code, 400, cutoff)
+
+    def test_search_referees_relevance(self):
+        for name in ["M Dean", "Andy D'Urso", "Mike Dean", "Dermot Gallagher", "Andy Hall",
+                     "M. L. Dean", "David Ellaray", "D England", "Dean, M. L", "M Riley",
+                     "C Pawson", "C. R. Wilkes", "C. J. Foy"]:
+            Referee.objects.create(name=name)
+        url = reverse('search-referees')
+        # What the fuzzywuzzy search returned for these names
+        expected = {
+            "dean": ["M Dean", "Mike Dean", "M. L. Dean", "Dean, M. L", "D England"],
+            "c paws": ["C Pawson", "C. R. Wilkes", "C. J. Foy"],
+            "D Ell": ["David Ellaray", "Andy D'Urso", "D England"],
+            "andy": ["Andy D'Urso", "Andy Hall", "D England"],
+        }
+        for query, names in expected.items():
+            response = self.client.get(url, {'search': query})
+            self.assertEqual(response.json()["results"], names, query)
+        # The same with the names pruned to those sharing a bigram with the query
+        with mock.patch.object(search, 'PRUNE_MIN_NAMES', 0):
+            for query, names in expected.items():
+                self.assertEqual(referee_index.search(query.lower()), names, query)
+
+
+class QueryPlanTestCase(APITestCase):
+    ENDPOINTS = [
+        "/api/teams/Liverpool/vs/Chelsea/history/",
+        "/api/referees/M%20Dean/impact/",
+        "/api/referees/M%20Dean/impact/?season=2024/2025",
+        "/api/referees/impact/",
+        "/api/referees/impact/?season=2024/2025",
+        "/api/standings/?date=20/12/2024",
+        "/api/rivalries/",
+        "/api/rivalries/?season=2024/2025",
+        "/api/rivalries/?from=01/10/2024&to=01/12/2024",
+        "/api/teams/comebacks/",
+        "/api/teams/comebacks/?season=2024/2025&from=01/10/2024",
+    ]
+
+    def setUp(self):
+        season = Season.objects.create(name="2024/2025", start_date="2024-08-16", end_date="2025-05-25")
+        referee = Referee.objects.create(name="M Dean")
+        teams = [Team.objects.create(name=name) for name in ("Liverpool", "Chelsea", "Everton")]
+        for day, (home, away) in enumerate([(0, 1), (1, 2), (2, 0), (1, 0)], start=1):
+            Match.objects.create(
+                date=f"2024-11-0{day}", home_team=teams[home], away_team=teams[away],
+                referee=referee, full_time_result="H", half_time_result="A",
+                home_goals=2, away_goals=1, season=season, home_yellow_cards=day,
+            )
+        # Loading the engine reads the whole table, by design, once per change
+        match_engine.columns()
+
+    def query_plans(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+        plans = []
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                cursor.execute("EXPLAIN QUERY PLAN " + query["sql"])
+                plans.extend(row[3] for row in cursor.fetchall())
+        return plans
+
+    def test_endpoint_queries_use_indexes(self):
+        for url in self.ENDPOINTS:
+            for step in self.query_plans(url):
+                # "SCAN <table>" alone is a full table scan; index scans name the index
+                self.assertFalse(
+                    step.startswith("SCAN ") and " USING " not in step, f"{url}: {step}"
+                )
+
+    def test_engine_endpoints_do_not_read_matches(self):
+        for url in ("/api/rivalries/", "/api/referees/impact/", "/api/referees/M%20Dean/impact/"):
+            plans = self.query_plans(url)
+            self.assertFalse([step for step in plans if "league_app_match" in step], url)
+
+
+class ListPaginationTestCase(APITestCase):
+    LISTS = ["/api/rivalries/", "/api/teams/comebacks/"]
+    setUp = QueryPlanTestCase.setUp
+
+    def test_pages_follow_cursor_through_full_list(self):
+        for url in self.LISTS:
+            full = self.client.get(url).json()
+            rows, next_url, pages = [], f"{url}?page_size=2", 0
+            while next_url:
+                page = self.client.get(next_url).json()
+                rows += page["results"]
+                next_url, pages = page["next"], pages + 1
+            with self.subTest(url=url):
+                self.assertEqual(rows, full)
+                self.assertEqual(pages, 2)
+                response = self.client.get(f"{url}?page_size=2&cursor=bm9wZQ")
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_stream_sends_same_array(self):
+        for url in self.LISTS:
+            expected = self.client.get(url).content
+            for _ in range(2):  # the second is not served from the cache either
+                response = self.client.get(f"{url}?stream=1")
+                with self.subTest(url=url):
+                    self.assertTrue(response.streaming)
+                    self.assertEqual(b"".join(response.streaming_content), expected)
+
+
+@unittest.skipUnless(msgpack and pyarrow, "msgpack and pyarrow are optional")
+class ContentNegotiationTestCase(APITestCase):
+    setUp = QueryPlanTestCase.setUp
+
+    def test_bulk_formats_carry_the_json_rows(self):
+        url = "/api/rivalries/"
+        rows = self.client.get(url).json()
+        columns = {field: [row[field] for row in rows] for field in rows[0]}
+
+        packed = self.client.get(url, HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(msgpack.unpackb(packed.content), columns)
+        table = self.client.get(url, {"format": "arrow"})
+        self.assertEqual(pyarrow.ipc.open_stream(table.content).read_all().to_pylist(), rows)
+        text = self.client.get(url, HTTP_ACCEPT="text/csv").content.decode()
+        self.assertEqual(list(csv.DictReader(io.StringIO(text))),
+                         [{field: str(value) for field, value in row.items()} for row in rows])
+
+        self.assertIn("Accept", packed["Vary"])
+        self.assertNotEqual(packed["ETag"], self.client.get(url)["ETag"])
+
+    def test_tables_flatten_objects_and_link_next_page(self):
+        standings = self.client.get("/api/standings/?date=20/12/2024").json()
+        response = self.client.get("/api/standings/?date=20/12/2024&format=arrow")
+        first = pyarrow.ipc.open_stream(response.content).read_all().to_pylist()[0]
+        self.assertEqual((first["season_name"], first["team"], first["rank"]),
+                         (standings["season_name"], standings["standings"][0]["team"], 1))
+
+        response = self.client.get("/api/rivalries/?page_size=2", HTTP_ACCEPT="text/csv")
+        self.assertEqual(response.content.decode().count("\r\n"), 3)
+        self.assertIn('rel="next"', response["Link"])
+
+
+class MatchExportTestCase(APITestCase):
+    def setUp(self):
+        QueryPlanTestCase.setUp(self)
+        Match.objects.filter(date="2024-11-04").update(referee=None)
+
+    def export(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, url)
+        return b''.join(response.streaming_content)
+
+    def test_formats_carry_every_match(self):
+        rows = [json.loads(line) for line in self.export("/api/matches/export/").splitlines()]
+        self.assertEqual([row["id"] for row in rows], list(Match.objects.order_by('id').values_list('id', flat=True)))
+        self.assertEqual((rows[0]["home_team"], rows[0]["season"], rows[0]["date"]),
+                         ("Liverpool", "2024/2025", "2024-11-01"))
+        self.assertIsNone(rows[-1]["referee"])
+
+        text = self.export("/api/matches/export/?format=csv").decode()
+        self.assertEqual(list(csv.DictReader(io.StringIO(text))),
+                         [{field: "" if value is None else str(value) for field, value in row.items()}
+                          for row in rows])
+        if pyarrow:
+            table = pyarrow.parquet.read_table(pyarrow.BufferReader(self.export("/api/matches/export/?format=parquet")))
+            self.assertEqual([{**row, "date": row["date"].isoformat()} for row in table.to_pylist()], rows)
+
+    def test_filters_and_chunks(self):
+        def ids(query):
+            return [json.loads(line)["id"] for line in self.export("/api/matches/export/?" + query).splitlines()]
+
+        everton = list(Match.objects.filter(date__in=["2024-11-02", "2024-11-03"]).values_list('id', flat=True))
+        self.assertEqual(ids("team=Everton"), everton)
+        self.assertEqual(len(ids("referee=M%20Dean&from=02/11/2024")), 2)
+        self.assertEqual(ids("season=2023/2024"), [])
+        self.assertEqual(self.client.get("/api/matches/export/?to=2024-11-01").status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+        # One query per chunk, each resuming after the last one's final id
+        with self.assertNumQueries(3):
+            chunks = list(match_chunks(export_matches(), chunk_rows=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2])
+        self.assertEqual(sum(chunks, []), list(export_matches()))
+
+    def test_async_export_matches_sync_export(self):
+        async def export(url):
+            response = await self.async_client.get(url)
+            return b''.join([chunk async for chunk in response.streaming_content])
+
+        url = "/api/matches/export/?format=csv&team=Chelsea"
+        expected = self.export(url)
+        with self.settings(ROOT_URLCONF=ASYNC_URLCONF):
+            self.assertEqual(async_to_sync(export)(url), expected)
+
+
+class AsyncViewsTestCase(TestCase):
+    ENDPOINTS = QueryPlanTestCase.ENDPOINTS + [
+        "/api/referees/impact/?ordering=-home_win_rate&min_matches=2",
+        "/api/referees/Nobody/impact/",
+        "/api/standings/?date=01/01/2030",
+        "/api/rivalries/?limit=x",
+        "/api/teams/comebacks/?venue=away&limit=1",
+        "/api/teams/search/?search=liverpol",
+        "/api/rivalries/?page_size=2",
+        "/api/teams/comebacks/?page_size=1",
+        "/api/standings/?date=20/12/2024&format=csv",
+    ]
+    setUp = QueryPlanTestCase.setUp
+
+    def test_async_views_match_sync_views(self):
+        async def get(url):
+            return await self.async_client.get(url)
+
+        for url in self.ENDPOINTS:
+            response_cache().clear()
+            expected = self.client.get(url)
+            response_cache().clear()
+            with self.settings(ROOT_URLCONF=ASYNC_URLCONF):
+                response = async_to_sync(get)(url)
+            with self.subTest(url=url):
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(response.content, expected.content)
+
+    @override_settings(ROOT_URLCONF=ASYNC_URLCONF)
+    async def test_async_views_timed_and_read_only(self):
+        response = await self.async_client.get("/api/teams/Liverpool/vs/Chelsea/history/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Queries of the async ORM run on another thread and are still counted
+        self.assertIn('desc="2 queries"', response["Server-Timing"])
+
+        client = AsyncClient(enforce_csrf_checks=True)
+        response = await client.post("/api/standings/?date=20/12/2024")
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class SeasonDateIndexTestCase(TestCase):
+    def setUp(self):
+        for name, start, end in [("2022/2023", "2022-08-05", "2023-05-28"),
+                                 ("2023/2024", "2023-08-11", "2024-05-19"),
+                                 ("Cup 2023", "2023-06-01", "2023-09-30")]:
+            Season.objects.create(name=name, start_date=start, end_date=end)
+
+    def name_on(self, day, version=None):
+        season = season_date_index.season_for(date.fromisoformat(day), version)
+        return season and season.name
+
+    def test_lookup_by_interval(self):
+        self.assertEqual(self.name_on("2022-08-05"), "2022/2023")
+        self.assertEqual(self.name_on("2023-05-28"), "2022/2023")
+        self.assertIsNone(self.name_on("2023-05-29"))
+        self.assertIsNone(self.name_on("2022-01-01"))
+        # Overlapping seasons: the one starting last, then the one reaching past it
+        self.assertEqual(self.name_on("2023-09-01"), "2023/2024")
+        self.assertEqual(self.name_on("2023-07-01"), "Cup 2023")
+        self.assertEqual(self.name_on("2023-10-01"), "2023/2024")
+
+    def test_refreshed_when_seasons_change(self):
+        version = current_version()
+        self.assertIsNone(self.name_on("2024-09-01", version))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.name_on("2024-01-01", version), "2023/2024")
+
+        Season.objects.create(name="2024/2025", start_date="2024-08-16", end_date="2025-05-25")
+        self.assertEqual(self.name_on("2024-09-01"), "2024/2025")
+        Season.objects.filter(name="2024/2025").update(start_date="2024-09-02")
+        # An update the signals miss still shows through the dataset version
+        bump_version()
+        self.assertIsNone(self.name_on("2024-09-01", current_version()))
+
+
+class MatchEngineTestCase(TransactionTestCase):
+    def setUp(self):
+        self.season = Season.objects.create(name="2024/2025", start_date="2024-08-16", end_date="2025-05-25")
+        self.referee = Referee.objects.create(name="M Dean")
+        self.teams = [Team.objects.create(name=name) for name in ("Liverpool", "Chelsea", "Everton")]
+
+    def add_match(self, day, home, away, **fields):
+        return Match.objects.create(
+            date=date(2024, 11, day), home_team=self.teams[home], away_team=self.teams[away],
+            referee=self.referee, full_time_result="H", home_goals=1, away_goals=0,
+            season=self.season, **fields,
+        )
+
+    def test_engine_appends_new_matches_and_reloads_on_rewrites(self):
+        engine = MatchEngine()
+        first = self.add_match(1, 0, 1, home_yellow_cards=2)
+        self.assertEqual(len(engine.columns()), 1)
+
+        self.add_match(2, 1, 2)
+        with CaptureQueriesContext(connection) as queries:
+            columns = engine.columns()
+        self.assertEqual(len(columns), 2)
+        # Dataset version, the rows after the last id read, and a count check
+        self.assertEqual(len(queries.captured_queries), 3)
+        self.assertIn('"id" > ', queries.captured_queries[1]["sql"])
+
+        first.home_yellow_cards = 5
+        first.save()
+        self.assertEqual(engine.columns().column('home_yellow').tolist(), [5, 0])
+        first.delete()
+        self.assertEqual(len(engine.columns()), 1)
+        with self.assertNumQueries(1):
+            engine.columns()
+
+    def test_engine_loads_from_snapshot(self):
+        self.add_match(1, 0, 1, home_yellow_cards=2)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "league.snapshot")
+            _, matches = write_snapshot(path)
+            self.assertEqual(matches, 1)
+            snapshot = open_snapshot(path)
+            self.assertEqual(snapshot.table('team').names(), {team.id: team.name for team in self.teams})
+
+            engine = MatchEngine(snapshot_path=path)
+            # Only the dataset version; the matches and names come from the mapped file
+            with self.assertNumQueries(1):
+                columns = engine.columns()
+                names, rest = columns.names('team', [self.teams[2].id, self.teams[0].id])
+            self.assertEqual(names, {self.teams[0].id: "Liverpool", self.teams[2].id: "Everton"})
+            self.assertIsNone(rest)
+            self.assertEqual(columns.column('home_yellow').tolist(), [2])
+            self.assertFalse(columns.column('home_yellow').flags.writeable)
+            mapped = columns.parts[0]
+
+            # Later matches are read from the database and kept beside the
+            # mapped arrays, which are not copied
+            self.add_match(2, 1, 2)
+            columns = engine.columns()
+            self.assertEqual(columns.column('home').tolist(), [self.teams[0].id, self.teams[1].id])
+            self.assertIs(columns.parts[0], mapped)
+            self.assertFalse(columns.parts[0]['home'].flags.writeable)
+            self.assertEqual(len(columns.parts[1]['home']), 1)
+            self.assertEqual(rank_rivalries(columns, match_mask(columns)).rows(),
+                             [(self.teams[0].id, self.teams[1].id, 2, 0),
+                              (self.teams[1].id, self.teams[2].id, 0, 0)])
+
+            # Teams created since the snapshot are read from the database
+            team = Team.objects.create(name="Fulham")
+            names, rest = engine.columns().names('team', [team.id, self.teams[1].id])
+            self.assertEqual(names, {self.teams[1].id: "Chelsea"})
+            self.assertEqual(list(rest), [(team.id, "Fulham")])
+            # and a rename reloads the columns without the stale table
+            team.name = "Fulham FC"
+            team.save()
+            self.assertEqual(engine.columns().names('team', [team.id])[0], {})
+
+            write_snapshot(path)
+            self.assertFalse(engine.columns().column('home').flags.writeable)
+            self.assertEqual(engine.columns().names('team', [team.id])[0], {team.id: "Fulham FC"})
+
+            with open(path, 'wb') as f:
+                f.write(b"not a snapshot")
+            self.assertIsNone(open_snapshot(path))
+
+    def test_engine_aggregates_match_database(self):
+        load_synthetic(SyntheticLeague(teams=6, seasons=2, referees=4, seed=3))
+        columns = match_engine.columns()
+        season_ids = list(Season.objects.filter(name="2001/2002").values_list('id', flat=True))
+        mask = match_mask(columns, season_ids=season_ids)
+        matches = list(Match.objects.filter(season_id__in=season_ids).values_list(
+            'home_team_id', 'away_team_id', 'referee_id', 'full_time_result',
+            'home_yellow_cards', 'away_yellow_cards', 'home_red_cards', 'away_red_cards',
+        ))
+
+        pairs = {}
+        for home, away, _, _, home_yellow, away_yellow, home_red, away_red in matches:
+            totals = pairs.setdefault((min(home, away), max(home, away)), [0, 0])
+            totals[0] += home_yellow + away_yellow
+            totals[1] += home_red + away_red
+        expected = sorted(((low, high, yellows, reds) for (low, high), (yellows, reds) in pairs.items()),
+                          key=lambda row: (-(row[2] + 2 * row[3]), row[0], row[1]))
+        self.assertEqual(rank_rivalries(columns, mask).rows(), expected)
+
+        impact = referee_impact(columns, mask)
+        for referee_id, totals in impact.items():
+            refereed = [match for match in matches if match[2] == referee_id]
+            self.assertEqual(totals["matches"], len(refereed))
+            self.assertAlmostEqual(totals["average_yellow_cards_home"],
+                                   sum(match[4] for match in refereed) / len(refereed))
+            self.assertAlmostEqual(totals["draw_rate"],
+                                   sum(match[3] == 'D' for match in refereed) * 100 / len(refereed))
+        self.assertEqual(sum(totals["matches"] for totals in impact.values()), len(matches))
+
+
+class BulkIngestionTestCase(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write_csv(self, name, lines):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'w') as f:
+            f.write(CSV_HEADER + "".join(line + "\n" for line in lines))
+        return path
+
+    def test_ingest_creates_then_updates(self):
+        path = self.write_csv("season_2425.csv", [
+            "16/08/24,Man United,Fulham,1,0,H,0,0,D,R Jones,14,10,5,2,12,10,7,8,2,3,0,0",
+            "17/08/24,Ipswich,Liverpool,0,2,A,0,0,D,T Robinson,7,18,2,5,9,18,2,10,3,1,0,0",
+            "17/08/24,,Liverpool,0,2,A,0,0,D,T Robinson,7,18,2,5,9,18,2,10,3,1,0,0",
+        ])
+        report = ingest_files([path])
+        self.assertEqual((report.created, report.updated, report.skipped), (2, 0, 1))
+        self.assertEqual(Team.objects.count(), 4)
+
+        season = Season.objects.get(name="2024/2025")
+        self.assertEqual(str(season.start_date), "2024-08-16")
+        self.assertEqual(str(season.end_date), "2024-08-17")
+
+        report = ingest_files([path], incremental=False)
+        self.assertEqual((report.created, report.updated, report.skipped), (0, 2, 1))
+        self.assertEqual(Match.objects.count(), 2)
+
+    def test_ingest_blank_referee_and_half_time(self):
+        path = self.write_csv("season_9394.csv", [
+            "14/08/93,Arsenal,Coventry,0,3,A,,,,,,,,,,,,,,,,",
+        ])
+        ingest_files([path])
+        match = Match.objects.get()
+        self.assertEqual(match.referee.name, "Unknown Referee")
+        self.assertIsNone(match.half_time_result)
+        self.assertEqual(match.season.name, "1993/1994")
+
+    def test_incremental_ingest_skips_unchanged_and_reads_appended_rows(self):
+        path = self.write_csv("season_2425.csv", [
+            "16/08/24,Man United,Fulham,1,0,H,0,0,D,R Jones,14,10,5,2,12,10,7,8,2,3,0,0",
+        ])
+        ingest_files([path])
+
+        report = ingest_files([path])
+        self.assertEqual(report.unchanged_files, 1)
+        self.assertEqual((report.created, report.updated), (0, 0))
+
+        with open(path, 'a') as f:
+            f.write("17/08/24,Ipswich,Liverpool,0,2,A,0,0,D,T Robinson,7,18,2,5,9,18,2,10,3,1,0,0\n")
+        report = ingest_files([path])
+        self.assertEqual((report.created, report.updated), (1, 0))
+
+        entry = IngestionManifest.objects.get(filename="season_2425.csv")
+        self.assertEqual((entry.row_count, entry.rows_ingested), (2, 2))
+        self.assertEqual(str(Season.objects.get().end_date), "2024-08-17")
+
+    def test_incremental_ingest_rereads_rewritten_file(self):
+        path = self.write_csv("season_2425.csv", [
+            "16/08/24,Man United,Fulham,1,0,H,0,0,D,R Jones,14,10,5,2,12,10,7,8,2,3,0,0",
+        ])
+        ingest_files([path])
+        self.write_csv("season_2425.csv", [
+            "16/08/24,Man United,Fulham,2,0,H,0,0,D,R Jones,14,10,5,2,12,10,7,8,2,3,0,0",
+            "17/08/24,Ipswich,Liverpool,0,2,A,0,0,D,T Robinson,7,18,2,5,9,18,2,10,3,1,0,0",
+        ])
+        report = ingest_files([path])
+        self.assertEqual((report.created, report.updated), (1, 1))
+        self.assertEqual(Match.objects.get(home_team__name="Man United").home_goals, 2)
+
+    def test_parallel_ingest_matches_serial_state(self):
+        paths = [
+            self.write_csv("season_2324.csv", [
+                "11/08/23,Burnley,Man City,0,3,A,0,2,A,C Pawson,6,17,1,8,11,8,6,5,0,0,1,0",
+                "12/08/23,Arsenal,Nott'm Forest,2,1,H,2,0,H,M Oliver,15,6,7,2,12,12,8,3,2,2,0,0",
+            ]),
+            self.write_csv("season_2425.csv", [
+                "16/08/24,Man United,Fulham,1,0,H,0,0,D,R Jones,14,10,5,2,12,10,7,8,2,3,0,0",
+                "17/08/24,Ipswich,Liverpool,0,2,A,0,0,D,T Robinson,7,18,2,5,9,18,2,10,3,1,0,0",
+            ]),
+            self.write_csv("season_bad.csv", ["not,a,season"]),
+        ]
+        fields = ('date', 'home_team__name', 'away_team__name', 'referee__name', 'season__name', 'home_goals')
+
+        serial = ingest_files(paths, incremental=False)
+        serial_state = list(Match.objects.order_by('date', 'home_team__name').values_list(*fields))
+        Match.objects.all().delete()
+        Season.objects.all().delete()
+
+        parallel = ingest_files(paths, incremental=False, workers=2)
+        parallel_state = list(Match.objects.order_by('date', 'home_team__name').values_list(*fields))
+
+        self.assertEqual(serial.as_dict(), parallel.as_dict())
+        self.assertEqual(serial_state, parallel_state)
+        self.assertEqual(len(parallel_state), 4)
+
+    def test_parse_match_date_variants(self):
+        self.assertEqual(str(parse_match_date("14/08/93")), "1993-08-14")
+        self.assertEqual(str(parse_match_date("16/08/24")), "2024-08-16")
+        self.assertEqual(str(parse_match_date("16/08/2024")), "2024-08-16")
+        with self.assertRaises(ValueError):
+            parse_match_date("2024-08-16")
+
+    def test_stream_ingest_skips_bad_numbers(self):
+        path = self.write_csv("huge.csv", [
+            "Date,HomeTeam,AwayTeam,FTHG,FTAG,FTR,HTR,Referee,HY,AY,HR,AR",
+            "16/08/2024,Man United,Fulham,1.0,0,H,D,R Jones,9007199254740993,3,0,0",
+            "17/08/2024,Ipswich,Liverpool,inf,2,A,D,T Robinson,3,1,0,0",
+            "17/08/2024,Arsenal,Wolves,2,1e30,H,H,J Gillett,2,2,0,0",
+            "17/08/2024,Everton,Brighton,0,3,A,D,S Hooper,9223372036854775808,1,0,0",
+            "17/08/2024,Newcastle,Southampton,2.7,0,H,D,C Pawson,1,1,0,0",
+            "18/08/2024,Chelsea,Man City,0,2,A,A,A Taylor,1,1,0,0",
+        ])
+        report = ingest_stream(path, batch_size=1)
+        self.assertEqual((report.created, report.skipped), (2, 4))
+        match = Match.objects.get(home_team__name="Man United")
+        # Parsed as an integer, not rounded through a float
+        self.assertEqual((match.home_goals, match.home_yellow_cards), (1, 9007199254740993))
+
+    def test_stream_ingest_concatenated_seasons(self):
+        path = self.write_csv("feed.csv", [
+            "14/08/93,Arsenal,Coventry,0,3,A,,,,,,,,,,,,,,,,",
+            "Date,HomeTeam,AwayTeam,FTHG,FTAG,FTR,HTR,Referee,HY,AY,HR,AR",
+            "16/08/2024,Man United,Fulham,1,0,H,D,R Jones,2,3,0,0",
+            "17/08/2024,Ipswich,Liverpool,0,2,A,D,T Robinson,3,1,0,0",
+            "bad date,Ipswich,Liverpool,0,2,A,D,T Robinson,3,1,0,0",
+        ])
+        report = ingest_stream(path, batch_size=2)
+        self.assertEqual((report.created, report.updated, report.skipped), (3, 0, 1))
+        self.assertEqual(
+            sorted(Season.objects.values_list('name', flat=True)), ["1993/1994", "2024/2025"]
+        )
+        self.assertEqual(Match.objects.get(home_team__name="Ipswich").away_yellow_cards, 1)
+        self.assertEqual(ingest_stream(path).unchanged_files, 1)
+
+
+class ImportJobTestCase(APITestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        settings_override = override_settings(IMPORT_UPLOAD_DIR=self.tmpdir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_uploaded_csv_is_imported_by_worker(self):
+        upload = SimpleUploadedFile("season_2425.csv", (CSV_HEADER + (
+            "16/08/24,Man United,Fulham,1,0,H,0,0,D,R Jones,14,10,5,2,12,10,7,8,2,3,0,0\n"
+            "17/08/24,Ipswich,Liverpool,0,2,A,0,0,D,T Robinson,7,18,2,5,9,18,2,10,3,1,0,0\n"
+            "17/08/24,,Liverpool,0,2,A,0,0,D,T Robinson,7,18,2,5,9,18,2,10,3,1,0,0\n"
+        )).encode(), content_type='text/csv')
+        response = self.client.post(reverse('import-upload'), {"file": upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data["status"], "queued")
+        self.assertEqual(response["Location"], reverse('import-progress', args=[response.data["id"]]))
+        # Nothing is imported until the worker runs
+        self.assertFalse(Match.objects.exists())
+
+        self.assertEqual(run_pending_jobs(batch_size=1), 1)
+        progress = self.client.get(response["Location"]).data
+        self.assertEqual(progress["status"], "succeeded")
+        self.assertEqual((progress["rows_read"], progress["created"], progress["error_count"]), (3, 2, 1))
+        self.assertEqual(progress["errors"], [{"row": 3, "error": "missing team names"}])
+        self.assertGreater(progress["rows_per_second"], 0)
+        self.assertEqual(Match.objects.count(), 2)
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
+
+    def test_import_rejects_non_csv_and_reports_failures(self):
+        response = self.client.post(reverse('import-upload'), "not,a,season\n", content_type='text/csv')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
+
+        response = self.client.post(reverse('import-upload') + "?filename=feed.csv", CSV_HEADER,
+                                    content_type='text/csv')
+        job = ImportJob.objects.get(pk=response.data["id"])
+        self.assertEqual(job.filename, "feed.csv")
+        os.remove(job.path)
+        run_pending_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.FAILED)
+        self.assertIn("No such file", job.failure)
+        self.assertIsNone(claim_job())
+
+        response = self.client.get(reverse('import-progress', args=[job.pk + 1]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_failed_job_refreshes_derived_tables_for_committed_batches(self):
+        response = self.client.post(reverse('import-upload') + "?filename=feed.csv", CSV_HEADER + (
+            "16/08/24,Man United,Fulham,1,0,H,0,0,D,R Jones,14,10,5,2,12,10,7,8,2,3,0,0\n"
+            "17/08/24,Ipswich,Liverpool,0,2,A,0,0,D,T Robinson,7,18,2,5,9,18,2,10,3,1,0,0\n"
+            "17/08/24,Arsenal,Wolves,2,0,H,1,0,H,J Gillett,18,9,6,3,17,14,8,2,2,2,0,0\n"
+        ), content_type='text/csv')
+        version = current_version()[0]
+        upsert_rows = ingestion.upsert_rows
+        calls = []
+
+        def fail_third_batch(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 3:
+                raise RuntimeError("disk full")
+            return upsert_rows(*args, **kwargs)
+
+        with mock.patch.object(ingestion, 'upsert_rows', fail_third_batch):
+            run_pending_jobs(batch_size=1)
+        job = ImportJob.objects.get(pk=response.data["id"])
+        self.assertEqual((job.status, job.failure, job.created), (ImportJob.FAILED, "disk full", 2))
+        self.assertEqual(Match.objects.count(), 2)
+        self.assertEqual(StandingSnapshot.objects.count(), 6)
+        self.assertEqual(HeadToHead.objects.count(), 2)
+        self.assertGreater(current_version()[0], version + 2)
+
+
+class BenchmarkTestCase(TestCase):
+    def test_synthetic_csv_matches_direct_load(self):
+        league = SyntheticLeague(teams=5, seasons=2, referees=3, seed=7)
+        fields = ('date', 'home_team__name', 'away_team__name', 'referee__name',
+                  'full_time_result', 'half_time_result', 'home_goals', 'away_goals')
+        report = load_synthetic(league)
+        self.assertEqual(report.created, 2 * league.matches_per_season)
+        loaded = list(Match.objects.order_by('date', 'home_team__name').values_list(*fields))
+
+        Match.objects.all().delete()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "synthetic.csv")
+            self.assertEqual(league.write_csv(path), 40)
+            ingest_stream(path)
+        streamed = list(Match.objects.order_by('date', 'home_team__name').values_list(*fields))
+        self.assertEqual(loaded, streamed)
+
+    def test_run_benchmark_covers_every_view(self):
+        load_synthetic(SyntheticLeague(teams=4, seasons=1, referees=2))
+        results = run_benchmark(iterations=2)
+        self.assertEqual(len(results["endpoints"]), 15)
+        for name, result in results["endpoints"].items():
+            self.assertIn(result["cold"]["status_codes"], ([200], [201]), name)
+            self.assertLessEqual(result["cold"]["p50_ms"], result["cold"]["p99_ms"])
+        # The add-match writes are rolled back
+        self.assertEqual(results["dataset"]["matches"], 12)
+        self.assertEqual(Match.objects.count(), 12)
@@ -1,26 +1,63 @@
 # league_app/urls.py
 
+from django.conf import settings
 from django.urls import path
 from .views import (
     HeadToHeadHistory,
     RefereeImpactAnalysis,
+    RefereeImpactLeaderboard,
     DynamicLeagueStandings,
     FiercestRivalries,
     ComebackKings,
+    MatchExport,
     AddMatchRecord,
+    AddMatchBatch,
+    ImportUpload,
+    ImportProgress,
     search_teams,
     search_referees,
     search_seasons,
+    async_head_to_head_history,
+    async_referee_impact,
+    async_referee_impact_leaderboard,
+    async_league_standings,
+    async_fiercest_rivalries,
+    async_comeback_kings,
+    async_export_matches,
+    async_search_teams,
+    async_search_referees,
+    async_search_seasons,
 )
 
-urlpatterns = [
-    path('teams/search/', search_teams, name='search-teams'),
-    path('referees/search/', search_referees, name='search-referees'),
-    path('season/search/', search_seasons, name='search-seasons'),
-    path('teams/<str:team1>/vs/<str:team2>/history/', HeadToHeadHistory.as_view(), name='head-to-head-history'),
-    path('referees/<str:referee>/impact/', RefereeImpactAnalysis.as_view(), name='referee-impact'),
-    path('standings/', DynamicLeagueStandings.as_view(), name='dynamic-league-standings'),
-    path('rivalries/', FiercestRivalries.as_view(), name='fiercest-rivalries'),
-    path('teams/comebacks/', ComebackKings.as_view(), name='comeback-kings'),
-    path('add-match/', AddMatchRecord.as_view(), name='add-match'),
-]
+
+def api_patterns(async_views=False):
+    """
+    The API routes. With async_views the read-only endpoints are served by
+    their async versions, which is what the ASGI deployment runs.
+    """
+    def read(sync_view, async_view):
+        return async_view if async_views else sync_view
+
+    return [
+        path('teams/search/', read(search_teams, async_search_teams), name='search-teams'),
+        path('referees/search/', read(search_referees, async_search_referees), name='search-referees'),
+        path('season/search/', read(search_seasons, async_search_seasons), name='search-seasons'),
+        path('teams/<str:team1>/vs/<str:team2>/history/',
+             read(HeadToHeadHistory.as_view(), async_head_to_head_history), name='head-to-head-history'),
+        path('referees/impact/', read(RefereeImpactLeaderboard.as_view(), async_referee_impact_leaderboard),
+             name='referee-impact-leaderboard'),
+        path('referees/<str:referee>/impact/', read(RefereeImpactAnalysis.as_view(), async_referee_impact),
+             name='referee-impact'),
+        path('standings/', read(DynamicLeagueStandings.as_view(), async_league_standings),
+             name='dynamic-league-standings'),
+        path('rivalries/', read(FiercestRivalries.as_view(), async_fiercest_rivalries), name='fiercest-rivalries'),
+        path('teams/comebacks/', read(ComebackKings.as_view(), async_comeback_kings), name='comeback-kings'),
+        path('matches/export/', read(MatchExport.as_view(), async_export_matches), name='match-export'),
+        path('add-match/', AddMatchRecord.as_view(), name='add-match'),
+        path('add-match/batch/', AddMatchBatch.as_view(), name='add-match-batch'),
+        path('imports/', ImportUpload.as_view(), name='import-upload'),
+        path('imports/<int:job_id>/', ImportProgress.as_view(), name='import-progress'),
+    ]
+
+
+urlpatterns = api_patterns(getattr(settings, 'ASYNC_VIEWS', False))
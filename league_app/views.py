@@ -3,396 +3,830 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Q, Sum, Avg
-from django.http import JsonResponse
+from rest_framework.exceptions import NotAcceptable, ValidationError
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
-from collections import defaultdict
+from django.urls import reverse
 from datetime import datetime
-from fuzzywuzzy import process
-
-from .models import Team, Referee, Match, Season
-from .serializers import TeamSerializer, RefereeSerializer, MatchSerializer, MatchCreateSerializer
+from functools import partial, wraps
+import json
+
+from .models import ImportJob, Team, Referee, Match, Season
+from .serializers import MatchCreateSerializer, ImportJobSerializer
+from .caching import (
+    async_cached_response,
+    cached_response,
+    json_response,
+    not_modified,
+    set_validators,
+    validators,
+)
+from .comebacks import comeback_table
+from .engine import match_engine, match_mask, rank_rivalries, referee_impact
+from .export import export_matches, export_response
+from .head_to_head import ahead_to_head_record, head_to_head_record
+from .imports import UPLOAD_CHUNK_SIZE, UploadTooLarge, enqueue_import
+from .ingestion import ingest_match_items
+from .metrics import exposition, record_ingest
+from .pagination import list_page, next_link, parse_page_params, streaming_json_response
+from .renderers import BULK_RENDERERS, EXPORT_RENDERERS, FastJSONRenderer
+from .search import (
+    DEFAULT_LIMIT,
+    DEFAULT_SCORE_CUTOFF,
+    MAX_LIMIT,
+    MAX_SCORE,
+    referee_index,
+    season_index,
+    team_index,
+)
+from .seasons import season_date_index
+from .standings import astandings_as_of, standings_as_of
 
 # -----------------------------
 # Helper Functions
 # -----------------------------
 
-def extract_seasons():
+def parse_date_range(params):
     """
-    Extracts all seasons based on contiguous match dates.
-    A new season starts if there is a gap of more than 90 days between matches.
+    Reads the optional ?from= and ?to= query parameters (dd/mm/yyyy).
+    Returns (date_from, date_to, error message or None).
     """
-    matches = Match.objects.order_by('date').values_list('date', flat=True)
-    seasons = []
-    current_season = {}
-    season_id = 1
-
-    for match_date in matches:
-        if not current_season:
-            current_season = {
-                'season_id': season_id,
-                'start_date': match_date,
-                'end_date': match_date
-            }
-        else:
-            gap = (match_date - current_season['end_date']).days
-            if gap > 90:
-                seasons.append(current_season)
-                season_id += 1
-                current_season = {
-                    'season_id': season_id,
-                    'start_date': match_date,
-                    'end_date': match_date
-                }
-            else:
-                current_season['end_date'] = match_date
+    dates = []
+    for param in ('from', 'to'):
+        value = params.get(param)
+        if not value:
+            dates.append(None)
+            continue
+        try:
+            dates.append(datetime.strptime(value, '%d/%m/%Y').date())
+        except ValueError:
+            return None, None, f"Invalid {param} date format. Use dd/mm/yyyy."
+    return dates[0], dates[1], None
+
+def parse_match_filters(params):
+    """
+    Reads the optional ?season=, ?from= and ?to= query parameters into
+    keyword arguments for engine.match_mask. Returns (filters, error
+    message or None).
+    """
+    date_from, date_to, error = parse_date_range(params)
+    if error:
+        return None, error
+
+    season_ids = None
+    season_name = params.get('season')
+    if season_name:
+        season_ids = list(Season.objects.filter(name=season_name).values_list('id', flat=True))
+    return {"season_ids": season_ids, "date_from": date_from, "date_to": date_to}, None
+
+def parse_int_param(params, name, label):
+    """
+    Reads an optional integer query parameter. Returns (value or None,
+    error message or None).
+    """
+    value = params.get(name)
+    if not value:
+        return None, None
+    try:
+        return int(value), None
+    except ValueError:
+        return None, f"{label} must be an integer."
+
+def ndjson_items(stream):
+    """
+    Parses an NDJSON body one line at a time. Lines that are not valid JSON
+    are passed on as None, so they are rejected in their place.
+    """
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+REFEREE_IMPACT_FIELDS = [
+    "average_yellow_cards_home",
+    "average_yellow_cards_away",
+    "average_red_cards_home",
+    "average_red_cards_away",
+    "home_win_rate",
+    "away_win_rate",
+    "draw_rate",
+]
+
+def referee_impact_data(referee, totals):
+    """Formats one referee's engine.referee_impact figures for the API."""
+    data = {"referee": referee}
+    for field in REFEREE_IMPACT_FIELDS:
+        data[field] = round(totals[field] or 0, 2)
+    return data
+
+LEADERBOARD_ORDERING_FIELDS = ["referee", "matches"] + REFEREE_IMPACT_FIELDS
+
+async def aparse_match_filters(params):
+    """parse_match_filters for the async views."""
+    date_from, date_to, error = parse_date_range(params)
+    if error:
+        return None, error
+
+    season_ids = None
+    season_name = params.get('season')
+    if season_name:
+        season_ids = [season_id async for season_id in
+                      Season.objects.filter(name=season_name).values_list('id', flat=True)]
+    return {"season_ids": season_ids, "date_from": date_from, "date_to": date_to}, None
+
+def parse_leaderboard_params(params):
+    """
+    Reads the ?min_matches=, ?limit= and ?ordering= parameters of the
+    referee impact leaderboard. Returns (options, error message or None).
+    """
+    min_matches, error = parse_int_param(params, 'min_matches', "min_matches")
+    if error:
+        return None, error
+    limit, error = parse_int_param(params, 'limit', "Limit")
+    if error:
+        return None, error
+
+    ordering = params.get('ordering', '-matches')
+    field = ordering.lstrip('-')
+    if field not in LEADERBOARD_ORDERING_FIELDS:
+        return None, (f"ordering must be one of: {', '.join(LEADERBOARD_ORDERING_FIELDS)} "
+                      "(prefix with '-' for descending).")
+    return {"min_matches": min_matches, "limit": limit,
+            "descending": ordering.startswith('-'), "field": field}, None
+
+def parse_standings_date(params):
+    """Reads the required ?date= parameter. Returns (date, error message or None)."""
+    date_str = params.get('date', None)
+    if not date_str:
+        return None, "Date parameter is required in format dd/mm/yyyy."
+    try:
+        return datetime.strptime(date_str, '%d/%m/%Y').date(), None
+    except ValueError:
+        return None, "Invalid date format. Use dd/mm/yyyy."
+
+def parse_comeback_params(params):
+    """
+    Reads the ?from=, ?to=, ?venue=, ?limit= and ?season= parameters of
+    the comeback table. Returns (options, error message or None).
+    """
+    date_from, date_to, error = parse_date_range(params)
+    if error:
+        return None, error
+
+    venue = params.get('venue') or None
+    if venue not in (None, 'home', 'away'):
+        return None, "Venue must be 'home' or 'away'."
 
-    if current_season:
-        seasons.append(current_season)
+    limit, error = parse_int_param(params, 'limit', "Limit")
+    if error:
+        return None, error
 
-    return seasons
+    seasons = Season.objects.all()
+    if params.get('season'):
+        seasons = seasons.filter(name=params['season'])
+    return {"seasons": seasons, "date_from": date_from, "date_to": date_to,
+            "venue": venue, "limit": limit}, None
 
-def find_season(seasons, selected_date):
+def parse_export_filters(params):
+    """
+    Reads the ?season=, ?team=, ?referee=, ?from= and ?to= parameters of
+    the match export into keyword arguments for export.export_matches.
+    Returns (filters, error message or None).
+    """
+    date_from, date_to, error = parse_date_range(params)
+    if error:
+        return None, error
+    filters = {name: params.get(name, '').strip() or None for name in ('season', 'team', 'referee')}
+    return {**filters, "date_from": date_from, "date_to": date_to}, None
+
+def head_to_head_data(team1, team2, record, team1_is_low):
+    if team1_is_low:
+        team1_wins, team2_wins = record.team_low_wins, record.team_high_wins
+        team1_goals, team2_goals = record.team_low_goals, record.team_high_goals
+    else:
+        team1_wins, team2_wins = record.team_high_wins, record.team_low_wins
+        team1_goals, team2_goals = record.team_high_goals, record.team_low_goals
+
+    total_matches = record.matches
+
+    average_goals_team1 = (team1_goals / total_matches) if total_matches else 0
+    average_goals_team2 = (team2_goals / total_matches) if total_matches else 0
+
+    return {
+        "team1": team1,
+        "team2": team2,
+        "total_matches": total_matches,
+        "team1_wins": team1_wins,
+        "team2_wins": team2_wins,
+        "draws": record.draws,
+        "total_goals_team1": team1_goals,
+        "total_goals_team2": team2_goals,
+        "average_goals_team1": round(average_goals_team1, 2),
+        "average_goals_team2": round(average_goals_team2, 2),
+    }
+
+def referee_impact_table(columns, filters, referee_id=None, min_matches=None):
+    """
+    engine.referee_impact over the matches passing `filters`, leaving out
+    referees with fewer than `min_matches`.
+    """
+    impact = referee_impact(columns, match_mask(columns, referee_id=referee_id, **filters))
+    if min_matches:
+        impact = {referee_id: totals for referee_id, totals in impact.items()
+                  if totals["matches"] >= min_matches}
+    return impact
+
+def column_names(columns, kind, ids=None):
+    """
+    {id: name} of the `ids` (every row if None) of a 'team', 'referee' or
+    'season', read from the snapshot's name table where the columns have one.
+    """
+    names, rest = columns.names(kind, ids)
+    if rest is not None:
+        names.update(rest)
+    return names
+
+def leaderboard_data(impact, referee_names, options):
+    """The leaderboard rows of a referee_impact_table, ordered and limited."""
+    field, descending, limit = options["field"], options["descending"], options["limit"]
+    rows = [(referee_names[referee_id], totals) for referee_id, totals in impact.items()]
+    rows.sort(key=lambda row: row[0], reverse=descending and field == 'referee')
+    if field != 'referee':
+        # Stable, so equal values stay in name order either way
+        rows.sort(key=lambda row: row[1][field], reverse=descending)
+    if limit is not None:
+        rows = rows[:max(limit, 0)]
+
+    leaderboard = []
+    for name, totals in rows:
+        data = referee_impact_data(name, totals)
+        data["matches"] = totals["matches"]
+        leaderboard.append(data)
+    return leaderboard
+
+def standings_data(season, snapshots):
+    standings_sorted = [
+        {
+            "team": snapshot.team.name,
+            "points": snapshot.points,
+            "goal_difference": snapshot.goal_difference,
+            "goals_scored": snapshot.goals_scored,
+            "wins": snapshot.wins,
+            "losses": snapshot.losses,
+            "draws": snapshot.draws,
+            "goals_conceded": snapshot.goals_conceded,
+            "rank": idx,
+        }
+        for idx, snapshot in enumerate(snapshots, start=1)
+    ]
+    return {
+        "season_id": season.id,
+        "season_name": season.name,
+        "season_start_date": season.start_date,
+        "season_end_date": season.end_date,
+        "number_of_teams": len(standings_sorted),
+        "standings": standings_sorted
+    }
+
+RIVALRY_CURSOR = (int, int, int)  # engine.Rivalries.position()
+COMEBACK_CURSOR = (int, str)  # comeback_position()
+
+def listing_data(request, items, position, page):
+    """The body of a list endpoint: all of `items`, or a page of them."""
+    if page["size"] is None:
+        return items
+    return {"next": next_link(request, position), "results": items}
+
+def rivalry_listing(columns, filters, limit, page):
     """
-    Finds the season that includes the selected_date.
-    Returns the season dictionary or None if not found.
+    The rivalry rows a request asked for, as (rows, keyset position of the
+    last row if another page follows, else None). Streamed requests get
+    the rows as a lazy iterator.
     """
-    for season in seasons:
-        if season['start_date'] <= selected_date <= season['end_date']:
-            return season
-    return None
+    rivalries = rank_rivalries(columns, match_mask(columns, **filters))
+    stop = len(rivalries) if limit is None else min(max(limit, 0), len(rivalries))
+    if page["stream"]:
+        return rivalries.iter_rows(0, stop), None
+    if page["size"] is None:
+        return rivalries.rows(0, stop), None
+
+    start = rivalries.index_after(page["after"]) if page["after"] else 0
+    end = min(start + page["size"], stop)
+    return rivalries.rows(start, end), (rivalries.position(end - 1) if end < stop else None)
+
+def rivalry_items(rivalries, team_names):
+    for team_low, team_high, yellow_cards, red_cards in rivalries:
+        teams = sorted([team_names[team_low], team_names[team_high]])
+        yield {
+            "rivalry": f"{teams[0]} vs {teams[1]}",
+            "total_yellow_cards": yellow_cards,
+            "total_red_cards": red_cards,
+            "intensity_score": yellow_cards + 2 * red_cards,
+        }
+
+def comeback_position(row):
+    return (-row["comebacks"], row["team"])
+
+def comeback_data(table, team_names, limit):
+    comeback_list = [
+        {"team": team_names[team_id], "comebacks": comebacks, "blown_leads": blown_leads}
+        for team_id, (comebacks, blown_leads) in table.items()
+        if comebacks
+    ]
+    comeback_sorted = sorted(comeback_list, key=comeback_position)
+
+    # Apply the limit parameter if provided
+    if limit is not None:
+        comeback_sorted = comeback_sorted[:max(limit, 0)]
+    return comeback_sorted
 
 # -----------------------------
 # API Views
 # -----------------------------
 
+# JSON and the browsable API, plus the bulk formats for machine consumers
+READ_RENDERERS = api_settings.DEFAULT_RENDERER_CLASSES + BULK_RENDERERS
+
 class HeadToHeadHistory(APIView):
+    renderer_classes = READ_RENDERERS
+
+    @cached_response
     def get(self, request, team1, team2):
-        matches = Match.objects.filter(
-            (Q(home_team__name=team1) & Q(away_team__name=team2)) |
-            (Q(home_team__name=team2) & Q(away_team__name=team1))
-        )
-        if not matches.exists():
+        # Pair totals are kept up to date as matches are written
+        record, team1_is_low = head_to_head_record(team1, team2)
+        if record is None:
             return Response(
                 {"detail": "No matches found between these teams."},
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        team1_wins = 0
-        team2_wins = 0
-        draws = 0
-        team1_goals = 0
-        team2_goals = 0
-
-        for match in matches:
-            if match.home_team.name == team1:
-                team1_goals += match.home_goals
-                team2_goals += match.away_goals
-
-                if match.full_time_result == 'H':
-                    team1_wins += 1
-                elif match.full_time_result == 'A':
-                    team2_wins += 1
-                else:
-                    draws += 1
-
-            else:
-                team1_goals += match.away_goals
-                team2_goals += match.home_goals
-
-                if match.full_time_result == 'H':
-                    team2_wins += 1
-                elif match.full_time_result == 'A':
-                    team1_wins += 1
-                else:
-                    draws += 1
-
-        total_matches = matches.count()
-
-        average_goals_team1 = (team1_goals / total_matches) if total_matches else 0
-        average_goals_team2 = (team2_goals / total_matches) if total_matches else 0
-
-        data = {
-            "team1": team1,
-            "team2": team2,
-            "total_matches": total_matches,
-            "team1_wins": team1_wins,
-            "team2_wins": team2_wins,
-            "draws": draws,
-            "total_goals_team1": team1_goals,
-            "total_goals_team2": team2_goals,
-            "average_goals_team1": round(average_goals_team1, 2),
-            "average_goals_team2": round(average_goals_team2, 2),
-        }
+        data = head_to_head_data(team1, team2, record, team1_is_low)
         return Response(data, status=status.HTTP_200_OK)
 
 
 class RefereeImpactAnalysis(APIView):
+    renderer_classes = READ_RENDERERS
+
+    @cached_response
     def get(self, request, referee):
-        matches = Match.objects.filter(referee__name=referee)
-        if not matches.exists():
+        filters, error = parse_match_filters(request.query_params)
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        referee_id = Referee.objects.filter(name=referee).values_list('id', flat=True).first()
+        columns = match_engine.columns()
+        impact = {}
+        if referee_id is not None:
+            impact = referee_impact_table(columns, filters, referee_id=referee_id)
+        if not impact:
             return Response({"detail": "No matches found for this referee."},
                             status=status.HTTP_404_NOT_FOUND)
 
-        total_matches = matches.count()
-        avg_yellow_home = matches.aggregate(avg=Avg('home_yellow_cards'))['avg'] or 0
-        avg_yellow_away = matches.aggregate(avg=Avg('away_yellow_cards'))['avg'] or 0
-        avg_red_home = matches.aggregate(avg=Avg('home_red_cards'))['avg'] or 0
-        avg_red_away = matches.aggregate(avg=Avg('away_red_cards'))['avg'] or 0
-
-        home_wins = matches.filter(full_time_result='H').count()
-        away_wins = matches.filter(full_time_result='A').count()
-        draws = matches.filter(full_time_result='D').count()
-
-        home_win_rate = (home_wins / total_matches) * 100
-        away_win_rate = (away_wins / total_matches) * 100
-        draw_rate = (draws / total_matches) * 100
-
-        data = {
-            "referee": referee,
-            "average_yellow_cards_home": round(avg_yellow_home, 2),
-            "average_yellow_cards_away": round(avg_yellow_away, 2),
-            "average_red_cards_home": round(avg_red_home, 2),
-            "average_red_cards_away": round(avg_red_away, 2),
-            "home_win_rate": round(home_win_rate, 2),
-            "away_win_rate": round(away_win_rate, 2),
-            "draw_rate": round(draw_rate, 2),
-        }
+        data = referee_impact_data(referee, impact[referee_id])
         return Response(data, status=status.HTTP_200_OK)
 
-class DynamicLeagueStandings(APIView):
+class RefereeImpactLeaderboard(APIView):
+    renderer_classes = READ_RENDERERS
+    ordering_fields = LEADERBOARD_ORDERING_FIELDS
+
+    @cached_response
     def get(self, request):
-        date_str = request.query_params.get('date', None)
-        if not date_str:
-            return Response({"detail": "Date parameter is required in format dd/mm/yyyy."},
-                            status=status.HTTP_400_BAD_REQUEST)
+        filters, error = parse_match_filters(request.query_params)
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+        options, error = parse_leaderboard_params(request.query_params)
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Every referee's figures in one vectorised group-by over the match columns
+        columns = match_engine.columns()
+        impact = referee_impact_table(columns, filters, min_matches=options["min_matches"])
+        referee_names = column_names(columns, 'referee', impact)
+        return Response(leaderboard_data(impact, referee_names, options), status=status.HTTP_200_OK)
 
-        try:
-            selected_date = datetime.strptime(date_str, '%d/%m/%Y').date()
-        except ValueError:
-            return Response({"detail": "Invalid date format. Use dd/mm/yyyy."},
-                            status=status.HTTP_400_BAD_REQUEST)
+class DynamicLeagueStandings(APIView):
+    renderer_classes = READ_RENDERERS
 
-        try:
-            current_season = Season.objects.get(
-                start_date__lte=selected_date, end_date__gte=selected_date
-            )
-        except Season.DoesNotExist:
+    @cached_response
+    def get(self, request):
+        selected_date, error = parse_standings_date(request.query_params)
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Bisect over the season date ranges held in memory, no query
+        current_season = season_date_index.season_for(selected_date, request.dataset_version)
+        if current_season is None:
             return Response({"detail": "No season found for the selected date."},
                             status=status.HTTP_404_NOT_FOUND)
 
-        matches = Match.objects.filter(season=current_season, date__lte=selected_date)
-        if not matches.exists():
+        # One indexed read of the precomputed table for the last match date
+        snapshots = standings_as_of(current_season, selected_date)
+        if not snapshots:
             return Response({"detail": "No matches found up to this date."},
                             status=status.HTTP_404_NOT_FOUND)
 
-        # Check team count
-        unique_home_teams = matches.values_list('home_team__name', flat=True).distinct()
-        unique_away_teams = matches.values_list('away_team__name', flat=True).distinct()
-        unique_teams = set(unique_home_teams).union(set(unique_away_teams))
-        number_of_teams = len(unique_teams)
-
-
-        # Calculate standings
-        standings = defaultdict(lambda: {
-            "points": 0,
-            "goal_difference": 0,
-            "goals_scored": 0,
-            "wins": 0,
-            "losses": 0,
-            "draws": 0,
-            "goals_conceded": 0
-        })
-
-        for match in matches:
-            home_team = match.home_team.name
-            away_team = match.away_team.name
-            home_goals = match.home_goals
-            away_goals = match.away_goals
-            result = match.full_time_result
-
-            # Update goals scored and conceded
-            standings[home_team]["goals_scored"] += home_goals
-            standings[home_team]["goals_conceded"] += away_goals
-            standings[away_team]["goals_scored"] += away_goals
-            standings[away_team]["goals_conceded"] += home_goals
-
-            # Update goal difference
-            standings[home_team]["goal_difference"] += (home_goals - away_goals)
-            standings[away_team]["goal_difference"] += (away_goals - home_goals)
-
-            # Update points and W/L/D
-            if result == 'H':
-                standings[home_team]["points"] += 3
-                standings[home_team]["wins"] += 1
-                standings[away_team]["losses"] += 1
-            elif result == 'A':
-                standings[away_team]["points"] += 3
-                standings[away_team]["wins"] += 1
-                standings[home_team]["losses"] += 1
-            else:  # Draw
-                standings[home_team]["points"] += 1
-                standings[away_team]["points"] += 1
-                standings[home_team]["draws"] += 1
-                standings[away_team]["draws"] += 1
-
-        standings_list = []
-        for team, stats in standings.items():
-            standings_list.append({
-                "team": team,
-                "points": stats["points"],
-                "goal_difference": stats["goal_difference"],
-                "goals_scored": stats["goals_scored"],
-                "wins": stats["wins"],
-                "losses": stats["losses"],
-                "draws": stats["draws"],
-                "goals_conceded": stats["goals_conceded"],
-            })
-
-        standings_sorted = sorted(
-            standings_list,
-            key=lambda x: (-x["points"], -x["goal_difference"], -x["goals_scored"])
-        )
-
-        for idx, team in enumerate(standings_sorted, start=1):
-            team["rank"] = idx
-
-        response_data = {
-            "season_id": current_season.id,
-            "season_name": current_season.name,
-            "season_start_date": current_season.start_date,
-            "season_end_date": current_season.end_date,
-            "number_of_teams": number_of_teams,
-            "standings": standings_sorted
-        }
-        return Response(response_data, status=status.HTTP_200_OK)
+        return Response(standings_data(current_season, snapshots), status=status.HTTP_200_OK)
 
 class FiercestRivalries(APIView):
-    def get(self, request):
-        # Aggregate rivalry data
-        all_matches = Match.objects.all()
-        rivalry_dict = {}
-
-        for match in all_matches:
-            teams = sorted([match.home_team.name, match.away_team.name])
-            key = f"{teams[0]} vs {teams[1]}"
-            if key not in rivalry_dict:
-                rivalry_dict[key] = {"yellow_cards": 0, "red_cards": 0}
-            rivalry_dict[key]["yellow_cards"] += (match.home_yellow_cards + match.away_yellow_cards)
-            rivalry_dict[key]["red_cards"] += (match.home_red_cards + match.away_red_cards)
-
-        rivalry_list = []
-        for rivalry, cards in rivalry_dict.items():
-            intensity_score = cards["yellow_cards"] + 2 * cards["red_cards"]
-            rivalry_list.append({
-                "rivalry": rivalry,
-                "total_yellow_cards": cards["yellow_cards"],
-                "total_red_cards": cards["red_cards"],
-                "intensity_score": intensity_score
-            })
-
-        rivalry_sorted = sorted(rivalry_list, key=lambda x: -x["intensity_score"])
-
-        # Apply the limit parameter if provided
-        limit = request.query_params.get('limit', None)
-        if limit:
-            try:
-                limit = int(limit)
-                rivalry_sorted = rivalry_sorted[:limit]
-            except ValueError:
-                return Response({"detail": "Limit must be an integer."},
-                                status=status.HTTP_400_BAD_REQUEST)
+    renderer_classes = READ_RENDERERS
 
-        return Response(rivalry_sorted, status=status.HTTP_200_OK)
+    @cached_response
+    def get(self, request):
+        filters, error = parse_match_filters(request.query_params)
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        limit, error = parse_int_param(request.query_params, 'limit', "Limit")
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+        page, error = parse_page_params(request.query_params, RIVALRY_CURSOR)
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Card totals per unordered pair, grouped over the in-memory match columns
+        columns = match_engine.columns()
+        rows, position = rivalry_listing(columns, filters, limit, page)
+        if page["stream"]:
+            # Every name up front, so rows are formatted as they are sent
+            team_names = column_names(columns, 'team')
+            return streaming_json_response(rivalry_items(rows, team_names))
+
+        team_ids = {team_id for row in rows for team_id in row[:2]}
+        team_names = column_names(columns, 'team', team_ids)
+        data = listing_data(request, list(rivalry_items(rows, team_names)), position, page)
+        return Response(data, status=status.HTTP_200_OK)
 
 
 class ComebackKings(APIView):
+    renderer_classes = READ_RENDERERS
+
+    @cached_response
     def get(self, request):
-        # Filter matches that had a comeback
-        matches = Match.objects.filter(
-            ~Q(half_time_result='D') & ~Q(full_time_result='D') &
-            (
-                (Q(half_time_result='A') & Q(full_time_result='H')) |
-                (Q(half_time_result='H') & Q(full_time_result='A'))
-            )
-        )
-        comebacks = defaultdict(int)
-        for match in matches:
-            if match.half_time_result == 'A' and match.full_time_result == 'H':
-                comebacks[match.home_team.name] += 1
-            elif match.half_time_result == 'H' and match.full_time_result == 'A':
-                comebacks[match.away_team.name] += 1
-
-        comeback_list = [
-            {"team": team, "comebacks": count} for team, count in comebacks.items()
-        ]
-        comeback_sorted = sorted(comeback_list, key=lambda x: -x["comebacks"])
-
-        # Apply the limit parameter if provided
-        limit = request.query_params.get('limit', None)
-        if limit:
-            try:
-                limit = int(limit)
-                comeback_sorted = comeback_sorted[:limit]
-            except ValueError:
-                return Response({"detail": "Limit must be an integer."},
-                                status=status.HTTP_400_BAD_REQUEST)
+        options, error = parse_comeback_params(request.query_params)
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+        page, error = parse_page_params(request.query_params, COMEBACK_CURSOR)
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Sums of the per-team, per-season counters kept up to date on insert
+        table = comeback_table(options["seasons"], options["date_from"], options["date_to"],
+                               options["venue"])
+        team_names = dict(Team.objects.filter(id__in=table).values_list('id', 'name'))
+        rows = comeback_data(table, team_names, options["limit"])
+        if page["stream"]:
+            return streaming_json_response(rows)
+
+        position = None
+        if page["size"] is not None:
+            rows, position = list_page(rows, comeback_position, page)
+        return Response(listing_data(request, rows, position, page), status=status.HTTP_200_OK)
+
+
+class MatchExport(APIView):
+    """
+    Streams every match passing the ?season=, ?team=, ?referee=, ?from=
+    and ?to= filters as NDJSON (the default), CSV or Parquet, chosen with
+    the Accept header or ?format=. See export.py.
+    """
+    renderer_classes = EXPORT_RENDERERS
 
-        return Response(comeback_sorted, status=status.HTTP_200_OK)
+    def get(self, request):
+        filters, error = parse_export_filters(request.query_params)
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+        return export_response(export_matches(**filters), request.accepted_renderer)
 
 
 class AddMatchRecord(APIView):
     def post(self, request):
         serializer = MatchCreateSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save()
+            try:
+                serializer.save()
+            except ValidationError:
+                record_ingest('add_match', rejected=1)
+                raise
+            record_ingest('add_match', created=1)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
+        record_ingest('add_match', rejected=1)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 # -----------------------------
 # Search Endpoints (Autocomplete)
 # -----------------------------
 
-def search_teams(request):
+def _search_response(request, index):
     query = request.GET.get('search', '').lower()
     if not query:
         return JsonResponse({"results": []})
 
-    # Fetch all team names
-    all_teams = list(Team.objects.values_list('name', flat=True))
+    try:
+        limit = min(int(request.GET.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+        score_cutoff = float(request.GET.get('score_cutoff', DEFAULT_SCORE_CUTOFF))
+    except ValueError:
+        return JsonResponse({"detail": "limit and score_cutoff must be numbers."}, status=400)
+    # Also turns away nan, which no score passes
+    if not 0 <= score_cutoff <= MAX_SCORE:
+        return JsonResponse({"detail": f"score_cutoff must be between 0 and {MAX_SCORE}."}, status=400)
+
+    # Validators come from the version the index was loaded at, so even a
+    # conditional request does not touch the database
+    etag, last_modified = validators(request, index.version())
+    response = not_modified(request, etag, last_modified)
+    if response is not None:
+        return response
+
+    # Fuzzy matching against the in-process name index, no query per keystroke
+    results = index.search(query, limit=max(limit, 0), score_cutoff=score_cutoff)
+    return set_validators(JsonResponse({"results": results}), etag, last_modified)
 
-    # Use fuzzy matching to find top 10
-    matched_teams = process.extract(query, all_teams, limit=10)
-    # Only return matches with a score >= 60
-    results = [team for team, score in matched_teams if score >= 60]
-    return JsonResponse({"results": results})
+def search_teams(request):
+    return _search_response(request, team_index)
 
 def search_referees(request):
-    query = request.GET.get('search', '').lower()
-    if not query:
-        return JsonResponse({"results": []})
+    return _search_response(request, referee_index)
 
-    # Fetch all referee names
-    all_referees = list(Referee.objects.values_list('name', flat=True))
+def search_seasons(request):
+    return _search_response(request, season_index)
 
-    # Use fuzzy matching to find top 10
-    matched_refs = process.extract(query, all_referees, limit=10)
-    results = [ref for ref, score in matched_refs if score >= 60]
-    return JsonResponse({"results": results})
+class AddMatchBatch(APIView):
+    """
+    Creates many matches in one request, from a JSON array or an NDJSON
+    stream (Content-Type application/x-ndjson) of add-match payloads.
+    Responds with the outcome of every item. NDJSON is read line by line;
+    a JSON array is parsed whole, so its size is capped by
+    BATCH_INGEST_MAX_BYTES.
+    """
+    NDJSON_TYPES = ('application/x-ndjson', 'application/jsonl')
 
-def search_seasons(request):
-    query = request.GET.get('search', '').lower()
-    if not query:
-        return JsonResponse({"results": []})
+    def post(self, request):
+        if request.content_type.split(';')[0].strip() in self.NDJSON_TYPES:
+            items = ndjson_items(request.stream) if request.stream else []
+        else:
+            max_bytes = getattr(settings, 'BATCH_INGEST_MAX_BYTES', 64 * 1024 * 1024)
+            if int(request.META.get('CONTENT_LENGTH') or 0) > max_bytes:
+                return Response({"detail": f"JSON arrays are limited to {max_bytes} bytes; "
+                                           "send larger batches as NDJSON."},
+                                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+            try:
+                items = json.load(request.stream) if request.stream else None
+            except ValueError:
+                items = None
+            if not isinstance(items, list):
+                return Response({"detail": "Expected a JSON array of matches or an NDJSON stream."},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        result = ingest_match_items(items)
+        return Response(result.as_dict(), status=status.HTTP_200_OK)
+
+class ImportUpload(APIView):
+    """
+    Queues a football-data CSV for the background worker, sent either as
+    the `file` field of a multipart form or as a text/csv request body.
+    The upload is written to disk as it arrives; the import itself runs in
+    worker.py, so large files never tie up a web worker. Responds 202 with
+    the job, whose progress is at its Location.
+    """
+    CSV_TYPES = ('text/csv', 'application/csv')
+
+    def post(self, request):
+        content_type = request.content_type.split(';')[0].strip()
+        if content_type in self.CSV_TYPES:
+            chunks = iter(lambda: request.stream.read(UPLOAD_CHUNK_SIZE), b'') if request.stream else []
+            filename = request.query_params.get('filename') or 'upload.csv'
+        else:
+            upload = request.FILES.get('file') if content_type == 'multipart/form-data' else None
+            if upload is None:
+                return Response({"detail": "Send the CSV as a 'file' form field or a text/csv body."},
+                                status=status.HTTP_400_BAD_REQUEST)
+            chunks, filename = upload.chunks(UPLOAD_CHUNK_SIZE), upload.name
+
+        try:
+            job = enqueue_import(chunks, filename)
+        except UploadTooLarge as e:
+            return Response({"detail": str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(ImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED,
+                        headers={"Location": reverse('import-progress', args=[job.pk])})
 
-    # Fetch all season names
-    all_seasons = list(Season.objects.values_list('name', flat=True))
+class ImportProgress(APIView):
+    """
+    State of an import job: rows processed, rows per second, the matches
+    created and updated, and the rows rejected so far.
+    """
 
-    # Use fuzzy matching to find top 10
-    matched_seasons = process.extract(query, all_seasons, limit=10)
-    # Only return matches with a score >= 60
-    results = [season for season, score in matched_seasons if score >= 60]
-    return JsonResponse({"results": results})
+    def get(self, request, job_id):
+        job = ImportJob.objects.filter(pk=job_id).first()
+        if job is None:
+            return Response({"detail": "Import job not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(ImportJobSerializer(job).data, status=status.HTTP_200_OK)
+
+def metrics(request):
+    body, content_type = exposition()
+    return HttpResponse(body, content_type=content_type)
+
+# -----------------------------
+# Async API Views
+# -----------------------------
+#
+# The read-only endpoints again, for the ASGI deployment (see asgi.py and
+# ASYNC_VIEWS). APIView has no async support, so these are plain async
+# functions returning json_response(), with the same bodies and cache
+# entries as the views above. Queries go through the async ORM, and the
+# engine's group-bys run in a worker thread, so a slow request leaves the
+# event loop free to serve the others.
+
+# No browsable API: it needs an APIView to describe
+ASYNC_RENDERERS = [FastJSONRenderer] + BULK_RENDERERS
+
+def negotiate(request, renderer_classes=ASYNC_RENDERERS):
+    """(renderer, media type) for the request, picked as an APIView would."""
+    renderers = [renderer() for renderer in renderer_classes]
+    return DefaultContentNegotiation().select_renderer(Request(request), renderers)
+
+def async_get(view=None, renderer_classes=ASYNC_RENDERERS):
+    """
+    Answers anything but GET and HEAD with a 405 and renders the view's
+    response in the format negotiated from Accept or ?format=, as an
+    APIView would. Use as @async_get(renderer_classes=...) for formats
+    other than ASYNC_RENDERERS.
+    """
+    if view is None:
+        return partial(async_get, renderer_classes=renderer_classes)
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            response = json_response({"detail": f'Method "{request.method}" not allowed.'},
+                                     status.HTTP_405_METHOD_NOT_ALLOWED)
+            response['Allow'] = 'GET, HEAD'
+            return response
+        try:
+            request.accepted_renderer, request.accepted_media_type = negotiate(request, renderer_classes)
+        except NotAcceptable as e:
+            return json_response({"detail": e.detail}, status.HTTP_406_NOT_ACCEPTABLE)
+
+        response = await view(request, *args, **kwargs)
+        if isinstance(response, Response):
+            response.accepted_renderer = request.accepted_renderer
+            response.accepted_media_type = request.accepted_media_type
+        return response
+    # APIView.as_view() exempts its views too; Django 4.2's csrf_exempt
+    # would hide that this one is a coroutine
+    wrapper.csrf_exempt = True
+    return wrapper
+
+def in_thread(func, *args, **kwargs):
+    """Awaitable running CPU-bound work in the default executor."""
+    return sync_to_async(func, thread_sensitive=False)(*args, **kwargs)
+
+async def acolumn_names(columns, kind, ids=None):
+    """column_names() for async views."""
+    names, rest = columns.names(kind, ids)
+    if rest is not None:
+        names.update({row_id: name async for row_id, name in rest})
+    return names
+
+@async_get
+@async_cached_response
+async def async_head_to_head_history(request, team1, team2):
+    record, team1_is_low = await ahead_to_head_record(team1, team2)
+    if record is None:
+        return json_response({"detail": "No matches found between these teams."},
+                             status.HTTP_404_NOT_FOUND)
+    return json_response(head_to_head_data(team1, team2, record, team1_is_low))
+
+@async_get
+@async_cached_response
+async def async_referee_impact(request, referee):
+    filters, error = await aparse_match_filters(request.GET)
+    if error:
+        return json_response({"detail": error}, status.HTTP_400_BAD_REQUEST)
+
+    referee_id = await Referee.objects.filter(name=referee).values_list('id', flat=True).afirst()
+    impact = {}
+    if referee_id is not None:
+        columns = await match_engine.acolumns()
+        impact = await in_thread(referee_impact_table, columns, filters, referee_id=referee_id)
+    if not impact:
+        return json_response({"detail": "No matches found for this referee."},
+                             status.HTTP_404_NOT_FOUND)
+    return json_response(referee_impact_data(referee, impact[referee_id]))
+
+@async_get
+@async_cached_response
+async def async_referee_impact_leaderboard(request):
+    filters, error = await aparse_match_filters(request.GET)
+    if error:
+        return json_response({"detail": error}, status.HTTP_400_BAD_REQUEST)
+    options, error = parse_leaderboard_params(request.GET)
+    if error:
+        return json_response({"detail": error}, status.HTTP_400_BAD_REQUEST)
+
+    columns = await match_engine.acolumns()
+    impact = await in_thread(referee_impact_table, columns, filters,
+                             min_matches=options["min_matches"])
+    referee_names = await acolumn_names(columns, 'referee', impact)
+    return json_response(leaderboard_data(impact, referee_names, options))
+
+@async_get
+@async_cached_response
+async def async_league_standings(request):
+    selected_date, error = parse_standings_date(request.GET)
+    if error:
+        return json_response({"detail": error}, status.HTTP_400_BAD_REQUEST)
+
+    current_season = await season_date_index.aseason_for(selected_date, request.dataset_version)
+    if current_season is None:
+        return json_response({"detail": "No season found for the selected date."},
+                             status.HTTP_404_NOT_FOUND)
+
+    snapshots = await astandings_as_of(current_season, selected_date)
+    if not snapshots:
+        return json_response({"detail": "No matches found up to this date."},
+                             status.HTTP_404_NOT_FOUND)
+    return json_response(standings_data(current_season, snapshots))
+
+@async_get
+@async_cached_response
+async def async_fiercest_rivalries(request):
+    filters, error = await aparse_match_filters(request.GET)
+    if error:
+        return json_response({"detail": error}, status.HTTP_400_BAD_REQUEST)
+    limit, error = parse_int_param(request.GET, 'limit', "Limit")
+    if error:
+        return json_response({"detail": error}, status.HTTP_400_BAD_REQUEST)
+    page, error = parse_page_params(request.GET, RIVALRY_CURSOR)
+    if error:
+        return json_response({"detail": error}, status.HTTP_400_BAD_REQUEST)
+
+    columns = await match_engine.acolumns()
+    rows, position = await in_thread(rivalry_listing, columns, filters, limit, page)
+    if page["stream"]:
+        team_names = await acolumn_names(columns, 'team')
+        return streaming_json_response(rivalry_items(rows, team_names), asynchronous=True)
+
+    team_ids = {team_id for row in rows for team_id in row[:2]}
+    team_names = await acolumn_names(columns, 'team', team_ids)
+    return json_response(listing_data(request, list(rivalry_items(rows, team_names)), position, page))
+
+@async_get
+@async_cached_response
+async def async_comeback_kings(request):
+    options, error = parse_comeback_params(request.GET)
+    if error:
+        return json_response({"detail": error}, status.HTTP_400_BAD_REQUEST)
+    page, error = parse_page_params(request.GET, COMEBACK_CURSOR)
+    if error:
+        return json_response({"detail": error}, status.HTTP_400_BAD_REQUEST)
+
+    # Several dependent queries; run as one unit rather than hop per query
+    table = await sync_to_async(comeback_table)(options["seasons"], options["date_from"],
+                                                options["date_to"], options["venue"])
+    team_names = {team_id: name async for team_id, name in
+                  Team.objects.filter(id__in=table).values_list('id', 'name')}
+    rows = comeback_data(table, team_names, options["limit"])
+    if page["stream"]:
+        return streaming_json_response(rows, asynchronous=True)
+
+    position = None
+    if page["size"] is not None:
+        rows, position = list_page(rows, comeback_position, page)
+    return json_response(listing_data(request, rows, position, page))
+
+@async_get(renderer_classes=EXPORT_RENDERERS)
+async def async_export_matches(request):
+    filters, error = parse_export_filters(request.GET)
+    if error:
+        return json_response({"detail": error}, status.HTTP_400_BAD_REQUEST)
+    return export_response(export_matches(**filters), request.accepted_renderer, asynchronous=True)
+
+async def _async_search_response(request, index):
+    # Once the index is loaded and its version checked, the search itself
+    # never touches the database, so it runs on the event loop
+    await index.aversion()
+    return _search_response(request, index)
+
+async def async_search_teams(request):
+    return await _async_search_response(request, team_index)
+
+async def async_search_referees(request):
+    return await _async_search_response(request, referee_index)
+
+async def async_search_seasons(request):
+    return await _async_search_response(request, season_index)
 
 # -----------------------------
 # Homepage View
@@ -479,6 +913,65 @@ def homepage(request):
     "away_win_rate": 26.96,
     "draw_rate": 25.94
 }"""
+        },
+        {
+            "name": "Referee Impact Leaderboard",
+            "url": "/api/referees/impact/",
+            "description": "Impact statistics for every referee, computed in one pass.",
+            "method": "GET",
+            "parameters": [
+                {
+                    "name": "season",
+                    "type": "query",
+                    "required": False,
+                    "description": "Only count matches of this season (e.g., '2024/2025')."
+                },
+                {
+                    "name": "from",
+                    "type": "query",
+                    "required": False,
+                    "description": "Only count matches on or after this date (dd/mm/yyyy)."
+                },
+                {
+                    "name": "to",
+                    "type": "query",
+                    "required": False,
+                    "description": "Only count matches on or before this date (dd/mm/yyyy)."
+                },
+                {
+                    "name": "min_matches",
+                    "type": "query",
+                    "required": False,
+                    "description": "Leave out referees with fewer matches."
+                },
+                {
+                    "name": "ordering",
+                    "type": "query",
+                    "required": False,
+                    "description": "Field to sort by, '-' prefix for descending (default '-matches')."
+                },
+                {
+                    "name": "limit",
+                    "type": "query",
+                    "required": False,
+                    "description": "Max number of results to show."
+                }
+            ],
+            "sample_request": "GET /api/referees/impact/?min_matches=100&ordering=-home_win_rate&limit=2",
+            "sample_response": """[
+    {
+        "referee": "G Scott",
+        "average_yellow_cards_home": 1.22,
+        "average_yellow_cards_away": 1.46,
+        "average_red_cards_home": 0.1,
+        "average_red_cards_away": 0.08,
+        "home_win_rate": 53.33,
+        "away_win_rate": 30.48,
+        "draw_rate": 16.19,
+        "matches": 105
+    },
+    ...
+]"""
         },
         {
             "name": "Dynamic League Standings",
@@ -537,6 +1030,50 @@ def homepage(request):
                     "type": "query",
                     "required": False,
                     "description": "Max number of results to show."
+                },
+                {
+                    "name": "season",
+                    "type": "query",
+                    "required": False,
+                    "description": "Only count matches of this season (e.g., '2024/2025')."
+                },
+                {
+                    "name": "from",
+                    "type": "query",
+                    "required": False,
+                    "description": "Only count matches on or after this date (dd/mm/yyyy)."
+                },
+                {
+                    "name": "to",
+                    "type": "query",
+                    "required": False,
+                    "description": "Only count matches on or before this date (dd/mm/yyyy)."
+                },
+                {
+                    "name": "page_size",
+                    "type": "query",
+                    "required": False,
+                    "description": "Return one page of this many results as {\"next\", \"results\"}; "
+                                   "follow \"next\" for the rest."
+                },
+                {
+                    "name": "cursor",
+                    "type": "query",
+                    "required": False,
+                    "description": "Page position, as given in the \"next\" link of the previous page."
+                },
+                {
+                    "name": "stream",
+                    "type": "query",
+                    "required": False,
+                    "description": "1 to stream the full list as it is rendered."
+                },
+                {
+                    "name": "format",
+                    "type": "query",
+                    "required": False,
+                    "description": "msgpack, csv or arrow for a bulk format (also chosen by the Accept "
+                                   "header); pages of CSV and Arrow link the next one in a Link header."
                 }
             ],
             "sample_request": "GET /api/rivalries?limit=5",
@@ -567,20 +1104,120 @@ def homepage(request):
                     "type": "query",
                     "required": False,
                     "description": "Max number of results to show."
+                },
+                {
+                    "name": "season",
+                    "type": "query",
+                    "required": False,
+                    "description": "Only count matches of this season (e.g., '2024/2025')."
+                },
+                {
+                    "name": "from",
+                    "type": "query",
+                    "required": False,
+                    "description": "Only count matches on or after this date (dd/mm/yyyy)."
+                },
+                {
+                    "name": "to",
+                    "type": "query",
+                    "required": False,
+                    "description": "Only count matches on or before this date (dd/mm/yyyy)."
+                },
+                {
+                    "name": "venue",
+                    "type": "query",
+                    "required": False,
+                    "description": "'home' or 'away' to count only comebacks at that venue."
+                },
+                {
+                    "name": "page_size",
+                    "type": "query",
+                    "required": False,
+                    "description": "Return one page of this many results as {\"next\", \"results\"}; "
+                                   "follow \"next\" for the rest."
+                },
+                {
+                    "name": "cursor",
+                    "type": "query",
+                    "required": False,
+                    "description": "Page position, as given in the \"next\" link of the previous page."
+                },
+                {
+                    "name": "stream",
+                    "type": "query",
+                    "required": False,
+                    "description": "1 to stream the full list as it is rendered."
+                },
+                {
+                    "name": "format",
+                    "type": "query",
+                    "required": False,
+                    "description": "msgpack, csv or arrow for a bulk format (also chosen by the Accept "
+                                   "header); pages of CSV and Arrow link the next one in a Link header."
                 }
             ],
             "sample_request": "GET /api/teams/comebacks?limit=5",
             "sample_response": """[
     {
-        "team": "Tottenham",
-        "comebacks": 39
+        "team": "Man United",
+        "comebacks": 39,
+        "blown_leads": 5
     },
     {
-        "team": "Man United",
-        "comebacks": 39
+        "team": "Tottenham",
+        "comebacks": 39,
+        "blown_leads": 32
     },
     ...
 ]"""
+        },
+        {
+            "name": "Match Export",
+            "url": "/api/matches/export/?format=<format>",
+            "description": "Streams the full match history, or the matches passing the filters.",
+            "method": "GET",
+            "parameters": [
+                {
+                    "name": "format",
+                    "type": "query",
+                    "required": False,
+                    "description": "ndjson (default), csv or parquet; also chosen by the Accept header."
+                },
+                {
+                    "name": "season",
+                    "type": "query",
+                    "required": False,
+                    "description": "Only export matches of this season (e.g., '2024/2025')."
+                },
+                {
+                    "name": "team",
+                    "type": "query",
+                    "required": False,
+                    "description": "Only export matches this team played, home or away."
+                },
+                {
+                    "name": "referee",
+                    "type": "query",
+                    "required": False,
+                    "description": "Only export matches this referee took charge of."
+                },
+                {
+                    "name": "from",
+                    "type": "query",
+                    "required": False,
+                    "description": "Only export matches on or after this date (dd/mm/yyyy)."
+                },
+                {
+                    "name": "to",
+                    "type": "query",
+                    "required": False,
+                    "description": "Only export matches on or before this date (dd/mm/yyyy)."
+                }
+            ],
+            "sample_request": "GET /api/matches/export/?team=Arsenal&format=ndjson",
+            "sample_response": """{"id":9,"season":"2005/2006","date":"2005-08-14","home_team":"Arsenal","away_team":"Newcastle","full_time_result":"H","half_time_result":"D","home_goals":2,"away_goals":0,"referee":"S Bennett","home_yellow_cards":0,"away_yellow_cards":1,"home_red_cards":0,"away_red_cards":1}
+{"id":20,"season":"2005/2006","date":"2005-08-21","home_team":"Chelsea","away_team":"Arsenal","full_time_result":"H","half_time_result":"D","home_goals":1,"away_goals":0,"referee":"G Poll","home_yellow_cards":2,"away_yellow_cards":3,"home_red_cards":0,"away_red_cards":0}
+..."""
         },
         {
             "name": "Add Match Record",
@@ -663,8 +1300,9 @@ def homepage(request):
                 {
                     "name": "season",
                     "type": "body",
-                    "required": True,
-                    "description": "Season identifier (e.g., '2024/2025')."
+                    "required": False,
+                    "description": "Season identifier (e.g., '2024/2025'). Defaults to the season whose "
+                                   "dates hold the match date."
                 },
                 {
                     "name": "season_start_date",
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'premier_league_project.settings')
+# The read-only API runs on its async views here (settings.ASYNC_VIEWS)
+os.environ.setdefault('LEAGUE_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,9 +45,14 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        'league_app.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 MIDDLEWARE = [
+    'league_app.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,9 +60,31 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'league_app.middleware.StaticFilesMiddleware',  # WhiteNoise, async capable
 ]
 
+# Requests running more queries than this are logged as warnings
+REQUEST_QUERY_BUDGET = int(os.environ.get('REQUEST_QUERY_BUDGET', 20))
+
+# Largest JSON array /api/add-match/batch/ parses; NDJSON bodies are streamed
+BATCH_INGEST_MAX_BYTES = 64 * 1024 * 1024
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # One JSON line per request from RequestTimingMiddleware
+        'league_app.requests': {
+            'handlers': ['console'],
+            'level': os.environ.get('REQUEST_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 ROOT_URLCONF = 'premier_league_project.urls'
 
 TEMPLATES = [
@@ -77,18 +105,59 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'premier_league_project.wsgi.application'
 
+# Serve the read-only API from its async views. asgi.py turns this on, so
+# it is what runs under uvicorn workers; set LEAGUE_ASYNC_VIEWS=0 there to
+# keep the sync views. Django 4.2 still runs each sync middleware hook and
+# ORM call on a thread, so on SQLite with few cores the sync workers serve
+# more requests; compare with `benchmark.py load` before switching.
+ASYNC_VIEWS = os.environ.get('LEAGUE_ASYNC_VIEWS') == '1'
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# LEAGUE_DATABASE points the app at another SQLite file, e.g. a synthetic
+# league built by benchmark.py.
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('LEAGUE_DATABASE', BASE_DIR / 'db.sqlite3'),
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+#
+# API responses are cached per worker in local memory by default. Set
+# LEAGUE_CACHE_DIR to share one file-based cache between gunicorn workers.
+# Either way entries are keyed on the dataset version kept in the database,
+# so no worker serves data older than the last write.
+
+if os.environ.get('LEAGUE_CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['LEAGUE_CACHE_DIR'],
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'league-responses',
+            'OPTIONS': {'MAX_ENTRIES': 2000},
+        }
+    }
+
+RESPONSE_CACHE_TIMEOUT = 60 * 60  # seconds; the dataset version does the invalidating
+
+# Snapshot file written by snapshot.py. Workers map it to load the match
+# engine instead of each reading the Match table into private memory.
+MATCH_SNAPSHOT = os.environ.get('LEAGUE_SNAPSHOT')
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -130,6 +199,10 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# CSVs uploaded to /api/imports/ wait here until worker.py has imported them
+IMPORT_UPLOAD_DIR = os.environ.get('LEAGUE_IMPORT_DIR', os.path.join(MEDIA_ROOT, 'imports'))
+IMPORT_MAX_UPLOAD_BYTES = 512 * 1024 * 1024
+
 
 
 
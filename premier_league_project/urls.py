@@ -4,7 +4,7 @@ URL configuration for premier_league_project project.
 
 from django.contrib import admin
 from django.urls import path, include
-from league_app.views import homepage
+from league_app.views import homepage, metrics
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
@@ -23,5 +23,6 @@ urlpatterns = [
     path('admin/', admin.site.urls), # Django admin
     path('api/', include('league_app.urls')),  # Delegate to app-level urls.py
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'), # Swagger UI
+    path('metrics', metrics, name='metrics'),  # Prometheus scrape target
     path('', homepage, name='homepage'),  # Homepage
 ]
@@ -0,0 +1,32 @@
+# snapshot.py
+#
+# Exports the match data to the binary snapshot the API workers map at
+# start-up (MATCH_SNAPSHOT / LEAGUE_SNAPSHOT). Run it after large loads;
+# workers pick up the new file on their next request. Writes since the
+# last export are read from the database on top of it.
+
+import argparse
+import os
+import time
+import django
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'premier_league_project.settings')
+django.setup()
+
+from django.conf import settings
+
+from league_app.snapshot import write_snapshot
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export the match data to a binary snapshot.")
+    parser.add_argument('path', nargs='?', default=settings.MATCH_SNAPSHOT,
+                        help="File to write; defaults to LEAGUE_SNAPSHOT.")
+    args = parser.parse_args()
+    if not args.path:
+        parser.error("give a path or set LEAGUE_SNAPSHOT")
+
+    started = time.perf_counter()
+    (version, _, _), matches = write_snapshot(args.path)
+    print(f"Wrote {matches} matches at dataset version {version} to {args.path} "
+          f"({os.path.getsize(args.path) / 1024:.0f} KiB) in {time.perf_counter() - started:.2f}s.")
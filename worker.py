@@ -0,0 +1,30 @@
+# worker.py
+#
+# Background worker for CSV imports queued through POST /api/imports/.
+# Run it next to the web server (the Procfile's worker process); any number
+# can run against the same database.
+
+import argparse
+import os
+import django
+
+# Set up Django environment
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'premier_league_project.settings')
+django.setup()
+
+from league_app.imports import POLL_SECONDS, run_pending_jobs, run_worker
+from league_app.ingestion import BATCH_SIZE
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run queued CSV import jobs.")
+    parser.add_argument('--once', action='store_true',
+                        help="Run the jobs queued now and exit instead of waiting for more.")
+    parser.add_argument('--poll', type=float, default=POLL_SECONDS, metavar='SECONDS',
+                        help="How long to wait between checks of an empty queue.")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help="Rows per transaction.")
+    args = parser.parse_args()
+    if args.once:
+        print(f"Ran {run_pending_jobs(max(1, args.batch_size))} import job(s).")
+    else:
+        run_worker(max(0.1, args.poll), max(1, args.batch_size))